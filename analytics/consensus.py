@@ -4,22 +4,46 @@ analytics/consensus.py - Análisis de consenso entre bookmakers.
 Compara cuotas entre múltiples casas para detectar outliers, errores de precio,
 y validar si una cuota es "soft" (vulnerable) o "sharp" (eficiente).
 """
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+import math
 import statistics
 import os
 
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: ConsensusTable cae a un bucle por outcome
+    np = None
+
 
 OUTLIER_PERCENT = float(os.getenv("OUTLIER_PERCENT", "8.0"))
 MIN_BOOKS_CONSENSUS = int(os.getenv("MIN_BOOKS_CONSENSUS", "3"))
 
 
-def consensus_score(book_odds: Dict[str, float], target_book: str = None) -> Dict:
+def outcome_stats(book_odds: Dict[str, float]) -> Optional[Dict]:
+    """
+    Estadísticas de consenso de un outcome (None si hay menos de MIN_BOOKS_CONSENSUS casas).
+    
+    Se calculan una vez y se reutilizan para cada casa (consensus_score(stats=...)).
+    """
+    if not book_odds or len(book_odds) < MIN_BOOKS_CONSENSUS:
+        return None
+    odds_list = list(book_odds.values())
+    return {
+        'mean': statistics.mean(odds_list),
+        'median': statistics.median(odds_list),
+        'std': statistics.stdev(odds_list) if len(odds_list) > 1 else 0.0,
+        'num_books': len(book_odds)
+    }
+
+
+def consensus_score(book_odds: Dict[str, float], target_book: str = None, stats: Optional[Dict] = None) -> Dict:
     """
     Calcula el consensus y detecta outliers.
     
     Args:
         book_odds: {bookmaker: odd} para un mercado/selección específica
         target_book: Book a analizar (si None, analiza todos)
+        stats: outcome_stats(book_odds) ya calculado (opcional)
     
     Returns:
         {
@@ -38,20 +62,14 @@ def consensus_score(book_odds: Dict[str, float], target_book: str = None) -> Dic
         >>> consensus_score(odds, 'draftkings')
         {'mean': 2.15, 'median': 2.10, 'diff_from_mean_pct': 6.98, 'is_outlier': False, ...}
     """
-    if not book_odds or len(book_odds) < MIN_BOOKS_CONSENSUS:
+    if stats is None:
+        stats = outcome_stats(book_odds)
+    if stats is None:
         return {'error': 'insufficient_books', 'num_books': len(book_odds)}
     
-    odds_list = list(book_odds.values())
-    mean_odd = statistics.mean(odds_list)
-    median_odd = statistics.median(odds_list)
-    std_odd = statistics.stdev(odds_list) if len(odds_list) > 1 else 0.0
-    
-    result = {
-        'mean': mean_odd,
-        'median': median_odd,
-        'std': std_odd,
-        'num_books': len(book_odds)
-    }
+    mean_odd = stats['mean']
+    std_odd = stats['std']
+    result = dict(stats)
     
     if target_book and target_book in book_odds:
         target_odd = book_odds[target_book]
@@ -96,9 +114,10 @@ def detect_consensus_outliers(book_odds: Dict[str, float]) -> List[Dict]:
         Lista de {book, odd, diff_pct, z_score, is_high}
     """
     outliers = []
+    stats = outcome_stats(book_odds)
     
     for book in book_odds:
-        result = consensus_score(book_odds, book)
+        result = consensus_score(book_odds, book, stats=stats)
         if result.get('is_outlier'):
             outliers.append({
                 'book': book,
@@ -132,6 +151,175 @@ def market_agreement_score(book_odds: Dict[str, float]) -> float:
     return agreement
 
 
+class ConsensusTable:
+    """
+    Consenso de todo un OddsBook, calculado una vez por ciclo.
+    
+    Por clave (evento, mercado, outcome, point): num_books, mean, median, std,
+    agreement (como market_agreement_score) y la mejor cuota con su casa. Por
+    fila r: z-score y % de diferencia con la media de su clave. Las consultas
+    por fila son O(1) y devuelven lo mismo que consensus_score(book_odds, casa)
+    con book_odds = las cuotas de la misma línea. A diferencia del consenso por
+    outcome anterior, en totals/spreads las casas que cotizan otra línea no
+    entran en la media/std (h2h, sin point, no cambia).
+    
+    Example:
+        >>> table = ConsensusTable.from_book(book)
+        >>> table.consensus(r)       # {'mean':..., 'z_score':..., 'is_outlier':...}
+        >>> table.stats(pos, 'totals', 'Over', 2.5)
+    """
+    
+    def __init__(self, book, key, count, mean, median, std, best_row):
+        self.book = book
+        self.key = key            # fila -> clave (-1: cuota inválida)
+        self.count = count
+        self.mean = mean
+        self.median = median
+        self.std = std
+        self.best_row = best_row
+        self._lookup: Optional[Dict[Tuple, int]] = None
+    
+    @classmethod
+    def from_book(cls, book) -> 'ConsensusTable':
+        """Tabla del libro, memoizada en el propio libro (es de solo lectura)"""
+        table = getattr(book, '_consensus_table', None)
+        if table is None:
+            table = cls._build_numpy(book) if np is not None else cls._build_python(book)
+            book._consensus_table = table
+        return table
+    
+    @classmethod
+    def _build_numpy(cls, book) -> 'ConsensusTable':
+        cols = book.as_numpy()
+        price = cols['price']
+        rows = np.flatnonzero(~np.isnan(price))
+        key = np.full(len(price), -1, dtype=np.int64)
+        if not len(rows):
+            empty = np.zeros(0)
+            return cls(book, key, empty.astype(np.int64), empty, empty, empty, empty.astype(np.int64))
+        
+        # Agrupar filas por (evento, mercado, outcome, point) con un lexsort
+        outcome_key = (cols['event_idx'][rows].astype(np.int64) * len(book.markets)
+                       + cols['market_idx'][rows]) * len(book.names) + cols['name_idx'][rows]
+        point = cols['point'][rows]
+        point = np.where(np.isnan(point), -np.inf, point)
+        order = np.lexsort((point, outcome_key))
+        sorted_key, sorted_point = outcome_key[order], point[order]
+        starts_mask = np.ones(len(order), dtype=bool)
+        starts_mask[1:] = (sorted_key[1:] != sorted_key[:-1]) | (sorted_point[1:] != sorted_point[:-1])
+        group = np.cumsum(starts_mask) - 1
+        starts = np.flatnonzero(starts_mask)
+        key[rows[order]] = group
+        
+        grouped_rows = rows[order]
+        p = price[grouped_rows]
+        count = np.bincount(group)
+        mean = np.bincount(group, weights=p) / count
+        deviation = p - mean[group]
+        variance = np.bincount(group, weights=deviation * deviation) / np.maximum(count - 1, 1)
+        std = np.where(count > 1, np.sqrt(variance), 0.0)
+        
+        by_price = p[np.lexsort((p, group))]
+        median = (by_price[starts + (count - 1) // 2] + by_price[starts + count // 2]) / 2
+        
+        # Mejor cuota de cada clave (empates: la primera fila del libro)
+        best_row = grouped_rows[np.lexsort((grouped_rows, -p, group))][starts]
+        return cls(book, key, count, mean, median, std, best_row)
+    
+    @classmethod
+    def _build_python(cls, book) -> 'ConsensusTable':
+        groups: Dict[Tuple, int] = {}
+        members: List[List[int]] = []
+        key = []
+        for r in range(len(book)):
+            if math.isnan(book.price[r]):
+                key.append(-1)
+                continue
+            k = groups.setdefault((book.event_idx[r], book.market_idx[r], book.name_idx[r], book.point_at(r)), len(members))
+            if k == len(members):
+                members.append([])
+            members[k].append(r)
+            key.append(k)
+        count, mean, median, std, best_row = [], [], [], [], []
+        for rows in members:
+            prices = [book.price[r] for r in rows]
+            count.append(len(prices))
+            mean.append(statistics.mean(prices))
+            median.append(statistics.median(prices))
+            std.append(statistics.stdev(prices) if len(prices) > 1 else 0.0)
+            best_row.append(max(rows, key=lambda r: (book.price[r], -r)))
+        return cls(book, key, count, mean, median, std, best_row)
+    
+    # ==================== CONSULTAS ====================
+    
+    def num_books(self, r: int) -> int:
+        k = self.key[r]
+        return int(self.count[k]) if k >= 0 else 0
+    
+    def consensus(self, r: int) -> Dict:
+        """consensus_score() de la fila r frente a las demás casas de su clave"""
+        k = self.key[r]
+        n = int(self.count[k]) if k >= 0 else 0
+        if n < MIN_BOOKS_CONSENSUS:
+            return {'error': 'insufficient_books', 'num_books': n}
+        mean_odd, std_odd = float(self.mean[k]), float(self.std[k])
+        target_odd = self.book.price[r]
+        diff_pct = ((target_odd - mean_odd) / mean_odd) * 100
+        return {
+            'mean': mean_odd,
+            'median': float(self.median[k]),
+            'std': std_odd,
+            'num_books': n,
+            'target_odd': target_odd,
+            'diff_from_mean_pct': diff_pct,
+            'z_score': (target_odd - mean_odd) / std_odd if std_odd > 0 else 0.0,
+            'is_outlier': abs(diff_pct) > OUTLIER_PERCENT
+        }
+    
+    def agreement(self, r: int) -> float:
+        """market_agreement_score() de la clave de la fila r"""
+        k = self.key[r]
+        if k < 0 or self.count[k] < 2:
+            return 0.0
+        mean_odd = float(self.mean[k])
+        cv = float(self.std[k]) / mean_odd if mean_odd > 0 else 1.0
+        return max(0.0, 1.0 - (cv * 5))
+    
+    def best(self, r: int) -> Tuple[Optional[str], float]:
+        """(casa, cuota) con la mejor cuota de la clave de la fila r"""
+        k = self.key[r]
+        if k < 0:
+            return None, 0.0
+        best_row = int(self.best_row[k])
+        return self.book.books[self.book.book_idx[best_row]], self.book.price[best_row]
+    
+    def stats(self, pos: int, market_key: str, outcome: str, point: Optional[float] = None) -> Optional[Dict]:
+        """Estadísticas de una clave (None si no hay cuotas)"""
+        if self._lookup is None:
+            self._lookup = {}
+            book = self.book
+            for r in range(len(book)):
+                k = int(self.key[r])
+                if k >= 0:
+                    self._lookup.setdefault(
+                        (book.event_idx[r], book.markets[book.market_idx[r]], book.names[book.name_idx[r]],
+                         book.point_at(r)), r)
+        r = self._lookup.get((pos, market_key, outcome, point))
+        if r is None:
+            return None
+        k = int(self.key[r])
+        best_book, best_odd = self.best(r)
+        return {
+            'mean': float(self.mean[k]),
+            'median': float(self.median[k]),
+            'std': float(self.std[k]),
+            'num_books': int(self.count[k]),
+            'agreement': self.agreement(r),
+            'best_book': best_book,
+            'best_odd': best_odd
+        }
+
+
 # TODO: Implementar
 # - sharp_vs_soft_books(): clasificar books por sharpness
 # - steam_across_books(): detectar steam coordinado
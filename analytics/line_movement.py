@@ -6,9 +6,10 @@ para identificar sharp action y mejores oportunidades de value betting.
 """
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from collections import defaultdict
 from data.historical_db import historical_db
+from data.odds_book import OddsBook
 
 logger = logging.getLogger(__name__)
 
@@ -16,63 +17,95 @@ logger = logging.getLogger(__name__)
 class LineMovementTracker:
     """Rastrea y analiza movimientos de líneas/cuotas en tiempo real"""
     
-    def __init__(self):
+    def __init__(self, persist: bool = True):
         self.odds_history = defaultdict(list)  # event_id -> [(timestamp, odds_data)]
+        self.persist = persist  # False = solo memoria (replay offline, sin Supabase)
+        self._last_snapshots = {}  # event_id -> snapshots del último ciclo (para eventos sin cambios)
         
-    def record_odds_snapshot(self, events: List[Dict]) -> int:
+    def record_odds_snapshot(self, events: List[Dict], changes=None, book: Optional[OddsBook] = None) -> int:
         """
         Guarda snapshot de cuotas actuales para tracking histórico.
         
         Args:
             events: Lista de eventos con cuotas actuales
+            changes: IngestChanges opcional (data/fingerprint.py). Si se pasa, los eventos
+                sin cambios reutilizan los snapshots del ciclo anterior en memoria y
+                solo se persisten en BD los mercados que cambiaron.
+            book: OddsBook del ciclo (data/odds_book.py); si no contiene los eventos
+                se construye uno local.
             
         Returns:
             Número de snapshots guardados
         """
         try:
             now = datetime.now(timezone.utc)
+            timestamp = now.isoformat()
+            book = OddsBook.ensure(events, book)
             saved = 0
+            reused = 0
+            snapshots_to_save = []  # Acumular para batch insert
             
             for event in events:
                 event_id = event.get('id')
                 if not event_id:
                     continue
                 
-                # Extraer cuotas de todos los bookmakers
-                snapshots_to_save = []  # Acumular para batch insert
+                # Evento sin cambios: mismas cuotas que el ciclo anterior, no re-recorrer
+                if changes is not None and not changes.is_changed(event_id) and event_id in self._last_snapshots:
+                    for snapshot in self._last_snapshots[event_id]:
+                        self.odds_history[event_id].append((now, snapshot))
+                    reused += len(self._last_snapshots[event_id])
+                    saved += len(self._last_snapshots[event_id])
+                    continue
+                
+                changed_markets = changes.changed_markets.get(event_id) if changes is not None else None
+                event_snapshots = []
                 
-                for bookmaker in event.get('bookmakers', []):
-                    book_name = bookmaker.get('title', bookmaker.get('key'))
+                # Extraer cuotas de todos los bookmakers desde el libro compartido
+                pos = book.locate(event)
+                sport_key = event.get('sport_key')
+                for g in book.event_groups(pos):
+                    b = book.group_book[g]
+                    book_name = book.book_titles[b] or book.books[b]
+                    market_key = book.markets[book.group_market[g]]
+                    persist = changed_markets is None or (book.books[b], market_key) in changed_markets
                     
-                    for market in bookmaker.get('markets', []):
-                        market_key = market.get('key')
+                    for r in book.group_rows(g):
+                        price = book.price[r]
+                        if price != price:  # NaN: cuota inválida
+                            continue
+                        snapshot = {
+                            'timestamp': timestamp,
+                            'event_id': event_id,
+                            'sport_key': sport_key,
+                            'bookmaker': book_name,
+                            'market': market_key,
+                            'selection': book.names[book.name_idx[r]],
+                            'odds': price,
+                            'point': book.point_at(r)  # Para spreads/totals
+                        }
                         
-                        for outcome in market.get('outcomes', []):
-                            snapshot = {
-                                'timestamp': now.isoformat(),
-                                'event_id': event_id,
-                                'sport_key': event.get('sport_key'),
-                                'bookmaker': book_name,
-                                'market': market_key,
-                                'selection': outcome.get('name'),
-                                'odds': float(outcome.get('price')),
-                                'point': outcome.get('point')  # Para spreads/totals
-                            }
-                            
-                            # Guardar en memoria (últimas 24 horas)
-                            self.odds_history[event_id].append((now, snapshot))
+                        # Guardar en memoria (últimas 24 horas)
+                        self.odds_history[event_id].append((now, snapshot))
+                        event_snapshots.append(snapshot)
+                        if persist:
                             snapshots_to_save.append(snapshot)
-                            saved += 1
+                        saved += 1
+                
+                self._last_snapshots[event_id] = event_snapshots
             
             # Guardar TODOS los snapshots en lote (mucho más rápido)
-            if snapshots_to_save:
+            if snapshots_to_save and self.persist:
                 logger.info(f"💾 Guardando {len(snapshots_to_save)} snapshots en lote...")
                 historical_db.save_odds_snapshots_batch(snapshots_to_save)
             
             # Limpiar datos viejos (> 24 horas)
             self._cleanup_old_data()
             
-            logger.info(f"📸 Recorded {saved} odds snapshots")
+            logger.info(
+                f"📸 Recorded {saved} odds snapshots "
+                f"({reused} reused from unchanged events, {len(snapshots_to_save)} persisted)"
+            )
             return saved
             
         except Exception as e:
@@ -94,6 +127,7 @@ class LineMovementTracker:
                 # Eliminar evento si no tiene snapshots
                 if not self.odds_history[event_id]:
                     del self.odds_history[event_id]
+                    self._last_snapshots.pop(event_id, None)
                     
         except Exception as e:
             logger.error(f"Error cleaning old data: {e}")
@@ -115,52 +149,7 @@ class LineMovementTracker:
             Lista de steam moves detectados
         """
         try:
-            snapshots = self.odds_history.get(event_id, [])
-            
-            if len(snapshots) < 2:
-                return []
-            
-            steam_moves = []
-            
-            # Agrupar por bookmaker + market + selection
-            grouped = defaultdict(list)
-            for ts, snap in snapshots:
-                key = (snap['bookmaker'], snap['market'], snap['selection'])
-                grouped[key].append((ts, snap))
-            
-            # Analizar cada serie temporal
-            for key, series in grouped.items():
-                if len(series) < 2:
-                    continue
-                
-                # Ordenar por timestamp
-                series.sort(key=lambda x: x[0])
-                
-                # Comparar último vs primero (últimos 30 min)
-                recent = [s for s in series if s[0] > datetime.now(timezone.utc) - timedelta(minutes=30)]
-                
-                if len(recent) < 2:
-                    continue
-                
-                first_odds = recent[0][1]['odds']
-                last_odds = recent[-1][1]['odds']
-                
-                # Calcular cambio porcentual
-                change_percent = ((last_odds - first_odds) / first_odds) * 100
-                
-                if abs(change_percent) >= threshold_percent:
-                    steam_moves.append({
-                        'event_id': event_id,
-                        'bookmaker': key[0],
-                        'market': key[1],
-                        'selection': key[2],
-                        'initial_odds': first_odds,
-                        'current_odds': last_odds,
-                        'change_percent': change_percent,
-                        'time_frame': '30min',
-                        'direction': 'shortening' if change_percent < 0 else 'drifting',
-                        'timestamp': datetime.now(timezone.utc).isoformat()
-                    })
+            steam_moves = self._steam_moves(event_id, self.odds_history.get(event_id, []), threshold_percent)
             
             if steam_moves:
                 logger.info(f"🔥 Detected {len(steam_moves)} steam moves for event {event_id[:8]}")
@@ -171,6 +160,58 @@ class LineMovementTracker:
             logger.error(f"Error detecting steam moves: {e}")
             return []
     
+    @staticmethod
+    def _steam_moves(event_id: str, snapshots: List[Tuple], threshold_percent: float) -> List[Dict]:
+        """Steam moves de los snapshots de un evento (una pasada agrupada)"""
+        if len(snapshots) < 2:
+            return []
+        
+        steam_moves = []
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(minutes=30)
+        
+        # Agrupar por bookmaker + market + selection
+        grouped = defaultdict(list)
+        for ts, snap in snapshots:
+            key = (snap['bookmaker'], snap['market'], snap['selection'])
+            grouped[key].append((ts, snap))
+        
+        # Analizar cada serie temporal
+        for key, series in grouped.items():
+            if len(series) < 2:
+                continue
+            
+            # Ordenar por timestamp
+            series.sort(key=lambda x: x[0])
+            
+            # Comparar último vs primero (últimos 30 min)
+            recent = [s for s in series if s[0] > cutoff]
+            
+            if len(recent) < 2:
+                continue
+            
+            first_odds = recent[0][1]['odds']
+            last_odds = recent[-1][1]['odds']
+            
+            # Calcular cambio porcentual
+            change_percent = ((last_odds - first_odds) / first_odds) * 100
+            
+            if abs(change_percent) >= threshold_percent:
+                steam_moves.append({
+                    'event_id': event_id,
+                    'bookmaker': key[0],
+                    'market': key[1],
+                    'selection': key[2],
+                    'initial_odds': first_odds,
+                    'current_odds': last_odds,
+                    'change_percent': change_percent,
+                    'time_frame': '30min',
+                    'direction': 'shortening' if change_percent < 0 else 'drifting',
+                    'timestamp': now.isoformat()
+                })
+        
+        return steam_moves
+    
     def get_line_movement_summary(self, event_id: str, selection: str) -> Optional[Dict]:
         """
         Obtiene resumen del movimiento de línea para una selección específica.
@@ -186,6 +227,8 @@ class LineMovementTracker:
             snapshots = self.odds_history.get(event_id, [])
             
             if not snapshots:
+                if not self.persist:
+                    return None
                 # Intentar obtener de Supabase
                 snapshots_db = historical_db.get_odds_history(event_id, hours=24)
                 if not snapshots_db:
@@ -201,52 +244,57 @@ class LineMovementTracker:
                 snapshots = [(ts, snap) for ts, snap in snapshots 
                            if snap['selection'] == selection]
             
-            if len(snapshots) < 2:
-                return None
-            
-            # Ordenar por tiempo
-            snapshots.sort(key=lambda x: x[0])
-            
-            # Calcular estadísticas
-            odds_values = [snap['odds'] for _, snap in snapshots]
-            
-            opening_odds = odds_values[0]
-            current_odds = odds_values[-1]
-            peak_odds = max(odds_values)
-            lowest_odds = min(odds_values)
-            
-            change_percent = ((current_odds - opening_odds) / opening_odds) * 100
-            
-            # Detectar tendencia
-            if len(odds_values) >= 3:
-                recent_trend = odds_values[-3:]
-                if all(recent_trend[i] < recent_trend[i+1] for i in range(len(recent_trend)-1)):
-                    trend = 'drifting'  # Cuota subiendo
-                elif all(recent_trend[i] > recent_trend[i+1] for i in range(len(recent_trend)-1)):
-                    trend = 'shortening'  # Cuota bajando
-                else:
-                    trend = 'stable'
-            else:
-                trend = 'insufficient_data'
-            
-            return {
-                'event_id': event_id,
-                'selection': selection,
-                'opening_odds': opening_odds,
-                'current_odds': current_odds,
-                'peak_odds': peak_odds,
-                'lowest_odds': lowest_odds,
-                'change_percent': change_percent,
-                'trend': trend,
-                'snapshots_count': len(snapshots),
-                'time_span_hours': (snapshots[-1][0] - snapshots[0][0]).total_seconds() / 3600,
-                'is_favorable': current_odds > opening_odds  # Mejores cuotas que al inicio
-            }
+            return self._summarize(event_id, selection, snapshots)
             
         except Exception as e:
             logger.error(f"Error getting line movement summary: {e}")
             return None
     
+    @staticmethod
+    def _summarize(event_id: str, selection: str, snapshots: List[Tuple]) -> Optional[Dict]:
+        """Resumen de movimiento a partir de los snapshots (ts, snap) de una selección"""
+        if len(snapshots) < 2:
+            return None
+        
+        # Ordenar por tiempo
+        snapshots.sort(key=lambda x: x[0])
+        
+        # Calcular estadísticas
+        odds_values = [snap['odds'] for _, snap in snapshots]
+        
+        opening_odds = odds_values[0]
+        current_odds = odds_values[-1]
+        peak_odds = max(odds_values)
+        lowest_odds = min(odds_values)
+        
+        change_percent = ((current_odds - opening_odds) / opening_odds) * 100
+        
+        # Detectar tendencia
+        if len(odds_values) >= 3:
+            recent_trend = odds_values[-3:]
+            if all(recent_trend[i] < recent_trend[i+1] for i in range(len(recent_trend)-1)):
+                trend = 'drifting'  # Cuota subiendo
+            elif all(recent_trend[i] > recent_trend[i+1] for i in range(len(recent_trend)-1)):
+                trend = 'shortening'  # Cuota bajando
+            else:
+                trend = 'stable'
+        else:
+            trend = 'insufficient_data'
+        
+        return {
+            'event_id': event_id,
+            'selection': selection,
+            'opening_odds': opening_odds,
+            'current_odds': current_odds,
+            'peak_odds': peak_odds,
+            'lowest_odds': lowest_odds,
+            'change_percent': change_percent,
+            'trend': trend,
+            'snapshots_count': len(snapshots),
+            'time_span_hours': (snapshots[-1][0] - snapshots[0][0]).total_seconds() / 3600,
+            'is_favorable': current_odds > opening_odds  # Mejores cuotas que al inicio
+        }
+
     def find_reverse_line_movement(self, events: List[Dict]) -> List[Dict]:
         """
         Detecta Reverse Line Movement (RLM): cuotas que se mueven contra el sentido común.
@@ -312,51 +360,115 @@ class LineMovementTracker:
             Dict con recomendación de timing
         """
         try:
-            movement = self.get_line_movement_summary(event_id, selection)
-            
-            if not movement:
-                return {'recommendation': 'insufficient_data'}
+            return self._timing(self.get_line_movement_summary(event_id, selection))
             
-            current = movement['current_odds']
-            peak = movement['peak_odds']
-            opening = movement['opening_odds']
-            trend = movement['trend']
-            
-            # Lógica de recomendación
-            if trend == 'drifting' and current >= peak * 0.98:
-                # Cuotas subiendo y cerca del máximo
-                return {
-                    'recommendation': 'bet_now',
-                    'reason': 'Cuotas en máximo reciente y subiendo',
-                    'current_odds': current,
-                    'confidence': 'high'
-                }
-            elif trend == 'shortening' and current <= opening * 1.02:
-                # Cuotas bajando rápidamente
-                return {
-                    'recommendation': 'bet_soon',
-                    'reason': 'Cuotas bajando, puede seguir cayendo',
-                    'current_odds': current,
-                    'confidence': 'medium'
-                }
-            elif trend == 'stable':
-                return {
-                    'recommendation': 'wait_and_watch',
-                    'reason': 'Cuotas estables, monitorear',
-                    'current_odds': current,
-                    'confidence': 'low'
-                }
-            else:
-                return {
-                    'recommendation': 'analyze_carefully',
-                    'reason': 'Movimiento impredecible',
-                    'current_odds': current,
-                    'confidence': 'low'
-                }
-                
         except Exception as e:
             logger.error(f"Error getting best timing: {e}")
             return {'recommendation': 'error'}
+    
+    def get_movement_batch(self, pairs: Iterable[Tuple[str, str]],
+                           threshold_percent: float = 5.0) -> Dict[Tuple[str, str], Dict]:
+        """
+        Resumen, timing y steam de todas las (event_id, selection) de un ciclo.
+        
+        Una pasada agrupada por evento: el historial de cada evento se lee (y
+        se consulta a la BD si no está en memoria) una sola vez, se reparte por
+        selección y los steam moves se detectan una vez por evento, en lugar de
+        get_line_movement_summary + get_best_odds_timing + detect_steam_moves
+        por candidato. Mismos resultados que esas tres llamadas.
+        
+        Args:
+            pairs: (event_id, selection) de los candidatos (se admiten repetidos)
+            threshold_percent: % mínimo para steam move (como detect_steam_moves)
+            
+        Returns:
+            {(event_id, selection): {'summary': Dict|None, 'timing': Dict, 'has_steam_move': bool}}
+        """
+        by_event: Dict[str, set] = defaultdict(set)
+        for event_id, selection in pairs:
+            by_event[event_id].add(selection)
+        
+        results = {}
+        for event_id, selections in by_event.items():
+            try:
+                snapshots = self.odds_history.get(event_id, [])
+                steam_selections = set()
+                if snapshots:
+                    steam_moves = self._steam_moves(event_id, snapshots, threshold_percent)
+                    if steam_moves:
+                        logger.info(f"🔥 Detected {len(steam_moves)} steam moves for event {event_id[:8]}")
+                    steam_selections = {sm['selection'] for sm in steam_moves}
+                elif self.persist:
+                    # Intentar obtener de Supabase (una consulta por evento)
+                    snapshots = [
+                        (datetime.fromisoformat(s['timestamp']), s)
+                        for s in historical_db.get_odds_history(event_id, hours=24) or []
+                    ]
+                
+                by_selection = defaultdict(list)
+                for ts, snap in snapshots:
+                    if snap['selection'] in selections:
+                        by_selection[snap['selection']].append((ts, snap))
+                
+                for selection in selections:
+                    summary = self._summarize(event_id, selection, by_selection.get(selection, []))
+                    results[(event_id, selection)] = {
+                        'summary': summary,
+                        'timing': self._timing(summary),
+                        'has_steam_move': selection in steam_selections
+                    }
+            except Exception as e:
+                logger.error(f"Error in batch line movement for event {event_id}: {e}")
+                for selection in selections:
+                    results[(event_id, selection)] = {
+                        'summary': None,
+                        'timing': {'recommendation': 'error'},
+                        'has_steam_move': False
+                    }
+        return results
+    
+    @staticmethod
+    def _timing(movement: Optional[Dict]) -> Dict:
+        """Recomendación de timing a partir de un resumen de movimiento"""
+        if not movement:
+            return {'recommendation': 'insufficient_data'}
+        
+        current = movement['current_odds']
+        peak = movement['peak_odds']
+        opening = movement['opening_odds']
+        trend = movement['trend']
+        
+        # Lógica de recomendación
+        if trend == 'drifting' and current >= peak * 0.98:
+            # Cuotas subiendo y cerca del máximo
+            return {
+                'recommendation': 'bet_now',
+                'reason': 'Cuotas en máximo reciente y subiendo',
+                'current_odds': current,
+                'confidence': 'high'
+            }
+        elif trend == 'shortening' and current <= opening * 1.02:
+            # Cuotas bajando rápidamente
+            return {
+                'recommendation': 'bet_soon',
+                'reason': 'Cuotas bajando, puede seguir cayendo',
+                'current_odds': current,
+                'confidence': 'medium'
+            }
+        elif trend == 'stable':
+            return {
+                'recommendation': 'wait_and_watch',
+                'reason': 'Cuotas estables, monitorear',
+                'current_odds': current,
+                'confidence': 'low'
+            }
+        else:
+            return {
+                'recommendation': 'analyze_carefully',
+                'reason': 'Movimiento impredecible',
+                'current_odds': current,
+                'confidence': 'low'
+            }
 
 
 # Instancia global
@@ -0,0 +1,100 @@
+"""
+analytics/market_index.py - Índice de mercados de un evento para consenso/vig
+
+Vista por evento sobre las tablas del ciclo (ConsensusTable y VigTable, una
+pasada por todo el OddsBook). Se construye en una pasada por las cuotas del
+evento:
+
+    (market, outcome, point) -> {book: fila}     (consenso entre casas)
+    (book, market) -> grupo del libro            (vig de cada casa)
+
+Las estadísticas de consenso (media/mediana/std), el agreement y el vig no se
+recalculan por candidato: se leen de las tablas, que agrupan por línea (point)
+para que totals/spreads a distintas líneas no se mezclen.
+
+Ejemplo:
+    index = MarketIndex.from_book(book, book.locate(event))
+    index.consensus('h2h', 'Lakers', 'bet365')
+    index.consensus('totals', 'Over', 'bet365', point=2.5)
+    index.vig('bet365', 'h2h')
+"""
+import math
+from typing import Dict, Optional, Tuple
+
+from analytics.consensus import ConsensusTable, consensus_score, market_agreement_score
+from analytics.vig import VigTable, calculate_vig, market_efficiency_score
+from data.odds_book import OddsBook
+
+OutcomeKey = Tuple[str, str, Optional[float]]  # (market, outcome, point)
+
+
+class MarketIndex:
+    """Filas de un evento indexadas por mercado/outcome/línea y por casa/mercado"""
+
+    def __init__(self, book: OddsBook, pos: int):
+        self.book = book
+        self.pos = pos
+        self.rows: Dict[OutcomeKey, Dict[str, int]] = {}
+        self.groups: Dict[Tuple[str, str], int] = {}
+        books, markets, names = book.books, book.markets, book.names
+        for g in book.event_groups(pos):
+            bookmaker = books[book.group_book[g]]
+            market_key = markets[book.group_market[g]]
+            self.groups[(bookmaker, market_key)] = g
+            for r in book.group_rows(g):
+                # Cuotas sin price no entran en el consenso (igual que en la ConsensusTable)
+                if math.isnan(book.price[r]):
+                    continue
+                self.rows.setdefault((market_key, names[book.name_idx[r]], book.point_at(r)), {})[bookmaker] = r
+        self.consensus_table = ConsensusTable.from_book(book)
+        self.vig_table = VigTable.from_book(book)
+
+    @classmethod
+    def from_book(cls, book: OddsBook, pos: int) -> 'MarketIndex':
+        """Desde el OddsBook del ciclo (data/odds_book.py)"""
+        return cls(book, pos)
+
+    @classmethod
+    def from_event(cls, event: Dict) -> 'MarketIndex':
+        """Desde el dict del evento de The Odds API (libro de un solo evento)"""
+        book = OddsBook.from_events([event])
+        return cls(book, book.locate(event))
+
+    # ==================== CONSULTAS ====================
+
+    def outcome_odds(self, market_key: str, outcome: str, point: Optional[float] = None) -> Dict[str, float]:
+        """{book: cuota} de un outcome (y línea) entre todas las casas"""
+        rows = self.rows.get((market_key, outcome, point), {})
+        return {bookmaker: self.book.price[r] for bookmaker, r in rows.items()}
+
+    def book_market(self, bookmaker: str, market_key: str) -> Dict[str, float]:
+        """{outcome: cuota} de un mercado de una casa"""
+        g = self.groups.get((bookmaker, market_key))
+        if g is None:
+            return {}
+        return {self.book.names[self.book.name_idx[r]]: self.book.price[r] for r in self.book.group_rows(g)}
+
+    def consensus(self, market_key: str, outcome: str, target_book: str = None,
+                  point: Optional[float] = None) -> Dict:
+        """consensus_score() del outcome frente a target_book, desde la ConsensusTable"""
+        r = self.rows.get((market_key, outcome, point), {}).get(target_book)
+        if r is not None:
+            return self.consensus_table.consensus(r)
+        # Casa que no cotiza el outcome (o sin casa): cálculo directo
+        return consensus_score(self.outcome_odds(market_key, outcome, point), target_book)
+
+    def agreement(self, market_key: str, outcome: str, point: Optional[float] = None) -> float:
+        rows = self.rows.get((market_key, outcome, point))
+        if not rows:
+            return market_agreement_score({})
+        return self.consensus_table.agreement(next(iter(rows.values())))
+
+    def vig(self, bookmaker: str, market_key: str) -> float:
+        g = self.groups.get((bookmaker, market_key))
+        return float(self.vig_table.vig[g]) if g is not None else calculate_vig({})
+
+    def efficiency(self, bookmaker: str, market_key: str) -> float:
+        g = self.groups.get((bookmaker, market_key))
+        if g is None:
+            return market_efficiency_score(self.vig(bookmaker, market_key))
+        return float(self.vig_table.efficiency[g])
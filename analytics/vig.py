@@ -20,6 +20,11 @@ Ejemplo:
 from typing import Dict, List, Tuple, Union
 import os
 
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: VigTable cae a un bucle por mercado
+    np = None
+
 
 # Configuración desde .env o valores por defecto
 VIG_MAX = float(os.getenv("VIG_MAX", "12.0"))  # Como porcentaje
@@ -78,7 +83,7 @@ def remove_vig(odds: List[float]) -> List[float]:
         >>> remove_vig([2.10, 3.40, 3.50])
         [0.444, 0.273, 0.265]
     """
-    overround, _ = calculate_vig(odds)
+    overround = sum(1.0 / odd for odd in odds)
     
     if overround <= 1.0:
         # No hay vig, devolver probabilidades implícitas
@@ -159,6 +164,83 @@ def market_efficiency_score(vig: float) -> float:
     return max(0.0, 1.0 - (vig / 100))
 
 
+class VigTable:
+    """
+    Vig de todos los mercados (evento × casa × mercado) de un OddsBook en una pasada.
+    
+    Por grupo g del libro: overround[g], vig[g] (%, como calculate_vig) y
+    efficiency[g] (como market_efficiency_score). Por fila r: fair_prob[r],
+    probabilidad sin vig (como remove_vig) y group[r]. Mercados con alguna
+    cuota <= 1.0 o inválida tienen vig 0.0 y fair_prob NaN.
+    
+    Example:
+        >>> table = VigTable.from_book(book)
+        >>> table.vig[g], table.row_vig(r), table.fair_prob[r]
+    """
+    
+    def __init__(self, overround, vig, efficiency, fair_prob, group):
+        self.overround = overround
+        self.vig = vig
+        self.efficiency = efficiency
+        self.fair_prob = fair_prob
+        self.group = group
+    
+    @classmethod
+    def from_book(cls, book) -> 'VigTable':
+        """Tabla del libro, memoizada en el propio libro (es de solo lectura)"""
+        table = getattr(book, '_vig_table', None)
+        if table is None:
+            table = cls._build_numpy(book) if np is not None else cls._build_python(book)
+            book._vig_table = table
+        return table
+    
+    @classmethod
+    def _build_numpy(cls, book) -> 'VigTable':
+        starts = np.frombuffer(book.group_start, dtype=np.int32)
+        n_groups = len(starts) - 1
+        group = np.repeat(np.arange(n_groups), np.diff(starts))
+        price = book.as_numpy()['price']
+        
+        valid = price > 1.0  # NaN nunca pasa
+        implied = np.where(valid, 1.0 / np.where(valid, price, 1.0), 0.0)
+        overround = np.bincount(group, weights=implied, minlength=n_groups)
+        invalid = np.bincount(group, weights=~valid, minlength=n_groups) > 0
+        invalid |= np.diff(starts) == 0
+        overround[invalid] = np.nan
+        
+        vig = np.where(invalid, 0.0, np.maximum(0.0, (np.nan_to_num(overround, nan=1.0) - 1.0) * 100))
+        efficiency = np.maximum(0.0, 1.0 - vig / 100)
+        
+        row_overround = overround[group]
+        fair_prob = np.where(row_overround > 1.0, implied / row_overround, implied)
+        fair_prob[np.isnan(row_overround)] = np.nan
+        return cls(overround, vig, efficiency, fair_prob, group)
+    
+    @classmethod
+    def _build_python(cls, book) -> 'VigTable':
+        overround, vig, efficiency, fair_prob, group = [], [], [], [], []
+        for g in range(len(book.group_start) - 1):
+            prices = [book.price[r] for r in book.group_rows(g)]
+            group.extend(g for _ in prices)
+            if not prices or not all(p > 1.0 for p in prices):
+                overround.append(float('nan'))
+                vig.append(0.0)
+                efficiency.append(1.0)
+                fair_prob.extend(float('nan') for _ in prices)
+                continue
+            total = sum(1.0 / p for p in prices)
+            market_vig = calculate_vig(prices)
+            overround.append(total)
+            vig.append(market_vig)
+            efficiency.append(market_efficiency_score(market_vig))
+            fair_prob.extend(remove_vig(prices))
+        return cls(overround, vig, efficiency, fair_prob, group)
+    
+    def row_vig(self, r: int) -> float:
+        """Vig (%) del mercado al que pertenece la fila r"""
+        return float(self.vig[self.group[r]])
+
+
 # TODO: Implementar métodos avanzados de remoción de vig:
 # - Shin's method (basado en insider trading)
 # - Power method (ajuste proporcional por potencia)
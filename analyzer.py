@@ -1,6 +1,11 @@
 ﻿"""
 Generador de análisis detallado para apuestas de valor.
+
+Los scanners no generan el texto: guardan un LazyAnalysis en candidate['analysis']
+que se renderiza solo cuando un formatter lo pide (str() o render()), memoizado
+por (partido, selección, cuota, probabilidad).
 """
+from functools import lru_cache
 
 
 def generate_analysis(event: dict, selection: str, odd: float, prob: float) -> str:
@@ -16,10 +21,48 @@ def generate_analysis(event: dict, selection: str, odd: float, prob: float) -> s
     Returns:
         Texto con el análisis detallado
     """
-    sport = event.get("sport_key", "unknown")
-    home = event.get("home_team", "")
-    away = event.get("away_team", "")
-    
+    return _render_analysis(
+        event.get("sport_key", "unknown"), event.get("home_team", ""), event.get("away_team", ""),
+        selection, odd, prob
+    )
+
+
+class LazyAnalysis:
+    """Análisis diferido de un candidato: el texto se genera al primer str()/render()"""
+
+    __slots__ = ('event', 'selection', 'odd', 'prob')
+
+    def __init__(self, event: dict, selection: str, odd: float, prob: float):
+        self.event = event
+        self.selection = selection
+        self.odd = odd
+        self.prob = prob
+
+    def _key(self) -> tuple:
+        return (self.event.get("id"), self.selection, self.odd, self.prob)
+
+    def render(self) -> str:
+        return generate_analysis(self.event, self.selection, self.odd, self.prob)
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyAnalysis):
+            return self._key() == other._key()
+        if isinstance(other, str):
+            return self.render() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"LazyAnalysis({self.selection!r} @ {self.odd})"
+
+
+@lru_cache(maxsize=1024)
+def _render_analysis(sport: str, home: str, away: str, selection: str, odd: float, prob: float) -> str:
     # Calcular métricas clave
     value = odd * prob
     value_pct = (value - 1) * 100
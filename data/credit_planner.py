@@ -0,0 +1,254 @@
+"""
+data/credit_planner.py - Planificador de polling según créditos de The Odds API
+
+En lugar de pedir todos los deportes cada UPDATE_INTERVAL_MINUTES, decide por
+deporte cuándo vale la pena gastar créditos:
+- Lee x-requests-remaining / x-requests-used / x-requests-last de cada respuesta
+- Mira el commence_time más cercano de cada deporte respecto a ALERT_WINDOW_HOURS
+- Deportes con eventos cerca del kickoff se refrescan más seguido,
+  deportes sin eventos próximos se espacian
+- Si el gasto proyectado supera el presupuesto restante del periodo,
+  estira primero los intervalos de los deportes lejanos al kickoff
+
+Ejemplo:
+    planner = CreditPlanner(alert_window_hours=8)
+    sports = planner.due_sports(SPORTS)      # deportes a pedir este ciclo
+    planner.record_response(sport, resp.headers, events)
+    planner.get_plan(); planner.projected_burn()
+"""
+import os
+import logging
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ODDS_MONTHLY_CREDITS = int(os.getenv("ODDS_MONTHLY_CREDITS", "20000"))
+ODDS_CREDIT_RESET_DAY = int(os.getenv("ODDS_CREDIT_RESET_DAY", "1"))  # día del mes en que se renuevan
+POLL_MIN_INTERVAL_MINUTES = float(os.getenv("POLL_MIN_INTERVAL_MINUTES", "7"))
+POLL_MAX_INTERVAL_MINUTES = float(os.getenv("POLL_MAX_INTERVAL_MINUTES", "360"))
+
+# Coste por defecto de una llamada /odds: markets (3) x regions (3)
+DEFAULT_CALL_COST = 9
+
+# Intervalo (min) por cercanía del próximo evento; None = usar intervalo base
+TIER_INTERVALS = {
+    'imminent': POLL_MIN_INTERVAL_MINUTES,  # < 1h al kickoff
+    'alert_window': None,                   # dentro de ALERT_WINDOW_HOURS
+    'today': 60.0,                          # < 24h
+    'later': 180.0,                         # > 24h
+    'idle': POLL_MAX_INTERVAL_MINUTES,      # sin eventos futuros
+}
+# Tiers que se estiran primero cuando el presupuesto no alcanza
+COLD_TIERS = ('today', 'later', 'idle', 'unknown')
+
+
+def _parse_commence(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return None
+
+
+class CreditPlanner:
+    """Calcula un calendario de fetch por deporte ajustado al presupuesto de créditos"""
+
+    def __init__(self, monthly_budget: int = ODDS_MONTHLY_CREDITS, alert_window_hours: float = 8,
+                 base_interval_minutes: float = 14, reset_day: int = ODDS_CREDIT_RESET_DAY):
+        self.monthly_budget = monthly_budget
+        self.alert_window_hours = alert_window_hours
+        self.base_interval_minutes = base_interval_minutes
+        self.reset_day = reset_day
+
+        self.credits_remaining: Optional[int] = None
+        self.credits_used: Optional[int] = None
+
+        self.sports: Dict[str, Dict] = {}  # sport -> {nearest_start, last_fetch, call_cost}
+        self.spend_log = deque()  # (timestamp, credits) de las últimas 24h
+        self.stretch_factor = 1.0
+        self._plan: Dict[str, Dict] = {}
+
+    # ==================== ENTRADAS ====================
+
+    def _sport_state(self, sport: str) -> Dict:
+        if sport not in self.sports:
+            self.sports[sport] = {'nearest_start': None, 'last_fetch': None,
+                                  'call_cost': DEFAULT_CALL_COST, 'seen': False}
+        return self.sports[sport]
+
+    def set_expected_cost(self, sport: str, cost: int):
+        """Coste estimado por llamada (p.ej. del plan de fetch) hasta recibir x-requests-last"""
+        state = self._sport_state(sport)
+        if not state['seen']:
+            state['call_cost'] = cost
+
+    def record_response(self, sport: str, headers, events: List[Dict], now: datetime = None):
+        """Registra créditos (headers) y el próximo kickoff del deporte tras un fetch exitoso"""
+        now = now or datetime.now(timezone.utc)
+        state = self._sport_state(sport)
+        state['last_fetch'] = now
+        state['seen'] = True
+
+        remaining = headers.get('x-requests-remaining') if headers else None
+        used = headers.get('x-requests-used') if headers else None
+        last = headers.get('x-requests-last') if headers else None
+        try:
+            if remaining is not None:
+                self.credits_remaining = int(float(remaining))
+            if used is not None:
+                self.credits_used = int(float(used))
+            if last is not None:
+                state['call_cost'] = max(0, int(float(last)))
+        except ValueError:
+            logger.warning(f"Headers de créditos inválidos para {sport}: {remaining}/{used}/{last}")
+
+        self.spend_log.append((now, state['call_cost']))
+
+        upcoming = [
+            t for t in (_parse_commence(ev.get('commence_time')) for ev in events)
+            if t is not None and t > now
+        ]
+        state['nearest_start'] = min(upcoming) if upcoming else None
+
+    # ==================== PLAN ====================
+
+    def _tier(self, state: Dict, now: datetime) -> str:
+        if not state['seen']:
+            return 'unknown'
+        nearest = state['nearest_start']
+        if nearest is None:
+            return 'idle'
+        hours = (nearest - now).total_seconds() / 3600
+        if hours <= 1:
+            return 'imminent'
+        if hours <= self.alert_window_hours:
+            return 'alert_window'
+        if hours <= 24:
+            return 'today'
+        return 'later'
+
+    def _days_left_in_period(self, now: datetime) -> float:
+        reset = now.replace(day=min(self.reset_day, 28), hour=0, minute=0, second=0, microsecond=0)
+        if reset <= now:
+            # Próximo mes
+            year, month = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+            reset = reset.replace(year=year, month=month)
+        return max(1 / 24, (reset - now).total_seconds() / 86400)
+
+    def budget_per_day(self, now: datetime = None) -> float:
+        """Créditos disponibles por día hasta la renovación"""
+        now = now or datetime.now(timezone.utc)
+        remaining = self.credits_remaining
+        if remaining is None:
+            remaining = self.monthly_budget - (self.credits_used or 0)
+        return max(0.0, remaining) / self._days_left_in_period(now)
+
+    def build_plan(self, sports: List[str], now: datetime = None) -> Dict[str, Dict]:
+        """Calcula intervalo y próximo fetch de cada deporte respetando el presupuesto"""
+        now = now or datetime.now(timezone.utc)
+        plan = {}
+        for sport in sports:
+            state = self._sport_state(sport)
+            tier = self._tier(state, now)
+            interval = TIER_INTERVALS.get(tier) or self.base_interval_minutes
+            nearest = state['nearest_start']
+            plan[sport] = {
+                'tier': tier,
+                'interval_minutes': interval,
+                'nearest_start_hours': ((nearest - now).total_seconds() / 3600) if nearest else None,
+                'call_cost': state['call_cost'],
+                'last_fetch': state['last_fetch'],
+            }
+
+        # Ajuste de presupuesto: estirar primero lo que está lejos del kickoff
+        budget = self.budget_per_day(now)
+        unconstrained = self._daily_credits(plan)
+        for stretchable in (COLD_TIERS, None):
+            for _ in range(5):  # varias pasadas: los topes de POLL_MAX reparten el exceso
+                planned = self._daily_credits(plan)
+                if planned <= budget:
+                    break
+                targets = [
+                    s for s, p in plan.items()
+                    if (stretchable is None or p['tier'] in stretchable)
+                    and p['interval_minutes'] < POLL_MAX_INTERVAL_MINUTES
+                ]
+                if not targets:
+                    break
+                flexible = sum(self._daily_cost(plan[s]) for s in targets)
+                fixed = planned - flexible
+                factor = flexible / (budget - fixed) if budget > fixed else POLL_MAX_INTERVAL_MINUTES
+                for s in targets:
+                    plan[s]['interval_minutes'] = min(POLL_MAX_INTERVAL_MINUTES, plan[s]['interval_minutes'] * factor)
+        planned = self._daily_credits(plan)
+        self.stretch_factor = (unconstrained / planned) if planned else 1.0
+
+        for sport, p in plan.items():
+            p['daily_credits'] = self._daily_cost(p)
+            last = p['last_fetch']
+            p['next_fetch'] = (last + timedelta(minutes=p['interval_minutes'])) if last else now
+
+        self._plan = plan
+        return plan
+
+    @staticmethod
+    def _daily_cost(entry: Dict) -> float:
+        return entry['call_cost'] * (24 * 60) / max(entry['interval_minutes'], 1e-9)
+
+    def _daily_credits(self, plan: Dict[str, Dict]) -> float:
+        return sum(self._daily_cost(p) for p in plan.values())
+
+    def due_sports(self, sports: List[str], now: datetime = None) -> List[str]:
+        """Deportes cuyo próximo fetch ya venció (mantiene el orden de `sports`)"""
+        now = now or datetime.now(timezone.utc)
+        plan = self.build_plan(sports, now)
+        # Margen de 1 min para no perder un ciclo por segundos de diferencia
+        slack = timedelta(minutes=1)
+        return [s for s in sports if plan[s]['next_fetch'] <= now + slack]
+
+    def next_fetch_time(self) -> Optional[datetime]:
+        """Momento del próximo fetch pendiente según el último plan"""
+        if not self._plan:
+            return None
+        return min(p['next_fetch'] for p in self._plan.values())
+
+    # ==================== REPORTES ====================
+
+    def get_plan(self) -> Dict[str, Dict]:
+        """Último plan calculado: sport -> {tier, interval_minutes, next_fetch, ...}"""
+        return self._plan
+
+    def projected_burn(self, now: datetime = None) -> Dict:
+        """Consumo proyectado del plan actual frente al presupuesto restante"""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=24)
+        while self.spend_log and self.spend_log[0][0] < cutoff:
+            self.spend_log.popleft()
+        planned = self._daily_credits(self._plan) if self._plan else 0.0
+        days_left = self._days_left_in_period(now)
+        return {
+            'credits_remaining': self.credits_remaining,
+            'credits_used': self.credits_used,
+            'budget_per_day': self.budget_per_day(now),
+            'planned_per_day': planned,
+            'observed_last_24h': sum(cost for _, cost in self.spend_log),
+            'days_left_in_period': days_left,
+            'projected_period_total': planned * days_left,
+            'stretch_factor': self.stretch_factor,
+        }
+
+    def format_plan(self) -> str:
+        """Resumen de una línea por deporte para logs"""
+        lines = []
+        for sport, p in self._plan.items():
+            hours = p['nearest_start_hours']
+            start = f"{hours:.1f}h" if hours is not None else "-"
+            lines.append(f"{sport}: {p['tier']} (next kickoff {start}) every {p['interval_minutes']:.0f}min")
+        return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""
+data/event_index.py - Índice de eventos monitoreados ordenado por hora de inicio
+
+Mapping event_id -> evento (se usa como el dict monitored_events de antes) que
+además mantiene una lista ordenada de (commence_ts, event_id):
+
+- window(start, end) / count_window(): búsqueda binaria, O(log n + k)
+- pop_expired(now): corta solo el prefijo ya empezado, sin recorrer el resto
+
+Requiere eventos normalizados (commence_ts, ver data/event_schema.py).
+"""
+import bisect
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Cota superior para ids en comparaciones de tuplas (end_ts, _MAX_ID)
+_MAX_ID = '\uffff'
+
+
+class EventIndex(MutableMapping):
+    """event_id -> evento, con orden por commence_ts para consultas por ventana"""
+
+    def __init__(self):
+        self._events: Dict[str, Dict] = {}
+        self._order: List[Tuple[float, str]] = []  # (commence_ts, event_id) ordenado
+
+    # ==================== MAPPING ====================
+
+    def __getitem__(self, event_id: str) -> Dict:
+        return self._events[event_id]
+
+    def __setitem__(self, event_id: str, event: Dict):
+        ts = event['commence_ts']
+        previous = self._events.get(event_id)
+        if previous is not None:
+            if previous['commence_ts'] == ts:
+                self._events[event_id] = event
+                return
+            self._remove_key(previous['commence_ts'], event_id)  # partido reprogramado
+        self._events[event_id] = event
+        bisect.insort(self._order, (ts, event_id))
+
+    def __delitem__(self, event_id: str):
+        event = self._events.pop(event_id)
+        self._remove_key(event['commence_ts'], event_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id) -> bool:
+        return event_id in self._events
+
+    def _remove_key(self, ts: float, event_id: str):
+        i = bisect.bisect_left(self._order, (ts, event_id))
+        if i < len(self._order) and self._order[i] == (ts, event_id):
+            del self._order[i]
+
+    # ==================== CONSULTAS POR TIEMPO ====================
+
+    def _bounds(self, start_ts: float, end_ts: float) -> Tuple[int, int]:
+        # (ts,) ordena antes que cualquier (ts, id); (end_ts, _MAX_ID) después de todos los de end_ts
+        lo = bisect.bisect_left(self._order, (start_ts,))
+        hi = bisect.bisect_right(self._order, (end_ts, _MAX_ID))
+        return lo, hi
+
+    def window(self, start_ts: float, end_ts: float) -> List[Dict]:
+        """Eventos con start_ts <= commence_ts <= end_ts, en orden de inicio"""
+        lo, hi = self._bounds(start_ts, end_ts)
+        events = self._events
+        return [events[event_id] for _, event_id in self._order[lo:hi]]
+
+    def count_window(self, start_ts: float, end_ts: float) -> int:
+        lo, hi = self._bounds(start_ts, end_ts)
+        return max(0, hi - lo)
+
+    def pop_expired(self, now_ts: float) -> List[str]:
+        """Quita y devuelve los event_id con commence_ts <= now_ts"""
+        cut = bisect.bisect_right(self._order, (now_ts, _MAX_ID))
+        if not cut:
+            return []
+        expired = [event_id for _, event_id in self._order[:cut]]
+        del self._order[:cut]
+        for event_id in expired:
+            del self._events[event_id]
+        return expired
+
+    def next_start(self) -> Optional[float]:
+        """commence_ts del próximo evento (o None si no hay)"""
+        return self._order[0][0] if self._order else None
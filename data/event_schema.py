@@ -0,0 +1,131 @@
+"""
+data/event_schema.py - Normalización única de eventos en la ingesta
+
+Cada evento de The Odds API se normaliza una sola vez por ciclo a un registro
+canónico (el mismo dict, modificado en sitio para no copiar cuotas):
+
+    id            str, obligatorio (si falta se deriva de deporte/equipos/hora)
+    sport_key     str (toma _sport_key si la API no lo trae)
+    home_team     str, obligatorio
+    away_team     str, obligatorio
+    commence_ts   float, epoch seconds UTC (para comparar y ordenar)
+    commence_time str, ISO 8601 UTC canónico 'YYYY-MM-DDTHH:MM:SSZ'
+    bookmakers    list
+
+Los módulos siguientes comparan commence_ts en lugar de volver a parsear
+commence_time. event_commence_ts() acepta también eventos sin normalizar
+(str ISO, datetime o epoch) para los scripts que no pasan por la ingesta.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DISPLAY_FORMAT = '%Y-%m-%d %H:%M UTC'
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Convierte str ISO ('Z' o con offset), datetime o epoch a epoch seconds; None si no se puede"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+def event_commence_ts(event: Dict) -> Optional[float]:
+    """commence_ts del evento (normalizado o no)"""
+    ts = event.get('commence_ts')
+    if ts is not None:
+        return ts
+    return parse_timestamp(event.get('commence_time'))
+
+
+def to_datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def format_iso(ts: float) -> str:
+    return to_datetime(ts).strftime(ISO_FORMAT)
+
+
+def format_display(ts: Optional[float]) -> str:
+    """Fecha legible para alertas: '2025-11-20 15:00 UTC'"""
+    if ts is None:
+        return 'Sin fecha'
+    return to_datetime(ts).strftime(DISPLAY_FORMAT)
+
+
+def normalize_event(event: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Normaliza un evento en sitio.
+
+    Returns:
+        (evento, None) si es válido, (None, motivo) si se descarta
+    """
+    if event.get('_canonical'):
+        return event, None
+
+    ts = parse_timestamp(event.get('commence_time'))
+    if ts is None:
+        return None, 'missing_commence' if not event.get('commence_time') else 'bad_commence'
+
+    home = event.get('home_team') or event.get('home')
+    away = event.get('away_team') or event.get('away')
+    if not isinstance(home, str) or not home.strip() or not isinstance(away, str) or not away.strip():
+        return None, 'missing_teams'
+
+    bookmakers = event.get('bookmakers')
+    if bookmakers is None:
+        bookmakers = []
+    elif not isinstance(bookmakers, list):
+        return None, 'bad_bookmakers'
+
+    sport_key = event.get('sport_key') or event.get('_sport_key') or ''
+    event_id = event.get('id') or f"{sport_key}_{home}_{away}_{int(ts)}"
+
+    event['id'] = event_id
+    event['sport_key'] = sport_key
+    event['home_team'] = home.strip()
+    event['away_team'] = away.strip()
+    event['commence_ts'] = ts
+    event['commence_time'] = format_iso(ts)
+    event['bookmakers'] = bookmakers
+    event['_canonical'] = True
+    return event, None
+
+
+def normalize_events(events: Iterable[Dict]) -> Tuple[List[Dict], Counter]:
+    """
+    Normaliza todos los eventos del ciclo.
+
+    Returns:
+        (eventos válidos en el orden original, Counter de descartes por motivo)
+    """
+    valid = []
+    rejected = Counter()
+    for event in events:
+        normalized, reason = normalize_event(event)
+        if normalized is None:
+            rejected[reason] += 1
+            logger.debug(f"Evento descartado en normalización ({reason}): {event.get('id')}")
+            continue
+        valid.append(normalized)
+    return valid, rejected
@@ -0,0 +1,182 @@
+"""
+data/fetch_plan.py - Compilador del plan de fetch por deporte
+
+The Odds API cobra markets × regions créditos por llamada (con bookmakers=,
+cada grupo de 10 casas cuenta como una región). En lugar de pedir siempre
+regions=eu,us,au&markets=h2h,spreads,totals, se deriva por deporte el conjunto
+mínimo que los scanners activos pueden llegar a usar:
+
+- Mercados: solo los que el scanner evalúa, que el deporte ofrece
+  (SPORT_MARKETS) y cuya probabilidad máxima del modelo puede pasar
+  min_prob y el threshold del deporte con la cuota máxima permitida.
+  Deportes sin threshold solo piden h2h (se siguen monitoreando).
+- Bookmakers: si ODDS_BOOKMAKERS está configurado se piden solo esas casas
+  (bookmakers=...), si no las regiones de ODDS_REGIONS.
+
+Ejemplo:
+    compiler = FetchPlanCompiler(THRESHOLDS, scanner.sport_prefix, [(1.4, 3.5, 0.52)])
+    plan = compiler.compile(SPORTS)
+    plan['tennis_atp'].query()  # {'regions': 'eu,us,au', 'markets': 'h2h,totals'}
+    plan.cycle_savings(fetcher.last_latencies)
+"""
+import logging
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ODDS_REGIONS = [r.strip() for r in os.getenv("ODDS_REGIONS", "eu,us,au").split(",") if r.strip()]
+ODDS_BOOKMAKERS = [b.strip() for b in os.getenv("ODDS_BOOKMAKERS", "").split(",") if b.strip()]
+
+# Consulta fija anterior: base para calcular el ahorro
+BASELINE_MARKETS = ('h2h', 'spreads', 'totals')
+BASELINE_REGIONS = ('eu', 'us', 'au')
+
+# Mercados que evalúan los scanners
+SCANNED_MARKETS = ('h2h', 'spreads', 'totals')
+
+# Mercados que ofrece cada deporte (por prefijo de THRESHOLDS); el resto usa SCANNED_MARKETS
+SPORT_MARKETS = {
+    'tennis': ('h2h', 'totals'),
+}
+
+# Probabilidad máxima que el modelo puede asignar a un outcome de cada mercado
+# (sin xG, totals usa 0.52/0.48 fijos en scanner.py)
+MARKET_MAX_PROB = {
+    'h2h': 1.0,
+    'spreads': 1.0,
+    'totals': 0.52,
+}
+
+# Excepciones por deporte (prefijo de THRESHOLDS) con un modelo de xG real
+# (FetchPlanCompiler(xg_model=True)): en fútbol totals sale de la matriz de
+# marcadores Poisson (model/score_matrix.py) y puede llegar a 1.0. Sin xG real
+# el modelo no devuelve 'xg' y totals vuelve a los 0.52/0.48 fijos
+SPORT_MARKET_MAX_PROB = {
+    'soccer': {'totals': 1.0},
+}
+
+# (min_odd, max_odd, min_prob) de un scanner activo
+ScannerLimits = Tuple[float, float, float]
+
+
+class FetchSpec:
+    """Parámetros de la llamada /odds de un deporte"""
+
+    def __init__(self, sport: str, markets: Sequence[str], regions: Sequence[str] = (),
+                 bookmakers: Sequence[str] = ()):
+        self.sport = sport
+        self.markets = tuple(markets)
+        self.regions = tuple(regions)
+        self.bookmakers = tuple(bookmakers)
+
+    @property
+    def region_units(self) -> int:
+        if self.bookmakers:
+            return math.ceil(len(self.bookmakers) / 10)
+        return len(self.regions)
+
+    @property
+    def cost(self) -> int:
+        """Créditos estimados por llamada"""
+        return len(self.markets) * self.region_units
+
+    def query(self) -> Dict[str, str]:
+        params = {'markets': ','.join(self.markets)}
+        if self.bookmakers:
+            params['bookmakers'] = ','.join(self.bookmakers)
+        else:
+            params['regions'] = ','.join(self.regions)
+        return params
+
+    def query_string(self) -> str:
+        return '&'.join(f"{k}={v}" for k, v in self.query().items())
+
+    def __repr__(self) -> str:
+        return f"FetchSpec({self.sport}: {self.query_string()}, cost={self.cost})"
+
+
+class FetchPlan(dict):
+    """sport -> FetchSpec, con reporte de ahorro frente a la consulta fija"""
+
+    baseline_cost = len(BASELINE_MARKETS) * len(BASELINE_REGIONS)
+
+    def credits_saved_per_call(self, sport: str) -> int:
+        spec = self.get(sport)
+        return self.baseline_cost - spec.cost if spec else 0
+
+    def cycle_savings(self, latencies: Dict[str, Dict]) -> Dict:
+        """
+        Ahorro del último ciclo a partir de OddsFetcher.last_latencies.
+
+        Los bytes ahorrados son una estimación: bytes recibidos por unidad de crédito
+        × créditos no pedidos.
+        """
+        calls = credits = credits_saved = bytes_received = 0
+        bytes_saved = 0.0
+        for sport, record in latencies.items():
+            spec = self.get(sport)
+            if spec is None or record.get('status') != 200:
+                continue
+            calls += 1
+            credits += spec.cost
+            saved = self.baseline_cost - spec.cost
+            credits_saved += saved
+            received = record.get('bytes', 0)
+            bytes_received += received
+            if spec.cost:
+                bytes_saved += received / spec.cost * saved
+        return {
+            'calls': calls,
+            'credits': credits,
+            'credits_saved': credits_saved,
+            'bytes_received': bytes_received,
+            'bytes_saved_estimate': int(bytes_saved),
+        }
+
+    def format_plan(self) -> str:
+        return "\n".join(f"{sport}: {spec.query_string()} ({spec.cost} credits)" for sport, spec in self.items())
+
+
+class FetchPlanCompiler:
+    """Deriva el FetchSpec mínimo de cada deporte a partir de los scanners activos"""
+
+    def __init__(self, thresholds: Dict[str, float], sport_prefix: Callable[[str], str],
+                 scanners: Iterable[ScannerLimits], bookmakers: Optional[List[str]] = None,
+                 regions: Optional[List[str]] = None, xg_model: bool = False):
+        self.thresholds = thresholds
+        self.xg_model = xg_model
+        self.sport_prefix = sport_prefix
+        self.scanners = list(scanners)
+        self.bookmakers = list(ODDS_BOOKMAKERS if bookmakers is None else bookmakers)
+        self.regions = list(ODDS_REGIONS if regions is None else regions)
+
+    def _market_usable(self, market: str, threshold: float, prefix: str = '') -> bool:
+        overrides = SPORT_MARKET_MAX_PROB.get(prefix, {}) if self.xg_model else {}
+        max_prob = overrides.get(market, MARKET_MAX_PROB.get(market, 1.0))
+        # Algún scanner activo podría aceptar un outcome de este mercado
+        return any(
+            max_prob >= min_prob and max_prob * max_odd >= threshold
+            for _, max_odd, min_prob in self.scanners
+        )
+
+    def markets_for(self, sport: str) -> Tuple[str, ...]:
+        prefix = self.sport_prefix(sport)
+        threshold = self.thresholds.get(prefix)
+        if not threshold:
+            return ('h2h',)  # sin threshold el scanner lo descarta: solo monitorear
+        offered = SPORT_MARKETS.get(prefix, SCANNED_MARKETS)
+        markets = tuple(m for m in SCANNED_MARKETS if m in offered and self._market_usable(m, threshold, prefix))
+        return markets or ('h2h',)
+
+    def compile(self, sports: Iterable[str]) -> FetchPlan:
+        plan = FetchPlan()
+        for sport in sports:
+            plan[sport] = FetchSpec(
+                sport,
+                markets=self.markets_for(sport),
+                regions=() if self.bookmakers else self.regions,
+                bookmakers=self.bookmakers,
+            )
+        return plan
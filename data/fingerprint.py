@@ -0,0 +1,128 @@
+"""
+data/fingerprint.py - Huellas de contenido por evento y por bookmaker/mercado
+
+La mayoría de eventos llegan idénticos entre ciclos consecutivos. En la ingesta se
+calcula una huella barata (hash de tuplas) de cada mercado de cada bookmaker y del
+evento completo; comparándola con la del ciclo anterior se obtiene el conjunto de
+eventos/mercados que realmente cambiaron, para que las etapas siguientes
+(line tracking, scanners, escrituras en BD) puedan procesar solo eso.
+
+Las huellas usan hash() de Python: son estables dentro del proceso, no entre procesos.
+"""
+import logging
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MarketKey = Tuple[str, str]  # (bookmaker, market)
+
+
+def market_fingerprint(market: Dict) -> int:
+    """Huella de un mercado: nombre, cuota y línea de cada outcome"""
+    return hash(tuple(
+        (o.get('name'), o.get('price'), o.get('point'))
+        for o in market.get('outcomes', [])
+    ))
+
+
+def event_market_fingerprints(event: Dict) -> Dict[MarketKey, int]:
+    """Huellas de todos los mercados de un evento: (bookmaker, market) -> huella"""
+    fingerprints = {}
+    for bookmaker in event.get('bookmakers', []):
+        book = bookmaker.get('key') or bookmaker.get('title')
+        for market in bookmaker.get('markets', []):
+            fingerprints[(book, market.get('key'))] = market_fingerprint(market)
+    return fingerprints
+
+
+def event_fingerprint(event: Dict, market_fps: Dict[MarketKey, int] = None) -> int:
+    """Huella del evento completo (metadatos + todos sus mercados)"""
+    if market_fps is None:
+        market_fps = event_market_fingerprints(event)
+    return hash((
+        str(event.get('commence_time')),
+        event.get('home_team'),
+        event.get('away_team'),
+        tuple(sorted(market_fps.items())),
+    ))
+
+
+class IngestChanges:
+    """Resultado de una ingesta: qué eventos y mercados cambiaron respecto al ciclo anterior"""
+
+    def __init__(self):
+        self.changed_event_ids: Set[str] = set()   # incluye los nuevos
+        self.new_event_ids: Set[str] = set()
+        self.changed_markets: Dict[str, Set[MarketKey]] = {}  # event_id -> {(book, market)}
+        self.events_total = 0
+        self.markets_total = 0
+
+    @property
+    def markets_changed(self) -> int:
+        return sum(len(m) for m in self.changed_markets.values())
+
+    def is_changed(self, event_id: str) -> bool:
+        return event_id in self.changed_event_ids
+
+    def filter_changed(self, events: Iterable[Dict]) -> List[Dict]:
+        """Solo los eventos que cambiaron (para etapas que procesan incrementalmente)"""
+        return [ev for ev in events if ev.get('id') in self.changed_event_ids]
+
+    def summary(self) -> Dict:
+        return {
+            'events_total': self.events_total,
+            'events_changed': len(self.changed_event_ids),
+            'events_new': len(self.new_event_ids),
+            'markets_total': self.markets_total,
+            'markets_changed': self.markets_changed,
+        }
+
+
+class EventFingerprinter:
+    """Guarda la última huella de cada evento/mercado y calcula el changed-set de cada ciclo"""
+
+    def __init__(self):
+        self.event_fps: Dict[str, int] = {}
+        self.market_fps: Dict[str, Dict[MarketKey, int]] = {}
+        self.last_changes = IngestChanges()
+
+    def ingest(self, events: List[Dict]) -> IngestChanges:
+        """
+        Calcula huellas de los eventos del ciclo y devuelve qué cambió.
+
+        Deja la huella en event['_fingerprint'] para que otras etapas la reutilicen.
+        """
+        changes = IngestChanges()
+        for event in events:
+            event_id = event.get('id')
+            if not event_id:
+                continue
+            market_fps = event_market_fingerprints(event)
+            fp = event_fingerprint(event, market_fps)
+            event['_fingerprint'] = fp
+
+            changes.events_total += 1
+            changes.markets_total += len(market_fps)
+
+            previous_fp = self.event_fps.get(event_id)
+            if previous_fp == fp:
+                continue
+
+            previous_markets = self.market_fps.get(event_id, {})
+            changed = {key for key, mfp in market_fps.items() if previous_markets.get(key) != mfp}
+            if previous_fp is None:
+                changes.new_event_ids.add(event_id)
+            changes.changed_event_ids.add(event_id)
+            changes.changed_markets[event_id] = changed
+
+            self.event_fps[event_id] = fp
+            self.market_fps[event_id] = market_fps
+
+        self.last_changes = changes
+        return changes
+
+    def forget(self, event_ids: Iterable[str]):
+        """Descarta huellas de eventos que ya no se monitorean"""
+        for event_id in event_ids:
+            self.event_fps.pop(event_id, None)
+            self.market_fps.pop(event_id, None)
@@ -6,14 +6,25 @@ Versión simplificada usando el cliente oficial de Supabase
 import os
 from supabase import create_client, Client
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 import logging
 from dotenv import load_dotenv
+from postgrest.utils import sanitize_param
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Consultas bulk del slate: nombres por in_() (longitud de URL) y filas por página
+# (no mayor que el max-rows de Supabase, 1000 por defecto)
+BULK_QUERY_CHUNK = int(os.getenv("BULK_QUERY_CHUNK", "200"))
+BULK_PAGE_SIZE = int(os.getenv("BULK_PAGE_SIZE", "1000"))
+# Páginas por trozo en get_recent_matches_bulk; los equipos que sigan cortos
+# (pocos partidos frente al resto del trozo) se completan con get_recent_matches
+BULK_RECENT_MAX_PAGES = int(os.getenv("BULK_RECENT_MAX_PAGES", "2"))
+
+TeamKey = Tuple[str, str]  # (sport_key, equipo)
+
 
 class HistoricalDatabase:
     """Base de datos Supabase para almacenar historial deportivo"""
@@ -26,6 +37,8 @@ class HistoricalDatabase:
             raise ValueError("SUPABASE_URL y SUPABASE_KEY deben estar configurados en .env")
         
         self.supabase: Client = create_client(url, key)
+        # Lecturas fallidas (get_*): el modelo no cachea probabilidades calculadas con ellas
+        self.read_errors = 0
         logger.info("Supabase client initialized successfully")
     
     # ==================== MATCHES ====================
@@ -80,6 +93,7 @@ class HistoricalDatabase:
             
         except Exception as e:
             logger.error(f"Error fetching H2H: {e}")
+            self.read_errors += 1
             return []
     
     def get_recent_matches(self, team: str, sport_key: str, limit: int = 10) -> List[Dict]:
@@ -98,6 +112,7 @@ class HistoricalDatabase:
             
         except Exception as e:
             logger.error(f"Error fetching recent matches: {e}")
+            self.read_errors += 1
             return []
     
     # ==================== TEAM STATS ====================
@@ -158,6 +173,7 @@ class HistoricalDatabase:
             
         except Exception as e:
             logger.error(f"Error fetching team stats: {e}")
+            self.read_errors += 1
             return None
     
     # ==================== PREDICTIONS ====================
@@ -305,8 +321,153 @@ class HistoricalDatabase:
             
         except Exception as e:
             logger.error(f"Error fetching team injuries: {e}")
+            self.read_errors += 1
             return []
     
+    # ==================== BULK (SLATE) ====================
+    # Lo mismo que get_team_stats / get_recent_matches / get_h2h / get_team_injuries
+    # para todos los equipos de un slate en unas pocas consultas in_()/or_().
+    # Devuelven {(sport_key, equipo): ...} (también para los equipos sin datos),
+    # o None si falla alguna consulta.
+    
+    @staticmethod
+    def _chunks(values: List, size: int) -> Iterator[List]:
+        for start in range(0, len(values), max(1, size)):
+            yield values[start:start + size]
+    
+    def _paged(self, build_query: Callable, done: Callable[[], bool] = lambda: False,
+               max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """Filas de build_query() por páginas de BULK_PAGE_SIZE hasta agotarlas, done() o max_pages"""
+        page = 0
+        while True:
+            start = page * BULK_PAGE_SIZE
+            rows = build_query().range(start, start + BULK_PAGE_SIZE - 1).execute().data
+            yield from rows
+            page += 1
+            if len(rows) < BULK_PAGE_SIZE or done() or (max_pages is not None and page >= max_pages):
+                return
+    
+    def get_team_stats_bulk(self, teams: Iterable[TeamKey], season: str = "2024-25") -> Optional[Dict[TeamKey, Optional[Dict]]]:
+        """Estadísticas de varios equipos"""
+        try:
+            stats: Dict[TeamKey, Optional[Dict]] = {key: None for key in teams}
+            sports = sorted({sport for sport, _ in stats})
+            for chunk in self._chunks(sorted({team for _, team in stats}), BULK_QUERY_CHUNK):
+                response = self.supabase.table('team_stats') \
+                    .select('*') \
+                    .in_('sport_key', sports) \
+                    .in_('team_name', chunk) \
+                    .eq('season', season) \
+                    .execute()
+                for row in response.data:
+                    key = (row.get('sport_key'), row.get('team_name'))
+                    if key in stats and stats[key] is None:
+                        stats[key] = row
+            return stats
+            
+        except Exception as e:
+            logger.error(f"Error fetching team stats (bulk): {e}")
+            return None
+    
+    def get_recent_matches_bulk(self, teams: Iterable[TeamKey], limit: int = 10) -> Optional[Dict[TeamKey, List[Dict]]]:
+        """
+        Últimos `limit` partidos de cada equipo. Se pagina (más recientes primero)
+        hasta que todos los equipos del trozo tienen `limit`, no quedan filas o se
+        llega a BULK_RECENT_MAX_PAGES; en ese caso los equipos aún cortos se
+        completan con get_recent_matches. Mismo resultado que get_recent_matches
+        por equipo
+        """
+        try:
+            recent: Dict[TeamKey, List[Dict]] = {key: [] for key in teams}
+            sports = sorted({sport for sport, _ in recent})
+            for chunk in self._chunks(sorted({team for _, team in recent}), BULK_QUERY_CHUNK):
+                names = ','.join(sanitize_param(team) for team in chunk)
+                in_chunk = set(chunk)
+                chunk_keys = [key for key in recent if key[1] in in_chunk]
+                query = lambda: self.supabase.table('matches') \
+                    .select('*') \
+                    .in_('sport_key', sports) \
+                    .not_.is_('home_score', 'null') \
+                    .or_(f'home_team.in.({names}),away_team.in.({names})') \
+                    .order('commence_time', desc=True)
+                complete = lambda: all(len(recent[key]) >= limit for key in chunk_keys)
+                read = 0
+                for row in self._paged(query, complete, BULK_RECENT_MAX_PAGES):
+                    read += 1
+                    for team in (row.get('home_team'), row.get('away_team')):
+                        # El rival puede ser de otro trozo: su consulta le dará sus partidos en orden
+                        matches = recent.get((row.get('sport_key'), team)) if team in in_chunk else None
+                        if matches is not None and len(matches) < limit:
+                            matches.append(row)
+                # Paginación cortada con filas pendientes: completar solo los equipos cortos
+                if read < BULK_RECENT_MAX_PAGES * BULK_PAGE_SIZE:
+                    continue
+                read_errors = self.read_errors
+                for sport, team in chunk_keys:
+                    if len(recent[(sport, team)]) < limit:
+                        recent[(sport, team)] = self.get_recent_matches(team, sport, limit=limit)
+                if self.read_errors != read_errors:
+                    return None
+            return recent
+            
+        except Exception as e:
+            logger.error(f"Error fetching recent matches (bulk): {e}")
+            return None
+    
+    def get_h2h_bulk(self, pairs: Iterable[Tuple[str, str, str]],
+                     limit: int = 10) -> Optional[Dict[Tuple[str, FrozenSet[str]], List[Dict]]]:
+        """H2H de varios cruces (sport_key, equipo1, equipo2), con clave (sport_key, frozenset de los dos)"""
+        try:
+            h2h: Dict[Tuple[str, FrozenSet[str]], List[Dict]] = {
+                (sport, frozenset((team1, team2))): [] for sport, team1, team2 in pairs
+            }
+            sports = sorted({sport for sport, _ in h2h})
+            # Dos cláusulas and() por cruce: trozos más pequeños que los de nombres
+            for chunk in self._chunks(sorted(h2h, key=lambda key: (key[0], sorted(key[1]))), max(1, BULK_QUERY_CHUNK // 4)):
+                clauses = []
+                for _, teams in chunk:
+                    team1, team2 = (sanitize_param(team) for team in sorted(teams))
+                    clauses.append(f'and(home_team.eq.{team1},away_team.eq.{team2})')
+                    clauses.append(f'and(home_team.eq.{team2},away_team.eq.{team1})')
+                query = lambda: self.supabase.table('matches') \
+                    .select('*') \
+                    .in_('sport_key', sports) \
+                    .not_.is_('home_score', 'null') \
+                    .or_(','.join(clauses)) \
+                    .order('commence_time', desc=True)
+                complete = lambda: all(len(h2h[key]) >= limit for key in chunk)
+                for row in self._paged(query, complete):
+                    matches = h2h.get((row.get('sport_key'), frozenset((row.get('home_team'), row.get('away_team')))))
+                    if matches is not None and len(matches) < limit:
+                        matches.append(row)
+            return h2h
+            
+        except Exception as e:
+            logger.error(f"Error fetching H2H (bulk): {e}")
+            return None
+    
+    def get_team_injuries_bulk(self, teams: Iterable[TeamKey]) -> Optional[Dict[TeamKey, List[Dict]]]:
+        """Lesiones actuales de varios equipos"""
+        try:
+            injuries: Dict[TeamKey, List[Dict]] = {key: [] for key in teams}
+            sports = sorted({sport for sport, _ in injuries})
+            for chunk in self._chunks(sorted({team for _, team in injuries}), BULK_QUERY_CHUNK):
+                query = lambda: self.supabase.table('injuries') \
+                    .select('*') \
+                    .in_('sport_key', sports) \
+                    .in_('team_name', chunk) \
+                    .is_('resolved_at', 'null') \
+                    .order('reported_at', desc=True)
+                for row in self._paged(query):
+                    team_injuries = injuries.get((row.get('sport_key'), row.get('team_name')))
+                    if team_injuries is not None:
+                        team_injuries.append(row)
+            return injuries
+            
+        except Exception as e:
+            logger.error(f"Error fetching team injuries (bulk): {e}")
+            return None
+    
     # ==================== VERIFICATION ====================
     
     def get_unverified_predictions(self, before_time: str) -> List[Dict]:
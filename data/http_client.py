@@ -0,0 +1,207 @@
+"""
+data/http_client.py - Registro global de clientes HTTP de larga vida
+
+Un único ClientSession (aiohttp) y un único AsyncClient (httpx) por proceso,
+compartidos entre ciclos de monitoreo, con:
+- Pools keep-alive (se reutilizan conexiones TCP/TLS entre requests)
+- Cache de DNS (no se resuelve el host en cada ciclo)
+- Límite de conexiones por host
+- Estadísticas de reutilización de conexiones
+
+Uso:
+    session = await http_clients.get_session()
+    async with session.get(url, headers=..., timeout=...) as resp: ...
+
+    await http_clients.close()  # al apagar el bot
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+import aiohttp
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "1800"))  # segundos (> intervalo entre ciclos)
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "120"))  # segundos
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {
+        'requests': 0,
+        'connections_created': 0,
+        'connections_reused': 0,
+        'dns_cache_hits': 0,
+        'dns_cache_misses': 0,
+    }
+
+
+class _TracedTransport(httpx.AsyncHTTPTransport):
+    """Transporte httpx que cuenta conexiones nuevas mediante el trace de httpcore"""
+
+    def __init__(self, stats: Dict[str, int], **kwargs):
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats['requests'] += 1
+        request.extensions['trace'] = self._trace
+        return await super().handle_async_request(request)
+
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == 'connection.connect_tcp.complete':
+            self._stats['connections_created'] += 1
+
+
+class HTTPClientRegistry:
+    """Dueño de los pools HTTP del proceso (aiohttp + httpx)"""
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_LIMIT_PER_HOST,
+                 dns_ttl: int = HTTP_DNS_TTL, keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+        self._httpx_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.stats = {'aiohttp': _empty_stats(), 'httpx': _empty_stats()}
+
+    # ==================== AIOHTTP ====================
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Devuelve la sesión aiohttp compartida (la crea si no existe o está cerrada)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            if self._session is not None and not self._session.closed:
+                # Cambió el event loop: cerrar la sesión anterior antes de reemplazarla
+                await self._retire(self._session.close, self._session_loop)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._build_trace_config()],
+            )
+            self._session_loop = loop
+            logger.info(
+                f"HTTP pool (aiohttp) creado: limit={self.limit}, per_host={self.limit_per_host}, "
+                f"dns_ttl={self.dns_ttl}s, keepalive={self.keepalive_timeout}s"
+            )
+        return self._session
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        stats = self.stats['aiohttp']
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            stats['requests'] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats['connections_created'] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats['connections_reused'] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            stats['dns_cache_hits'] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            stats['dns_cache_misses'] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    # ==================== HTTPX ====================
+
+    async def get_httpx_client(self) -> httpx.AsyncClient:
+        """Devuelve el cliente httpx compartido (lo crea si no existe o está cerrado)"""
+        loop = asyncio.get_running_loop()
+        if self._httpx_client is None or self._httpx_client.is_closed or self._httpx_loop is not loop:
+            if self._httpx_client is not None and not self._httpx_client.is_closed:
+                await self._retire(self._httpx_client.aclose, self._httpx_loop)
+            limits = httpx.Limits(
+                max_connections=self.limit,
+                # En httpx es un tope total de conexiones ociosas (no por host)
+                max_keepalive_connections=self.limit,
+                keepalive_expiry=self.keepalive_timeout,
+            )
+            self._httpx_client = httpx.AsyncClient(
+                transport=_TracedTransport(self.stats['httpx'], limits=limits),
+                timeout=30.0,
+            )
+            self._httpx_loop = loop
+        return self._httpx_client
+
+    # ==================== CICLO DE VIDA ====================
+
+    @staticmethod
+    async def _retire(close, owner_loop: Optional[asyncio.AbstractEventLoop]):
+        """
+        Cierra un cliente creado en otro event loop: si ese loop sigue vivo se
+        programa allí el cierre; si no, se cierra desde el loop actual (sus
+        conexiones eran del loop muerto, los errores al soltarlas se ignoran)
+        """
+        if owner_loop is not None and owner_loop.is_running() and not owner_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(close(), owner_loop)
+            return
+        try:
+            await close()
+        except Exception as e:
+            logger.debug(f"Cierre de cliente HTTP de un event loop anterior: {e}")
+
+    async def close(self):
+        """
+        Cierra todos los pools. Solo el dueño del proceso (el apagado de main o
+        el __main__ de un script) debe llamarlo: los pools son compartidos
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._httpx_client is not None and not self._httpx_client.is_closed:
+            await self._httpx_client.aclose()
+        self._session = None
+        self._httpx_client = None
+        logger.info(f"HTTP pools cerrados. {self.format_stats()}")
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Estadísticas de reutilización de conexiones por librería"""
+        report = {}
+        for lib, stats in self.stats.items():
+            lib_stats = dict(stats)
+            if lib == 'httpx':
+                lib_stats['connections_reused'] = max(0, stats['requests'] - stats['connections_created'])
+            requests = lib_stats['requests']
+            lib_stats['reuse_ratio'] = (lib_stats['connections_reused'] / requests) if requests else 0.0
+            report[lib] = lib_stats
+        return report
+
+    def format_stats(self) -> str:
+        """Resumen de una línea para logs"""
+        parts = []
+        for lib, stats in self.get_stats().items():
+            if not stats['requests']:
+                continue
+            parts.append(
+                f"{lib}: {stats['requests']} req, {stats['connections_created']} new conn, "
+                f"{stats['reuse_ratio']:.0%} reused"
+            )
+        return "; ".join(parts) or "sin requests"
+
+
+# Instancia global
+http_clients = HTTPClientRegistry()
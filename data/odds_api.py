@@ -3,16 +3,46 @@
 Returns a standardized list of events with bookmakers and markets.
 """
 import os
+import asyncio
+import random
+import time
 import aiohttp
 import json
 from pathlib import Path
 from typing import List
+from data.http_client import http_clients
+from data.replay import get_recorder
+
+# Descarga concurrente por deporte
+ODDS_FETCH_CONCURRENCY = int(os.getenv("ODDS_FETCH_CONCURRENCY", "6"))
+ODDS_FETCH_TIMEOUT = float(os.getenv("ODDS_FETCH_TIMEOUT", "30"))  # segundos por deporte
+ODDS_FETCH_RETRIES = int(os.getenv("ODDS_FETCH_RETRIES", "2"))
+ODDS_FETCH_BACKOFF = float(os.getenv("ODDS_FETCH_BACKOFF", "1.0"))  # segundos base del backoff
+# Permite apuntar a un stand-in local (scripts/replay_session.py --server)
+ODDS_API_BASE_URL = os.getenv("ODDS_API_BASE_URL", "https://api.the-odds-api.com").rstrip('/')
 
 class OddsFetcher:
-    def __init__(self, api_key: str = None, sample_path: str = "data/sample_odds.json"):
+    def __init__(self, api_key: str = None, sample_path: str = "data/sample_odds.json",
+                 concurrency: int = ODDS_FETCH_CONCURRENCY, timeout: float = ODDS_FETCH_TIMEOUT,
+                 retries: int = ODDS_FETCH_RETRIES, backoff: float = ODDS_FETCH_BACKOFF,
+                 planner=None, base_url: str = ODDS_API_BASE_URL, recorder=None, fetch_plan=None):
         # Preferir API key pasada, si no usar la variable de entorno API_KEY (o THEODDS_API_KEY)
         self.api_key = api_key or os.getenv('API_KEY') or os.getenv('THEODDS_API_KEY')
         self.sample_path = sample_path
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # CreditPlanner opcional: recibe headers de créditos y kickoffs de cada deporte
+        self.planner = planner
+        self.base_url = base_url.rstrip('/')
+        # OddsRecorder opcional (ODDS_RECORD_DIR): guarda las respuestas crudas para replay
+        self.recorder = recorder if recorder is not None else get_recorder()
+        # FetchPlan opcional (data/fetch_plan.py): markets/regions/bookmakers mínimos por deporte
+        self.fetch_plan = fetch_plan
+        # Latencia por deporte del último ciclo: sport -> {latency, attempts, status, events, bytes}
+        self.last_latencies = {}
+        self.last_cycle_seconds = 0.0
 
     async def fetch_odds(self, sports: List[str]):
         if self.api_key:
@@ -22,32 +52,84 @@ class OddsFetcher:
 
     async def _fetch_from_theodds(self, sports: List[str]):
         # Construir URL completa con apiKey en query string
-        base_url = "https://api.the-odds-api.com/v4/sports/{sport}/odds/"
-        query_params = "?apiKey={apiKey}&regions=eu,us,au&markets=h2h,spreads,totals&oddsFormat=decimal"
+        base_url = self.base_url + "/v4/sports/{sport}/odds/"
+        query_params = "?apiKey={apiKey}&{selection}&oddsFormat=decimal"
+        default_selection = "regions=eu,us,au&markets=h2h,spreads,totals"
         
         headers = {
             'User-Agent': 'ValueBetsBot/1.0',
             'Accept': 'application/json'
         }
         
+        cycle_start = time.perf_counter()
+        self.last_latencies = {}
+        # Todos los deportes en paralelo, limitados por el semáforo de concurrencia
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        # Sesión compartida entre ciclos: reutiliza DNS, TCP y TLS
+        session = await http_clients.get_session()
+        per_sport = await asyncio.gather(*[
+            self._fetch_sport(session, semaphore, sport,
+                              base_url.format(sport=sport) + query_params.format(
+                                  apiKey=self.api_key, selection=self._selection(sport, default_selection)),
+                              headers)
+            for sport in sports
+        ])
+        self.last_cycle_seconds = time.perf_counter() - cycle_start
+        
+        # gather conserva el orden de `sports`: mismo orden de eventos que el fetch secuencial
         results = []
-        async with aiohttp.ClientSession(headers=headers) as session:
-            for sport in sports:
-                # URL completa con todos los parámetros
-                url = base_url.format(sport=sport) + query_params.format(apiKey=self.api_key)
+        for events in per_sport:
+            results.extend(events)
+        return results
+
+    def _selection(self, sport: str, default: str) -> str:
+        """markets/regions (o bookmakers) de la query según el plan de fetch"""
+        spec = self.fetch_plan.get(sport) if self.fetch_plan else None
+        return spec.query_string() if spec else default
+
+    async def _fetch_sport(self, session, semaphore: asyncio.Semaphore, sport: str, url: str,
+                           headers: dict = None) -> List[dict]:
+        """Descarga un deporte con timeout propio y reintentos con backoff + jitter."""
+        record = {'latency': 0.0, 'attempts': 0, 'status': None, 'events': 0, 'bytes': 0}
+        self.last_latencies[sport] = record
+        async with semaphore:
+            start = time.perf_counter()
+            for attempt in range(self.retries + 1):
+                record['attempts'] = attempt + 1
+                retryable = False
                 try:
-                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                        record['status'] = resp.status
+                        body = await resp.read()
+                        record['bytes'] = len(body)
+                        if self.recorder:
+                            self.recorder.record('odds', sport, resp.status, resp.headers, body)
                         if resp.status == 200:
-                            data = await resp.json()
+                            data = json.loads(body)
                             for ev in data:
                                 ev['_sport_key'] = sport
-                                results.append(ev)
-                        else:
-                            text = await resp.text()
-                            print(f"Warning: TheOddsAPI {sport} returned {resp.status}: {text[:100]}")
+                            record['events'] = len(data)
+                            if self.planner is not None:
+                                self.planner.record_response(sport, resp.headers, data)
+                            record['latency'] = time.perf_counter() - start
+                            return data
+                        text = body.decode('utf-8', errors='replace')
+                        print(f"Warning: TheOddsAPI {sport} returned {resp.status}: {text[:100]}")
+                        # 429 (rate limit) y 5xx son transitorios; 401/422 no se arreglan reintentando
+                        retryable = resp.status == 429 or resp.status >= 500
+                except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                    record['status'] = type(e).__name__
+                    print(f"Error fetching {sport} (attempt {attempt + 1}): {e!r}")
+                    retryable = True
                 except Exception as e:
+                    record['status'] = type(e).__name__
                     print(f"Error fetching {sport}: {e}")
-        return results
+                if not retryable or attempt >= self.retries:
+                    break
+                # Backoff exponencial con full jitter para no sincronizar reintentos
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+            record['latency'] = time.perf_counter() - start
+        return []
 
     def _load_sample(self):
         p = Path(self.sample_path)
@@ -0,0 +1,285 @@
+"""
+data/odds_book.py - Libro de cuotas compacto construido una vez por ciclo
+
+Aplana bookmakers → markets → outcomes de todos los eventos en arrays tipados
+(módulo array de la stdlib), con nombres internados en tablas:
+
+    fila r  →  event_idx[r], book_idx[r], market_idx[r], name_idx[r], price[r], point[r]
+    grupo g →  un (evento, bookmaker, mercado): filas group_start[g]..group_start[g+1]
+    evento e → grupos event_start[e]..event_start[e+1]
+
+Los consumidores (scanners, FeatureExtractor, LineMovementTracker) lo comparten en
+solo lectura en lugar de re-recorrer los dicts anidados con .get() y float().
+Cuotas no numéricas quedan como NaN; point ausente también es NaN.
+
+Ejemplo:
+    book = OddsBook.from_events(events)
+    pos = book.locate(event)
+    for r in book.event_rows(pos):
+        book.markets[book.market_idx[r]], book.names[book.name_idx[r]], book.price[r]
+"""
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: solo para vistas vectorizadas
+    np = None
+
+NAN = float('nan')
+
+# Arrays tipados del libro (para copiar/serializar en bloque)
+_GROUP_ARRAYS = ('group_book', 'group_market')
+_ROW_ARRAYS = ('book_idx', 'market_idx', 'name_idx', 'price', 'point')
+# Lo mínimo para reconstruir el libro: event_idx/book_idx/market_idx/group_event se derivan
+_PAYLOAD_ARRAYS = ('event_start', 'group_start', 'group_book', 'group_market', 'name_idx', 'price', 'point')
+
+
+class _Interner:
+    """Tabla string -> índice (cada nombre se guarda una sola vez)"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def add(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+class OddsBook:
+    """Cuotas de un conjunto de eventos en arrays paralelos (solo lectura tras construirse)"""
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.event_ids: List[Optional[str]] = []
+        self._positions: Dict[int, int] = {}  # id(evento) -> posición
+
+        # Tablas internadas
+        self.books: List[str] = []        # key del bookmaker
+        self.book_titles: List[str] = []  # title ('' si falta: cada consumidor pone su fallback)
+        self.book_urls: List[str] = []
+        self.markets: List[str] = []
+        self.names: List[str] = []
+        self.names_lower: List[str] = []
+
+        # Por evento: rango de grupos
+        self.event_start = array('i', [0])
+        # Por grupo (evento, bookmaker, mercado): rango de filas
+        self.group_event = array('i')
+        self.group_book = array('i')
+        self.group_market = array('i')
+        self.group_start = array('i', [0])
+        # Por fila (outcome)
+        self.event_idx = array('i')
+        self.book_idx = array('i')
+        self.market_idx = array('i')
+        self.name_idx = array('i')
+        self.price = array('d')
+        self.point = array('d')
+
+    # ==================== CONSTRUCCIÓN ====================
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict]) -> 'OddsBook':
+        book = cls()
+        books, markets, names = _Interner(), _Interner(), _Interner()
+        titles, urls = [], []
+
+        for event in events:
+            pos = len(book.events)
+            book.events.append(event)
+            book.event_ids.append(event.get('id'))
+            book._positions[id(event)] = pos
+
+            for bookmaker in event.get('bookmakers') or ():
+                key = bookmaker.get('key') or bookmaker.get('title') or ''
+                b = books.add(key)
+                if b == len(titles):
+                    titles.append(bookmaker.get('title') or '')
+                    urls.append(bookmaker.get('url', ''))
+                for market in bookmaker.get('markets') or ():
+                    m = markets.add(market.get('key') or '')
+                    book.group_event.append(pos)
+                    book.group_book.append(b)
+                    book.group_market.append(m)
+                    for outcome in market.get('outcomes') or ():
+                        book.event_idx.append(pos)
+                        book.book_idx.append(b)
+                        book.market_idx.append(m)
+                        book.name_idx.append(names.add(outcome.get('name') or ''))
+                        book.price.append(_to_float(outcome.get('price')))
+                        book.point.append(_to_float(outcome.get('point')))
+                    book.group_start.append(len(book.price))
+            book.event_start.append(len(book.group_event))
+
+        book.books = books.values
+        book.book_titles = titles
+        book.book_urls = urls
+        book.markets = markets.values
+        book.names = names.values
+        book.names_lower = [n.lower() for n in names.values]
+        return book
+
+    @classmethod
+    def ensure(cls, events: List[Dict], book: Optional['OddsBook'] = None) -> 'OddsBook':
+        """Devuelve `book` si contiene todos los eventos; si no, construye uno nuevo"""
+        if book is not None and all(id(ev) in book._positions for ev in events):
+            return book
+        return cls.from_events(events)
+
+    # ==================== CONSULTAS ====================
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def event_count(self) -> int:
+        return len(self.events)
+
+    def locate(self, event: Dict) -> Optional[int]:
+        """Posición del evento (por identidad del dict) o None si no está en el libro"""
+        return self._positions.get(id(event))
+
+    def event_groups(self, pos: int) -> range:
+        return range(self.event_start[pos], self.event_start[pos + 1])
+
+    def group_rows(self, g: int) -> range:
+        return range(self.group_start[g], self.group_start[g + 1])
+
+    def event_rows(self, pos: int) -> range:
+        groups = self.event_groups(pos)
+        if not groups:
+            return range(0)
+        return range(self.group_start[groups.start], self.group_start[groups.stop])
+
+    def point_at(self, r: int) -> Optional[float]:
+        point = self.point[r]
+        return None if math.isnan(point) else point
+
+    def market_id(self, market_key: str) -> int:
+        """Índice internado del mercado (-1 si no aparece en el libro)"""
+        try:
+            return self.markets.index(market_key)
+        except ValueError:
+            return -1
+
+    def group_odds(self, g: int) -> Dict[str, float]:
+        """{outcome: cuota} de un grupo (un mercado de un bookmaker)"""
+        names, name_idx, price = self.names, self.name_idx, self.price
+        return {names[name_idx[r]]: price[r] for r in self.group_rows(g)}
+
+    def market_odds(self, pos: int, market_key: str) -> Dict[str, Dict[str, float]]:
+        """{outcome: {bookmaker: cuota}} de un mercado del evento, entre todos los books"""
+        m = self.market_id(market_key)
+        result: Dict[str, Dict[str, float]] = {}
+        for g in self.event_groups(pos):
+            if self.group_market[g] != m:
+                continue
+            book_key = self.books[self.group_book[g]]
+            for r in self.group_rows(g):
+                result.setdefault(self.names[self.name_idx[r]], {})[book_key] = self.price[r]
+        return result
+
+    def best_prices(self, pos: int, market_key: str) -> Dict[str, float]:
+        """{outcome: mejor cuota} de un mercado del evento"""
+        m = self.market_id(market_key)
+        best: Dict[str, float] = {}
+        for g in self.event_groups(pos):
+            if self.group_market[g] != m:
+                continue
+            for r in self.group_rows(g):
+                price = self.price[r]
+                if math.isnan(price):
+                    continue
+                name = self.names[self.name_idx[r]]
+                if price > best.get(name, 0.0):
+                    best[name] = price
+        return best
+
+    def as_numpy(self) -> Dict[str, 'np.ndarray']:
+        """Vistas numpy sin copia de los arrays por fila (requiere numpy)"""
+        if np is None:
+            raise RuntimeError("numpy no está instalado")
+        return {
+            'event_idx': np.frombuffer(self.event_idx, dtype=np.int32),
+            'book_idx': np.frombuffer(self.book_idx, dtype=np.int32),
+            'market_idx': np.frombuffer(self.market_idx, dtype=np.int32),
+            'name_idx': np.frombuffer(self.name_idx, dtype=np.int32),
+            'price': np.frombuffer(self.price, dtype=np.float64),
+            'point': np.frombuffer(self.point, dtype=np.float64),
+        }
+
+    # ==================== SHARDS ====================
+
+    def subset(self, positions: Iterable[int]) -> 'OddsBook':
+        """Libro con solo los eventos en `positions`, en ese orden (comparte las tablas internadas)"""
+        sub = OddsBook()
+        sub.books, sub.book_titles, sub.book_urls = self.books, self.book_titles, self.book_urls
+        sub.markets, sub.names, sub.names_lower = self.markets, self.names, self.names_lower
+        for pos in positions:
+            event = self.events[pos]
+            new_pos = len(sub.events)
+            sub.events.append(event)
+            sub.event_ids.append(self.event_ids[pos])
+            sub._positions[id(event)] = new_pos
+
+            g0, g1 = self.event_start[pos], self.event_start[pos + 1]
+            r0, r1 = self.group_start[g0], self.group_start[g1]
+            for name in _GROUP_ARRAYS:
+                getattr(sub, name).extend(getattr(self, name)[g0:g1])
+            for name in _ROW_ARRAYS:
+                getattr(sub, name).extend(getattr(self, name)[r0:r1])
+            sub.group_event.extend(array('i', [new_pos]) * (g1 - g0))
+            sub.event_idx.extend(array('i', [new_pos]) * (r1 - r0))
+            offset = len(sub.event_idx) - r1
+            sub.group_start.extend(start + offset for start in self.group_start[g0 + 1:g1 + 1])
+            sub.event_start.append(len(sub.group_event))
+        return sub
+
+    def to_payload(self) -> Dict:
+        """
+        Forma compacta para enviar a otro proceso: arrays no derivables como bytes,
+        tablas internadas y eventos sin 'bookmakers' (las cuotas ya están en los arrays)
+        """
+        return {
+            'events': [{k: v for k, v in ev.items() if k != 'bookmakers'} for ev in self.events],
+            'tables': (self.books, self.book_titles, self.book_urls, self.markets, self.names),
+            'arrays': {name: getattr(self, name).tobytes() for name in _PAYLOAD_ARRAYS},
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> 'OddsBook':
+        book = cls()
+        book.books, book.book_titles, book.book_urls, book.markets, book.names = payload['tables']
+        book.names_lower = [n.lower() for n in book.names]
+        for name, data in payload['arrays'].items():
+            values = array(getattr(book, name).typecode)
+            values.frombytes(data)
+            setattr(book, name, values)
+        # Columnas derivadas: evento de cada grupo, evento/book/mercado de cada fila
+        for pos in range(len(book.event_start) - 1):
+            book.group_event.extend(array('i', [pos]) * (book.event_start[pos + 1] - book.event_start[pos]))
+        for g in range(len(book.group_book)):
+            n = book.group_start[g + 1] - book.group_start[g]
+            book.event_idx.extend(array('i', [book.group_event[g]]) * n)
+            book.book_idx.extend(array('i', [book.group_book[g]]) * n)
+            book.market_idx.extend(array('i', [book.group_market[g]]) * n)
+        for pos, event in enumerate(payload['events']):
+            book.events.append(event)
+            book.event_ids.append(event.get('id'))
+            book._positions[id(event)] = pos
+        return book
@@ -0,0 +1,97 @@
+"""
+data/outcome_sides.py - Resolución única de outcome -> lado (home/away/draw/over/under)
+
+Los nombres de outcome de un evento se repiten en decenas de casas. El mapa
+nombre -> lado se construye una vez por evento (por par de equipos) y se
+reutiliza entre ciclos (LRU de OUTCOME_SIDES_CACHE_SIZE eventos), así que
+scanner, scanner avanzado y feature extractor resuelven igual y sin repetir
+el trabajo de strings.
+
+Reglas (h2h):
+    draw  -> 'draw' en el nombre o alias de empate (x, empate, tie)
+    home  -> nombre del local contenido en el outcome, o alias (home, local)
+    away  -> nombre del visitante contenido en el outcome, o alias (away, visitante)
+    None  -> sin resolver (cada llamador decide el fallback)
+totals: 'over' si contiene "over", si no 'under'.
+spreads: 'home' si resuelve al local, si no 'away'.
+
+Alias de equipos adicionales vía TEAM_ALIASES ("alias=Equipo;alias2=Equipo2"):
+un outcome igual al alias cuenta como el equipo.
+
+Ejemplo:
+    sides = event_sides('Los Angeles Lakers', 'Boston Celtics')
+    sides.side('h2h', 'Los Angeles Lakers')  # 'home'
+"""
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+HOME, AWAY, DRAW, OVER, UNDER = 'home', 'away', 'draw', 'over', 'under'
+
+DRAW_ALIASES = frozenset({'x', 'empate', 'tie'})
+HOME_ALIASES = frozenset({'home', 'local'})
+AWAY_ALIASES = frozenset({'away', 'visitante'})
+
+OUTCOME_SIDES_CACHE_SIZE = int(os.getenv("OUTCOME_SIDES_CACHE_SIZE", "4096"))
+
+
+def parse_team_aliases(spec: str) -> Dict[str, str]:
+    """'LA Lakers=Los Angeles Lakers;Man Utd=Manchester United' -> {alias: equipo} (en minúsculas)"""
+    aliases = {}
+    for item in (spec or '').split(';'):
+        if not item.strip():
+            continue
+        alias, sep, team = item.partition('=')
+        if not sep or not alias.strip() or not team.strip():
+            raise ValueError(f"Alias de equipo inválido: {item!r} (formato alias=Equipo)")
+        aliases[alias.strip().lower()] = team.strip().lower()
+    return aliases
+
+
+TEAM_ALIASES = parse_team_aliases(os.getenv("TEAM_ALIASES", ""))
+
+
+class EventSides:
+    """Mapa nombre de outcome -> lado de un evento (memoizado por nombre)"""
+
+    __slots__ = ('home_lower', 'away_lower', '_h2h')
+
+    def __init__(self, home: str, away: str):
+        self.home_lower = (home or '').lower()
+        self.away_lower = (away or '').lower()
+        self._h2h: Dict[str, Optional[str]] = {}
+
+    def _resolve(self, name_lower: str) -> Optional[str]:
+        if 'draw' in name_lower or name_lower in DRAW_ALIASES:
+            return DRAW
+        team = TEAM_ALIASES.get(name_lower, name_lower)
+        if (self.home_lower and self.home_lower in team) or name_lower in HOME_ALIASES:
+            return HOME
+        if (self.away_lower and self.away_lower in team) or name_lower in AWAY_ALIASES:
+            return AWAY
+        return None
+
+    def h2h(self, name: str) -> Optional[str]:
+        """Lado de un outcome de ganador (home/away/draw) o None"""
+        name_lower = (name or '').lower()
+        try:
+            return self._h2h[name_lower]
+        except KeyError:
+            side = self._h2h[name_lower] = self._resolve(name_lower)
+            return side
+
+    def side(self, market_key: str, name: str) -> Optional[str]:
+        """Lado del outcome según el mercado (None en h2h sin resolver o mercado desconocido)"""
+        if market_key == 'h2h':
+            return self.h2h(name)
+        if market_key == 'totals':
+            return OVER if 'over' in (name or '').lower() else UNDER
+        if market_key == 'spreads':
+            return HOME if self.h2h(name) == HOME else AWAY
+        return None
+
+
+@lru_cache(maxsize=OUTCOME_SIDES_CACHE_SIZE)
+def event_sides(home: str, away: str) -> EventSides:
+    """EventSides compartido del par de equipos (se conserva entre ciclos)"""
+    return EventSides(home, away)
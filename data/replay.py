@@ -0,0 +1,267 @@
+"""
+data/replay.py - Grabación y replay de respuestas de The Odds API
+
+Permite reproducir ciclos de producción sin red:
+- OddsRecorder: guarda las respuestas crudas (/odds y /scores) comprimidas con gzip,
+  con timestamp, deporte, status y headers (x-requests-*). Se activa con ODDS_RECORD_DIR.
+- ReplayOddsProvider: lee las grabaciones y sirve, para un instante virtual dado,
+  la última respuesta grabada de cada deporte. Tiene la misma interfaz que
+  OddsFetcher (fetch_odds), así que puede sustituirlo en ValueBotMonitor.
+- ReplayServer: servidor HTTP local que imita /v4/sports/{sport}/odds y /scores,
+  para apuntar OddsFetcher/AutoVerifier con ODDS_API_BASE_URL.
+
+Con time_shift=True los commence_time se desplazan para que la distancia
+al kickoff sea la misma que en el momento de la grabación, así los filtros
+de ventana (24h, ALERT_WINDOW_HOURS) se comportan como en producción.
+
+Formato: archivos odds_YYYYMMDD.jsonl.gz, una respuesta por línea:
+    {"ts": iso, "endpoint": "odds"|"scores", "sport": str, "status": int,
+     "headers": {...}, "body": str}
+"""
+import bisect
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ODDS_RECORD_DIR = os.getenv("ODDS_RECORD_DIR", "")
+
+# Headers relevantes que se guardan con cada respuesta
+RECORDED_HEADERS = ('x-requests-remaining', 'x-requests-used', 'x-requests-last', 'content-type')
+
+
+# ==================== GRABACIÓN ====================
+
+class OddsRecorder:
+    """Guarda respuestas crudas de la API en archivos JSONL comprimidos por día"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+
+    def record(self, endpoint: str, sport: str, status: int, headers, body: bytes, ts: datetime = None):
+        ts = ts or datetime.now(timezone.utc)
+        entry = {
+            'ts': ts.isoformat(),
+            'endpoint': endpoint,
+            'sport': sport,
+            'status': status,
+            'headers': {k: headers.get(k) for k in RECORDED_HEADERS if headers and headers.get(k) is not None},
+            'body': body.decode('utf-8', errors='replace') if isinstance(body, bytes) else body,
+        }
+        path = self.directory / f"odds_{ts.strftime('%Y%m%d')}.jsonl.gz"
+        try:
+            # Cada append crea un miembro gzip nuevo; gzip.open los lee en secuencia
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.recorded += 1
+        except OSError as e:
+            logger.error(f"Error grabando respuesta {endpoint}/{sport}: {e}")
+
+
+_recorder: Optional[OddsRecorder] = None
+
+
+def get_recorder() -> Optional[OddsRecorder]:
+    """Recorder global si ODDS_RECORD_DIR está configurado, si no None"""
+    global _recorder
+    if _recorder is None and ODDS_RECORD_DIR:
+        _recorder = OddsRecorder(ODDS_RECORD_DIR)
+        logger.info(f"Grabando respuestas de The Odds API en {ODDS_RECORD_DIR}")
+    return _recorder
+
+
+def load_recordings(paths: Iterable[str]) -> List[Dict]:
+    """Carga entradas de archivos o directorios de grabación, ordenadas por timestamp"""
+    files = []
+    for p in paths:
+        p = Path(p)
+        files.extend(sorted(p.glob('*.jsonl.gz')) if p.is_dir() else [p])
+
+    entries = []
+    for path in files:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                entry['ts'] = datetime.fromisoformat(entry['ts'])
+                entries.append(entry)
+    entries.sort(key=lambda e: e['ts'])
+    return entries
+
+
+# ==================== REPLAY ====================
+
+class ReplayClock:
+    """
+    Reloj virtual del replay.
+
+    Avanza `speed` segundos virtuales por segundo real desde `start`,
+    o se mueve explícitamente con advance_to() (modo paso a paso).
+    """
+
+    def __init__(self, start: datetime, speed: float = 0.0):
+        self.start = start
+        self.speed = speed
+        self._anchor_virtual = start
+        self._anchor_real = time.monotonic()
+
+    def now(self) -> datetime:
+        elapsed = (time.monotonic() - self._anchor_real) * self.speed
+        return self._anchor_virtual + timedelta(seconds=elapsed)
+
+    def advance_to(self, ts: datetime):
+        self._anchor_virtual = ts
+        self._anchor_real = time.monotonic()
+
+
+class ReplayOddsProvider:
+    """Sirve respuestas grabadas según el reloj virtual; sustituto directo de OddsFetcher"""
+
+    def __init__(self, entries: List[Dict], clock: ReplayClock = None, time_shift: bool = True):
+        self.entries = entries
+        self.time_shift = time_shift
+        self.clock = clock or ReplayClock(entries[0]['ts'] if entries else datetime.now(timezone.utc))
+
+        # Índice por (endpoint, sport): timestamps ordenados + entradas
+        self._index: Dict[tuple, Dict[str, list]] = {}
+        for entry in entries:
+            slot = self._index.setdefault((entry['endpoint'], entry['sport']), {'ts': [], 'entries': []})
+            slot['ts'].append(entry['ts'])
+            slot['entries'].append(entry)
+
+        # Misma interfaz de métricas que OddsFetcher
+        self.last_latencies = {}
+        self.last_cycle_seconds = 0.0
+        self.planner = None
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], **kwargs) -> 'ReplayOddsProvider':
+        return cls(load_recordings(paths), **kwargs)
+
+    @property
+    def sports(self) -> List[str]:
+        return sorted({sport for endpoint, sport in self._index if endpoint == 'odds'})
+
+    def cycle_times(self, gap_seconds: float = 120) -> List[datetime]:
+        """Instantes de cada ciclo grabado (respuestas /odds separadas por más de gap_seconds)"""
+        cycles = []
+        for entry in self.entries:
+            if entry['endpoint'] != 'odds':
+                continue
+            if not cycles or (entry['ts'] - cycles[-1]).total_seconds() > gap_seconds:
+                cycles.append(entry['ts'])
+            else:
+                cycles[-1] = entry['ts']  # el ciclo termina en su última respuesta
+        return cycles
+
+    def response_for(self, endpoint: str, sport: str, at: datetime = None) -> Optional[Dict]:
+        """Última respuesta grabada de (endpoint, sport) con ts <= at"""
+        slot = self._index.get((endpoint, sport))
+        if not slot:
+            return None
+        at = at or self.clock.now()
+        i = bisect.bisect_right(slot['ts'], at)
+        return slot['entries'][i - 1] if i else None
+
+    def render_body(self, entry: Dict) -> str:
+        """Cuerpo de la respuesta, con commence_time desplazado si time_shift está activo"""
+        if not self.time_shift or entry['status'] != 200:
+            return entry['body']
+        shift = datetime.now(timezone.utc) - entry['ts']
+        data = json.loads(entry['body'])
+        for ev in data if isinstance(data, list) else []:
+            commence = ev.get('commence_time')
+            if isinstance(commence, str) and commence:
+                try:
+                    shifted = datetime.fromisoformat(commence.replace('Z', '+00:00')) + shift
+                    ev['commence_time'] = shifted.strftime('%Y-%m-%dT%H:%M:%SZ')
+                except ValueError:
+                    pass
+        return json.dumps(data)
+
+    async def fetch_odds(self, sports: List[str]) -> List[Dict]:
+        start = time.perf_counter()
+        at = self.clock.now()
+        self.last_latencies = {}
+        results = []
+        for sport in sports:
+            t0 = time.perf_counter()
+            entry = self.response_for('odds', sport, at)
+            record = {'latency': 0.0, 'attempts': 1, 'status': entry['status'] if entry else None,
+                      'events': 0, 'bytes': 0}
+            if entry and entry['status'] == 200:
+                body = self.render_body(entry)
+                record['bytes'] = len(body)
+                data = json.loads(body)
+                for ev in data:
+                    ev['_sport_key'] = sport
+                results.extend(data)
+                record['events'] = len(data)
+            record['latency'] = time.perf_counter() - t0
+            self.last_latencies[sport] = record
+        self.last_cycle_seconds = time.perf_counter() - start
+        return results
+
+
+# ==================== SERVIDOR LOCAL ====================
+
+class ReplayServer:
+    """
+    Servidor local que imita The Odds API v4 a partir de un ReplayOddsProvider.
+
+    Rutas: /v4/sports/{sport}/odds[/] y /v4/sports/{sport}/scores[/]
+    """
+
+    def __init__(self, provider: ReplayOddsProvider, host: str = '127.0.0.1', port: int = 8089):
+        self.provider = provider
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        endpoint = request.match_info['endpoint']
+        sport = request.match_info['sport']
+        entry = self.provider.response_for(endpoint, sport)
+        self.requests_served += 1
+        if entry is None:
+            return web.json_response({'message': f'No recording for {endpoint}/{sport}'}, status=404)
+        headers = {k: v for k, v in entry['headers'].items() if k != 'content-type'}
+        return web.Response(
+            text=self.provider.render_body(entry),
+            status=entry['status'],
+            headers=headers,
+            content_type='application/json',
+        )
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/v4/sports/{sport}/{endpoint:(odds|scores)}', self._handle)
+        app.router.add_get('/v4/sports/{sport}/{endpoint:(odds|scores)}/', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Replay server escuchando en {self.base_url}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
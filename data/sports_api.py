@@ -16,6 +16,7 @@ import re
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+from data.http_client import http_clients
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -43,14 +44,15 @@ class SportsAPIClient:
         self.session = None
         self.cache = {}  # Cache para evitar demasiadas requests
         self.cache_duration = 300  # 5 minutos
+        self.timeout = aiohttp.ClientTimeout(total=10)
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=HEADERS, timeout=aiohttp.ClientTimeout(total=10))
+        # Sesión compartida del proceso (keep-alive + cache DNS); no se cierra aquí
+        self.session = await http_clients.get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
     
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Verifica si el cache es válido"""
@@ -86,7 +88,7 @@ class SportsAPIClient:
             # Usar ESPN para injury report (más confiable que NBA.com directamente)
             url = f"{ESPN_API_BASE}/basketball/nba/news"
             
-            async with self.session.get(url) as response:
+            async with self.session.get(url, headers=HEADERS, timeout=self.timeout) as response:
                 if response.status == 200:
                     data = await response.json()
                     
@@ -134,7 +136,7 @@ class SportsAPIClient:
             today = datetime.now().strftime('%Y-%m-%d')
             url = f"{MLB_API_BASE}/schedule/games?sportId=1&date={today}&hydrate=lineups,probablePitcher"
             
-            async with self.session.get(url) as response:
+            async with self.session.get(url, headers=HEADERS, timeout=self.timeout) as response:
                 if response.status == 200:
                     data = await response.json()
                     
@@ -185,7 +187,7 @@ class SportsAPIClient:
             # Usar ESPN Soccer API
             url = f"{ESPN_API_BASE}/soccer/{league}/scoreboard"
             
-            async with self.session.get(url) as response:
+            async with self.session.get(url, headers=HEADERS, timeout=self.timeout) as response:
                 if response.status == 200:
                     data = await response.json()
                     
@@ -252,7 +254,7 @@ class SportsAPIClient:
             espn_sport = sport_map.get(sport, sport)
             url = f"{ESPN_API_BASE}/{espn_sport}/news"
             
-            async with self.session.get(url) as response:
+            async with self.session.get(url, headers=HEADERS, timeout=self.timeout) as response:
                 if response.status == 200:
                     data = await response.json()
                     
@@ -43,25 +43,26 @@ RESET_HOUR = 6  # 6 AM Eastern
 
 
 class User:
-        def get_dynamic_stake(self) -> float:
-            """Devuelve el stake fijo del 10% del bank dinámico (10€ por defecto)."""
-            return round(self.dynamic_bank * 0.10, 2)
-
-        def update_dynamic_bank(self, bet_result: Dict):
-            """Actualiza el bank dinámico tras el resultado de una apuesta con stake fijo."""
-            self.reset_dynamic_bank_if_needed()
-            stake = 10.0  # Siempre stake 10€
-            odd = bet_result.get('odd', 0)
-            won = bet_result.get('won', False)
-            if won:
-                profit = stake * (odd - 1)
-                self.dynamic_bank += profit
-            else:
-                self.dynamic_bank -= stake
-            # No permitir bank negativo
-            if self.dynamic_bank < 0:
-                self.dynamic_bank = 0.0
     """Representa un usuario del sistema."""
+
+    def get_dynamic_stake(self) -> float:
+        """Devuelve el stake fijo del 10% del bank dinámico (10€ por defecto)."""
+        return round(self.dynamic_bank * 0.10, 2)
+
+    def update_dynamic_bank(self, bet_result: Dict):
+        """Actualiza el bank dinámico tras el resultado de una apuesta con stake fijo."""
+        self.reset_dynamic_bank_if_needed()
+        stake = 10.0  # Siempre stake 10€
+        odd = bet_result.get('odd', 0)
+        won = bet_result.get('won', False)
+        if won:
+            profit = stake * (odd - 1)
+            self.dynamic_bank += profit
+        else:
+            self.dynamic_bank -= stake
+        # No permitir bank negativo
+        if self.dynamic_bank < 0:
+            self.dynamic_bank = 0.0
     
     def __init__(
         self, 
@@ -87,8 +88,7 @@ class User:
         saldo_comision: float = 0.0,
         suscripcion_fin: str = None,
         total_commission_earned: float = 0.0,
-        free_weeks_earned: int = 0
-    ):
+        free_weeks_earned: int = 0,
         # Bank dinámico semanal
         dynamic_bank: float = 200.0,
         dynamic_bank_last_reset: str = None
@@ -122,19 +122,19 @@ class User:
         # Bank dinámico semanal
         self.dynamic_bank = dynamic_bank
         self.dynamic_bank_last_reset = dynamic_bank_last_reset or self._get_current_date()
-            """Reinicia el bank dinámico a 200€ si es lunes y no se ha reiniciado hoy."""
-            from datetime import datetime
-            import pytz
-            today = datetime.now().date()
-            last_reset = None
-            try:
-                last_reset = datetime.fromisoformat(self.dynamic_bank_last_reset).date()
-            except Exception:
-                last_reset = today
-            # Lunes = 0
-            if today.weekday() == 0 and last_reset != today:
-                self.dynamic_bank = 200.0
-                self.dynamic_bank_last_reset = today.isoformat()
+
+    def reset_dynamic_bank_if_needed(self):
+        """Reinicia el bank dinámico a 200€ si es lunes y no se ha reiniciado hoy."""
+        today = datetime.now().date()
+        last_reset = None
+        try:
+            last_reset = datetime.fromisoformat(self.dynamic_bank_last_reset).date()
+        except Exception:
+            last_reset = today
+        # Lunes = 0
+        if today.weekday() == 0 and last_reset != today:
+            self.dynamic_bank = 200.0
+            self.dynamic_bank_last_reset = today.isoformat()
     
     def _get_current_date(self) -> str:
         """Obtiene la fecha actual en formato YYYY-MM-DD en timezone configurado."""
@@ -27,7 +27,16 @@ if str(PROJECT_ROOT) not in sys.path:
 
 # Imports del sistema existente
 from data.odds_api import OddsFetcher
-from scanner.scanner import ValueScanner, USING_ENHANCED_MODEL
+from data.http_client import http_clients
+from data.credit_planner import CreditPlanner
+from data.fingerprint import EventFingerprinter, IngestChanges
+from data.odds_book import OddsBook
+from data.event_schema import normalize_events
+from data.event_index import EventIndex
+from scanner.scanner import ValueScanner, USING_ENHANCED_MODEL, THRESHOLDS, parse_scan_tiers
+from data.fetch_plan import FetchPlanCompiler
+from model.probability_cache import probability_cache
+from utils.top_k import TopKSelector
 from notifier.telegram import TelegramNotifier
 from data.users import get_users_manager, User
 from data.state import AlertsState
@@ -83,6 +92,17 @@ MAX_ALERTS_PER_DAY = int(os.getenv("MAX_ALERTS_PER_DAY", "5"))
 MIN_DAILY_PICKS = int(os.getenv("MIN_DAILY_PICKS", "3"))  # Mínimo garantizado
 MAX_DAILY_PICKS = int(os.getenv("MAX_DAILY_PICKS", "5"))  # Máximo recomendado
 
+# Filtros relajados cuando no se alcanza MIN_DAILY_PICKS
+RELAXED_MIN_ODD = 1.3  # Más bajo
+RELAXED_MAX_ODD = 4.0  # Más alto
+RELAXED_MIN_PROB = 0.48  # Más bajo (48%)
+# Escalera de tiers (de más estricto a más relajado): nombre:min_odd-max_odd:min_prob
+# Los scanners hacen una sola pasada con la envolvente y etiquetan cada candidato
+SCAN_TIERS = parse_scan_tiers(os.getenv(
+    "SCAN_TIERS",
+    f"strict:{MIN_ODD}-{MAX_ODD}:{MIN_PROB},relaxed:{RELAXED_MIN_ODD}-{RELAXED_MAX_ODD}:{RELAXED_MIN_PROB}"
+))
+
 # Deportes a monitorear
 SPORTS = os.getenv("SPORTS", "basketball_nba,soccer_epl,soccer_spain_la_liga,tennis_atp,tennis_wta,baseball_mlb").split(",")
 
@@ -91,6 +111,8 @@ AMERICA_TZ = ZoneInfo("America/New_York")  # Hora de AmÃƒÂ©rica
 DAILY_START_HOUR = 6  # 6 AM
 UPDATE_INTERVAL_MINUTES = 14  # Actualizar cada 14 minutos (optimiza consumo de créditos)
 ALERT_WINDOW_HOURS = 8  # Alertar cuando falten menos de 8 horas (ampliado para más picks)
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "true").lower() == "true"  # Polling por deporte según créditos
+FETCH_PLAN = os.getenv("FETCH_PLAN", "true").lower() == "true"  # Markets/regions mínimos por deporte
 
 # Configuracin adicional
 SAMPLE_PATH = os.getenv("SAMPLE_ODDS_PATH", "data/sample_odds.json")
@@ -102,22 +124,30 @@ class ValueBotMonitor:
     """
     
     def __init__(self):
-        self.fetcher = OddsFetcher(api_key=API_KEY)
+        # Planificador de créditos: decide qué deportes pedir en cada ciclo
+        self.planner = CreditPlanner(
+            alert_window_hours=ALERT_WINDOW_HOURS,
+            base_interval_minutes=UPDATE_INTERVAL_MINUTES
+        ) if ADAPTIVE_POLLING and API_KEY else None
+        # Plan de fetch: solo los mercados/casas que algún tier de escaneo puede usar
+        self.fetch_plan = FetchPlanCompiler(
+            THRESHOLDS,
+            ValueScanner.sport_prefix,
+            scanners=[(t.min_odd, t.max_odd, t.min_prob) for t in SCAN_TIERS],
+            # xG real solo con el modelo mejorado y la BD de stats disponibles
+            xg_model=USING_ENHANCED_MODEL and ENHANCED_SYSTEM_AVAILABLE
+        ).compile(SPORTS) if FETCH_PLAN else None
+        if self.fetch_plan and self.planner:
+            for sport, spec in self.fetch_plan.items():
+                self.planner.set_expected_cost(sport, spec.cost)
+        self.fetcher = OddsFetcher(api_key=API_KEY, planner=self.planner, fetch_plan=self.fetch_plan)
         
         # Usar scanner mejorado si estÃƒÂ¡ disponible
         if ENHANCED_SYSTEM_AVAILABLE and EnhancedValueScanner:
-            self.scanner = EnhancedValueScanner(
-                min_odd=MIN_ODD, 
-                max_odd=MAX_ODD, 
-                min_prob=MIN_PROB
-            )
+            self.scanner = EnhancedValueScanner(tiers=SCAN_TIERS)
             logger.info("Ã¢Å“â€¦ Usando EnhancedValueScanner con line movement")
         else:
-            self.scanner = ValueScanner(
-                min_odd=MIN_ODD, 
-                max_odd=MAX_ODD, 
-                min_prob=MIN_PROB
-            )
+            self.scanner = ValueScanner(tiers=SCAN_TIERS)
             logger.info("Ã¢Å¡Â Ã¯Â¸Â  Usando ValueScanner bÃƒÂ¡sico")
         
         self.notifier = TelegramNotifier(BOT_TOKEN)
@@ -125,12 +155,23 @@ class ValueBotMonitor:
         self.alerts_state = AlertsState("data/alerts_state.json", MAX_ALERTS_PER_DAY)
         
         # Tracking de eventos monitoreados
-        self.monitored_events: Dict[str, Dict] = {}  # event_id -> event_data
+        self.monitored_events = EventIndex()  # event_id -> event_data, ordenado por commence_ts
         self.sent_alerts: Set[str] = set()  # Para evitar duplicados
         
+        # Huellas de contenido para saber qué eventos cambiaron entre ciclos
+        self.fingerprinter = EventFingerprinter()
+        self.last_changes = IngestChanges()
+        # Libro de cuotas del ciclo (arrays tipados), compartido por tracker y scanners
+        self.odds_book = OddsBook()
+        
         logger.info("ValueBotMonitor inicializado")
         logger.info(f"Deportes: {', '.join(SPORTS)}")
+        if self.fetch_plan:
+            logger.info(f"Fetch plan:\n{self.fetch_plan.format_plan()}")
         logger.info(f"Filtros: odds {MIN_ODD}-{MAX_ODD}, prob {MIN_PROB:.0%}+")
+        logger.info("Tiers: " + ", ".join(
+            f"{t.name} {t.min_odd}-{t.max_odd}/{t.min_prob:.0%}" for t in SCAN_TIERS
+        ))
         logger.info(f"Alertas: maximo {MAX_ALERTS_PER_DAY} diarias, <{ALERT_WINDOW_HOURS}h antes")
         
         # Log sistema mejorado
@@ -153,17 +194,15 @@ class ValueBotMonitor:
         """
         Filtra eventos que empiezan en menos de max_hours
         """
-        now = datetime.now(timezone.utc)
-        cutoff_time = now + timedelta(hours=max_hours)
-        
-        events_soon = []
-        for event_id, event_data in self.monitored_events.items():
-            commence_time = event_data.get('commence_time')
-            if commence_time and isinstance(commence_time, datetime):
-                if now <= commence_time <= cutoff_time:
-                    events_soon.append(event_data)
-        
-        return events_soon
+        now_ts = datetime.now(timezone.utc).timestamp()
+        return self.monitored_events.window(now_ts, now_ts + max_hours * 3600)
+
+    def count_events_starting_soon(self, max_hours: float = ALERT_WINDOW_HOURS) -> int:
+        """
+        Cuenta eventos que empiezan en menos de max_hours (sin construir la lista)
+        """
+        now_ts = datetime.now(timezone.utc).timestamp()
+        return self.monitored_events.count_window(now_ts, now_ts + max_hours * 3600)
 
     def get_next_update_time(self) -> datetime:
         """
@@ -171,6 +210,13 @@ class ValueBotMonitor:
         """
         now = datetime.now(AMERICA_TZ)
         next_update = now + timedelta(minutes=UPDATE_INTERVAL_MINUTES)
+        
+        # Con polling adaptativo, adelantar si algún deporte cerca del kickoff vence antes
+        if self.planner:
+            planned = self.planner.next_fetch_time()
+            if planned:
+                planned = max(planned.astimezone(AMERICA_TZ), now + timedelta(minutes=1))
+                next_update = min(next_update, planned)
         return next_update
 
     def get_next_daily_start(self) -> datetime:
@@ -252,56 +298,76 @@ class ValueBotMonitor:
         Obtiene eventos de las APIs y actualiza el monitoring + line tracking
         """
         try:
+            sports = SPORTS
+            if self.planner:
+                sports = self.planner.due_sports(SPORTS)
+                logger.info(f"Credit planner: {len(sports)}/{len(SPORTS)} sports due this cycle")
+            
             logger.info("Fetching odds from APIs...")
-            events = await self.fetcher.fetch_odds(SPORTS)
+            events = await self.fetcher.fetch_odds(sports) if sports else []
             logger.info(f"Fetched {len(events)} events total")
+            if self.fetcher.last_latencies:
+                slowest_sport, slowest = max(self.fetcher.last_latencies.items(), key=lambda kv: kv[1]['latency'])
+                logger.info(
+                    f"Fetch cycle: {self.fetcher.last_cycle_seconds:.1f}s "
+                    f"(slowest: {slowest_sport} {slowest['latency']:.1f}s, {slowest['attempts']} attempt(s))"
+                )
+            if self.fetch_plan and self.fetcher.last_latencies:
+                savings = self.fetch_plan.cycle_savings(self.fetcher.last_latencies)
+                logger.info(
+                    f"Fetch plan: {savings['credits']} credits for {savings['calls']} calls "
+                    f"({savings['credits_saved']} saved), {savings['bytes_received'] / 1024:.0f} KB received "
+                    f"(~{savings['bytes_saved_estimate'] / 1024:.0f} KB saved)"
+                )
+            if self.planner:
+                # Replanificar con los headers y kickoffs recién recibidos
+                self.planner.build_plan(SPORTS)
+                burn = self.planner.projected_burn()
+                logger.info(
+                    f"Credits: {burn['credits_remaining']} remaining, "
+                    f"planned {burn['planned_per_day']:.0f}/day vs budget {burn['budget_per_day']:.0f}/day "
+                    f"(stretch x{burn['stretch_factor']:.2f})"
+                )
+
+            # Normalizar una sola vez (commence_ts en epoch, campos validados)
+            events, rejected = normalize_events(events)
+            if rejected:
+                logger.warning(f"Normalization dropped {sum(rejected.values())} events: {dict(rejected)}")
             
             # Procesar y almacenar eventos
             processed_events = []
-            current_time = datetime.now(timezone.utc)
+            now_ts = datetime.now(timezone.utc).timestamp()
             
             for event in events:
-                try:
-                    # Parsear tiempo de inicio
-                    commence_str = event.get('commence_time')
-                    if commence_str:
-                        if isinstance(commence_str, str):
-                            commence_time = datetime.fromisoformat(commence_str.replace('Z', '+00:00'))
-                        else:
-                            commence_time = commence_str
-                    else:
-                        continue  # Skip eventos sin tiempo
-                    
-                    # Solo eventos futuros (no en vivo)
-                    if commence_time <= current_time:
-                        continue
-                    
-                    # Agregar tiempo parseado al evento
-                    event['commence_time'] = commence_time
-                    event_id = event.get('id', f"{event.get('sport_key', 'unknown')}_{len(processed_events)}")
-                    
-                    # Actualizar en monitored_events
-                    self.monitored_events[event_id] = event
-                    processed_events.append(event)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing event: {e}")
+                # Solo eventos futuros (no en vivo)
+                if event['commence_ts'] <= now_ts:
                     continue
+                
+                # Actualizar en monitored_events
+                self.monitored_events[event['id']] = event
+                processed_events.append(event)
+            
+            # Huellas de contenido: qué eventos/mercados cambiaron desde el ciclo anterior
+            self.last_changes = self.fingerprinter.ingest(processed_events)
+            changes = self.last_changes.summary()
+            logger.info(
+                f"Ingest: {changes['events_changed']}/{changes['events_total']} events changed "
+                f"({changes['events_new']} new), "
+                f"{changes['markets_changed']}/{changes['markets_total']} markets changed"
+            )
+            
+            # Libro de cuotas de todos los eventos monitoreados, construido una vez por ciclo
+            self.odds_book = OddsBook.from_events(list(self.monitored_events.values()))
             
-            # Guardar snapshot de cuotas para line movement tracking
+            # Guardar snapshot de cuotas para line movement tracking (solo persiste lo que cambió)
             if ENHANCED_SYSTEM_AVAILABLE and line_tracker and processed_events:
-                line_tracker.record_odds_snapshot(processed_events)
+                line_tracker.record_odds_snapshot(processed_events, changes=self.last_changes, book=self.odds_book)
             
             # Limpiar eventos pasados del monitoring
-            current_time = datetime.now(timezone.utc)
-            expired_events = [
-                event_id for event_id, event in self.monitored_events.items()
-                if event.get('commence_time') and event['commence_time'] <= current_time
-            ]
-            
+            expired_events = self.monitored_events.pop_expired(datetime.now(timezone.utc).timestamp())
             for event_id in expired_events:
-                del self.monitored_events[event_id]
                 logger.debug(f" Removed expired event: {event_id}")
+            self.fingerprinter.forget(expired_events)
             
             logger.info(f"Events processed: {len(processed_events)}, total monitored: {len(self.monitored_events)}")
             return processed_events
@@ -310,6 +376,35 @@ class ValueBotMonitor:
             logger.error(f" Error fetching events: {e}")
             return []
 
+    async def _run_scan(self, scan, events: List[Dict]) -> List[Dict]:
+        """
+        Ejecuta el escaneo; con pool de procesos (SCAN_WORKERS > 1) espera en un
+        hilo para que el event loop siga atendiendo Telegram mientras tanto
+        """
+        if self.scanner.executor is not None:
+            return await asyncio.to_thread(scan, events, book=self.odds_book)
+        return scan(events, book=self.odds_book)
+
+    @staticmethod
+    def _tier_rank() -> Dict[str, int]:
+        return {t.name: i for i, t in enumerate(SCAN_TIERS)}
+
+    def _pool_by_tier(self, candidates: List[Dict]):
+        """
+        Candidatos del tier más estricto que alcanza MIN_DAILY_PICKS, acumulando
+        tiers de la escalera; si ninguno alcanza, todos.
+
+        Returns:
+            (candidatos, nombre del tier usado)
+        """
+        rank = self._tier_rank()
+        pool = candidates
+        for i, tier in enumerate(SCAN_TIERS):
+            pool = [c for c in candidates if rank.get(c.get('tier'), 0) <= i]
+            if len(pool) >= MIN_DAILY_PICKS:
+                return pool, tier.name
+        return pool, SCAN_TIERS[-1].name
+
     async def find_value_opportunities(self, events: List[Dict]) -> List[Dict]:
         """
         Encuentra oportunidades de value betting usando el scanner mejorado
@@ -319,7 +414,7 @@ class ValueBotMonitor:
             # Usar scanner mejorado si estÃƒÂ¡ disponible
             if ENHANCED_SYSTEM_AVAILABLE and EnhancedValueScanner and isinstance(self.scanner, EnhancedValueScanner):
                 # Scanner con anÃƒÂ¡lisis de line movement
-                candidates = self.scanner.find_value_bets_with_movement(events)
+                candidates = await self._run_scan(self.scanner.find_value_bets_with_movement, events)
                 
                 logger.info(f"🎯 Found {len(candidates)} initial candidates with movement analysis")
                 
@@ -349,7 +444,7 @@ class ValueBotMonitor:
                         )
             else:
                 # Scanner bÃƒÂ¡sico
-                candidates = self.scanner.find_value_bets(events)
+                candidates = await self._run_scan(self.scanner.find_value_bets, events)
                 
                 logger.info(f"📊 Found {len(candidates)} value candidates (basic scan)")
                 
@@ -367,55 +462,30 @@ class ValueBotMonitor:
                     )
             
             # Sistema de selección de picks: garantizar MIN_DAILY_PICKS a MAX_DAILY_PICKS
+            # eligiendo por tier sobre el mismo resultado (sin re-escanear)
+            candidates, tier = self._pool_by_tier(candidates)
+            if tier != SCAN_TIERS[0].name:
+                logger.info(f"🔧 Ampliando hasta tier '{tier}': {len(candidates)} candidatos")
             if len(candidates) < MIN_DAILY_PICKS:
                 logger.warning(f"⚠️  Solo {len(candidates)} picks encontrados, mínimo requerido: {MIN_DAILY_PICKS}")
-                logger.info("🔧 Ajustando filtros dinámicamente para alcanzar mínimo...")
-                
-                # Intentar con filtros más relajados
-                relaxed_scanner = EnhancedValueScanner(
-                    min_odd=1.3,  # Más bajo
-                    max_odd=4.0,  # Más alto
-                    min_prob=0.48  # Más bajo (48%)
-                ) if ENHANCED_SYSTEM_AVAILABLE else ValueScanner(
-                    min_odd=1.3,
-                    max_odd=4.0,
-                    min_prob=0.48
-                )
-                
-                if ENHANCED_SYSTEM_AVAILABLE and isinstance(relaxed_scanner, EnhancedValueScanner):
-                    relaxed_candidates = relaxed_scanner.find_value_bets_with_movement(events)
-                else:
-                    relaxed_candidates = relaxed_scanner.find_value_bets(events)
-                
-                logger.info(f"📈 Con filtros relajados: {len(relaxed_candidates)} candidatos")
-                
-                # Usar los relajados si hay más
-                if len(relaxed_candidates) >= MIN_DAILY_PICKS:
-                    candidates = relaxed_candidates
-                    logger.info(f"✅ Usando {len(candidates)} picks con filtros ajustados")
-                else:
-                    # Mantener todos los disponibles
-                    logger.warning(f"⚠️  Aún insuficientes. Usando todos: {len(relaxed_candidates)}")
-                    candidates = relaxed_candidates if len(relaxed_candidates) > len(candidates) else candidates
-                
                 selected_candidates = candidates[:MAX_DAILY_PICKS]
             elif len(candidates) > MAX_DAILY_PICKS:
                 logger.info(f"📈 {len(candidates)} picks disponibles, seleccionando top {MAX_DAILY_PICKS} por EV")
-                # Calcular EV real para cada candidato
-                for c in candidates:
-                    odds = c.get('odds', 0)
-                    prob = c.get('prob', 0)
-                    c['expected_value'] = (prob * odds) - 1  # EV real
+                # Top MAX_DAILY_PICKS por tier (más estricto primero) y EV real, con heap acotado;
+                # se guardan 5 más solo para el log de descartados
+                rank = self._tier_rank()
+                top = TopKSelector(
+                    MAX_DAILY_PICKS + 5,
+                    score=lambda c: (-rank.get(c.get('tier'), 0), c.get('prob', 0) * c.get('odds', 0) - 1)
+                ).extend(candidates).results()
+                for c in top:
+                    c['expected_value'] = (c.get('prob', 0) * c.get('odds', 0)) - 1  # EV real
                     c['ev_percent'] = c['expected_value'] * 100
-                
-                # Ordenar por EV descendente y tomar top MAX_DAILY_PICKS
-                candidates.sort(key=lambda x: x.get('expected_value', 0), reverse=True)
-                selected_candidates = candidates[:MAX_DAILY_PICKS]
+                selected_candidates = top[:MAX_DAILY_PICKS]
                 
                 # Log de picks descartados
-                discarded = candidates[MAX_DAILY_PICKS:]
-                logger.info(f"❌ Descartados {len(discarded)} picks por límite máximo:")
-                for i, pick in enumerate(discarded[:5], 1):
+                logger.info(f"❌ Descartados {len(candidates) - len(selected_candidates)} picks por límite máximo:")
+                for i, pick in enumerate(top[MAX_DAILY_PICKS:], 1):
                     logger.info(f"   [{i}] {pick.get('selection')} @ {pick.get('odds'):.2f} - EV: {pick.get('ev_percent', 0):.2f}%")
             else:
                 logger.info(f"✅ {len(candidates)} picks en rango óptimo ({MIN_DAILY_PICKS}-{MAX_DAILY_PICKS})")
@@ -641,6 +711,11 @@ class ValueBotMonitor:
             except Exception as e:
                 logger.error(f"Error actualizando lesiones: {e}")
         
+        # Datos del modelo actualizados: los candidatos y probabilidades cacheados ya no valen
+        if self.scanner.candidate_cache is not None:
+            self.scanner.candidate_cache.invalidate()
+        probability_cache.invalidate()
+        
         # Fetch inicial de eventos del da
         events = await self.fetch_and_update_events()
         
@@ -680,28 +755,21 @@ class ValueBotMonitor:
         """
         logger.info("Ã¢ÂÂ° HOURLY UPDATE")
         
-        # Actualizar eventos y cuotas
-        events = await self.fetch_and_update_events()
-        
-        # SISTEMA MEJORADO: Guardar snapshot de odds para line movement
-        if ENHANCED_SYSTEM_AVAILABLE and line_tracker:
-            try:
-                snapshot_count = line_tracker.record_odds_snapshot(events)
-                logger.info(f"Ã°Å¸â€œÂ¸ Recorded {snapshot_count} odds snapshots for line movement tracking")
-            except Exception as e:
-                logger.error(f"Error recording odds snapshot: {e}")
+        # Actualizar eventos y cuotas (incluye el snapshot de line movement)
+        await self.fetch_and_update_events()
         
         # Procesar alertas para eventos inminentes
         alerts_sent = await self.process_alerts_for_imminent_events()
         
         # Log resumen
-        imminent_count = len(self.get_events_starting_soon(ALERT_WINDOW_HOURS))
+        imminent_count = self.count_events_starting_soon(ALERT_WINDOW_HOURS)
         total_monitored = len(self.monitored_events)
         
         logger.info(
             f"Ã°Å¸â€œÅ  Update summary: {total_monitored} events monitored, "
             f"{imminent_count} imminent, {alerts_sent} alerts sent"
         )
+        logger.info(f"HTTP pools: {http_clients.format_stats()}")
 
     async def run_continuous_monitoring(self):
         """
@@ -773,7 +841,7 @@ class ValueBotMonitor:
         
         # Mostrar resumen
         total_events = len(self.monitored_events)
-        imminent_events = len(self.get_events_starting_soon(ALERT_WINDOW_HOURS))
+        imminent_events = self.count_events_starting_soon(ALERT_WINDOW_HOURS)
         
         logger.info("Immediate check results:")
         logger.info(f"  Total events: {total_events}")
@@ -787,13 +855,20 @@ async def main():
     """
     monitor = ValueBotMonitor()
     
-    # Verificar argumentos de lnea de comandos
-    if len(sys.argv) > 1 and sys.argv[1] == '--test':
-        # Modo de prueba inmediata
-        await monitor.run_immediate_check()
-    else:
-        # Modo de monitoreo continuo
-        await monitor.run_continuous_monitoring()
+    try:
+        # Verificar argumentos de lnea de comandos
+        if len(sys.argv) > 1 and sys.argv[1] == '--test':
+            # Modo de prueba inmediata
+            await monitor.run_immediate_check()
+        else:
+            # Modo de monitoreo continuo
+            await monitor.run_continuous_monitoring()
+    finally:
+        # Cerrar pools HTTP compartidos
+        await http_clients.close()
+        # Cerrar pool de procesos de escaneo (si SCAN_WORKERS > 1)
+        if monitor.scanner.executor is not None:
+            monitor.scanner.executor.shutdown()
 
 
 if __name__ == "__main__":
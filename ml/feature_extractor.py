@@ -7,6 +7,9 @@ import logging
 import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
+from data.odds_book import OddsBook
+from data.event_schema import event_commence_ts, to_datetime
+from data.outcome_sides import event_sides
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +49,8 @@ class FeatureExtractor:
     
     def extract_features(self, event: Dict, team_stats: Optional[Dict] = None,
                         injuries: Optional[Dict] = None,
-                        line_movement: Optional[Dict] = None) -> Optional[np.ndarray]:
+                        line_movement: Optional[Dict] = None,
+                        odds_book: Optional[OddsBook] = None) -> Optional[np.ndarray]:
         """
         Extrae todas las features de un evento.
         
@@ -55,6 +59,7 @@ class FeatureExtractor:
             team_stats: Estadísticas de equipos (opcional)
             injuries: Información de lesiones (opcional)
             line_movement: Datos de movimiento de línea (opcional)
+            odds_book: OddsBook del ciclo que contiene el evento (opcional)
             
         Returns:
             Array numpy con features o None si faltan datos críticos
@@ -63,7 +68,7 @@ class FeatureExtractor:
             features = []
             
             # 1. Features básicas de odds
-            odds_features = self._extract_odds_features(event)
+            odds_features = self._extract_odds_features(event, odds_book)
             if odds_features is None:
                 return None
             features.extend(odds_features)
@@ -90,30 +95,26 @@ class FeatureExtractor:
             logger.error(f"Error extracting features: {e}")
             return None
     
-    def _extract_odds_features(self, event: Dict) -> Optional[List[float]]:
+    def _extract_odds_features(self, event: Dict, odds_book: Optional[OddsBook] = None) -> Optional[List[float]]:
         """Extrae features de cuotas"""
         try:
             # Obtener mejores cuotas de cada mercado
-            bookmakers = event.get('bookmakers', [])
-            if not bookmakers:
+            if not event.get('bookmakers'):
                 return None
             
-            # Buscar mercado h2h
-            best_odds = {'home': 0.0, 'away': 0.0, 'draw': 0.0}
+            # Mejor cuota h2h por outcome, desde el libro compartido si contiene el evento
+            pos = odds_book.locate(event) if odds_book is not None else None
+            if pos is None:
+                odds_book = OddsBook.from_events([event])
+                pos = 0
+            h2h_best = odds_book.best_prices(pos, 'h2h')
             
-            for book in bookmakers:
-                for market in book.get('markets', []):
-                    if market.get('key') == 'h2h':
-                        for outcome in market.get('outcomes', []):
-                            name = outcome.get('name', '').lower()
-                            price = float(outcome.get('price', 0))
-                            
-                            if 'home' in name or event.get('home_team', '') in outcome.get('name', ''):
-                                best_odds['home'] = max(best_odds['home'], price)
-                            elif 'away' in name or event.get('away_team', '') in outcome.get('name', ''):
-                                best_odds['away'] = max(best_odds['away'], price)
-                            elif 'draw' in name or 'tie' in name:
-                                best_odds['draw'] = max(best_odds['draw'], price)
+            best_odds = {'home': 0.0, 'away': 0.0, 'draw': 0.0}
+            sides = event_sides(event.get('home_team', ''), event.get('away_team', ''))
+            for outcome_name, price in h2h_best.items():
+                side = sides.h2h(outcome_name)
+                if side is not None:
+                    best_odds[side] = max(best_odds[side], price)
             
             # Si no hay odds, no podemos continuar
             if best_odds['home'] == 0.0 or best_odds['away'] == 0.0:
@@ -210,9 +211,7 @@ class FeatureExtractor:
     def _extract_temporal_features(self, event: Dict) -> List[float]:
         """Extrae features temporales"""
         try:
-            commence_time = event.get('commence_time')
-            if isinstance(commence_time, str):
-                commence_time = datetime.fromisoformat(commence_time.replace('Z', '+00:00'))
+            commence_time = to_datetime(event_commence_ts(event))
             
             now = datetime.now(timezone.utc)
             
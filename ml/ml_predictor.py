@@ -63,7 +63,8 @@ class MLPredictor:
     
     def predict_probability(self, event: Dict, team_stats: Optional[Dict] = None,
                           injuries: Optional[Dict] = None,
-                          line_movement: Optional[Dict] = None) -> Optional[Dict]:
+                          line_movement: Optional[Dict] = None,
+                          odds_book=None) -> Optional[Dict]:
         """
         Predice probabilidades de victoria para un evento.
         
@@ -72,6 +73,7 @@ class MLPredictor:
             team_stats: Estadísticas de equipos
             injuries: Información de lesiones
             line_movement: Datos de movimiento de línea
+            odds_book: OddsBook del ciclo (opcional, evita re-recorrer las cuotas)
             
         Returns:
             Dict con probabilidades {home, away, draw} o None
@@ -82,7 +84,7 @@ class MLPredictor:
             
             # Extraer features
             features = self.feature_extractor.extract_features(
-                event, team_stats, injuries, line_movement
+                event, team_stats, injuries, line_movement, odds_book=odds_book
             )
             
             if features is None:
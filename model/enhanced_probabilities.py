@@ -7,12 +7,16 @@ Mejoras sobre probabilities.py:
 - Considera lesiones
 - Ajusta por forma reciente
 - Factor de localía con datos reales
+- Datos del slate precargados en bloque por el scanner (model/slate_prefetch.py)
 """
 import math
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta, timezone
 import logging
 
+from model.score_matrix import score_matrix, fit_xg_to_1x2
+from model.slate_prefetch import SlateBundle, set_active_bundle, data_source
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -210,6 +214,16 @@ def adjust_for_h2h(base_prob: float, h2h_matches: List[Dict], team_name: str) ->
         return base_prob
 
 
+def prefetch_slate(events: List[Dict]) -> Optional[SlateBundle]:
+    """
+    Precarga y activa los datos del modelo para `events` (consultas bulk en
+    lugar de ~7 por evento). Los eventos no cubiertos consultan la BD.
+    """
+    bundle = SlateBundle.load(historical_db, events) if historical_db and events else None
+    set_active_bundle(bundle)
+    return bundle
+
+
 def estimate_probabilities_enhanced(event: Dict) -> Dict:
     """
     Versión mejorada de estimate_probabilities con datos reales
@@ -220,6 +234,8 @@ def estimate_probabilities_enhanced(event: Dict) -> Dict:
     Returns:
         Diccionario con probabilidades:
         {'home': float, 'away': float, 'draw': float (si aplica)}
+        'degraded': True si salen del fallback o alguna lectura de la BD falló
+        (model/probability_cache.py no las guarda)
     """
     sport = event.get('sport_key', '')
     home_team = event.get('home_team') or event.get('home')
@@ -229,22 +245,23 @@ def estimate_probabilities_enhanced(event: Dict) -> Dict:
     if not historical_db:
         return _fallback_probabilities(event)
     
+    read_errors = historical_db.read_errors
     try:
         # FÚTBOL
         if sport.startswith('soccer'):
-            return _estimate_football_enhanced(event, home_team, away_team, sport)
+            probs = _estimate_football_enhanced(event, home_team, away_team, sport)
         
         # BALONCESTO
         elif sport.startswith('basketball'):
-            return _estimate_basketball_enhanced(event, home_team, away_team, sport)
+            probs = _estimate_basketball_enhanced(event, home_team, away_team, sport)
         
         # BASEBALL
         elif sport.startswith('baseball'):
-            return _estimate_baseball_enhanced(event, home_team, away_team, sport)
+            probs = _estimate_baseball_enhanced(event, home_team, away_team, sport)
         
         # TENIS
         elif sport.startswith('tennis'):
-            return _estimate_tennis_enhanced(event, home_team, away_team)
+            probs = _estimate_tennis_enhanced(event, home_team, away_team)
         
         # FALLBACK
         else:
@@ -253,17 +270,24 @@ def estimate_probabilities_enhanced(event: Dict) -> Dict:
     except Exception as e:
         logger.error(f"Error in enhanced probabilities: {e}")
         return _fallback_probabilities(event)
+    
+    # Consultas fallidas devuelven []/None: probabilidades con datos por defecto
+    if historical_db.read_errors != read_errors:
+        probs['degraded'] = True
+    return probs
 
 
 def _estimate_football_enhanced(event: Dict, home_team: str, away_team: str, sport: str) -> Dict:
     """Estimación mejorada para fútbol"""
+    db = data_source(historical_db, sport, home_team, away_team)
     
     # 1. Obtener estadísticas de equipos
-    home_stats = historical_db.get_team_stats(home_team, sport)
-    away_stats = historical_db.get_team_stats(away_team, sport)
+    home_stats = db.get_team_stats(home_team, sport)
+    away_stats = db.get_team_stats(away_team, sport)
     
     # 2. Calcular xG basado en stats reales
-    if home_stats and away_stats:
+    has_xg = _has_matches(home_stats) and _has_matches(away_stats)
+    if has_xg:
         home_xg = calculate_xg_from_stats(home_stats, is_home=True)
         away_xg = calculate_xg_from_stats(away_stats, is_home=False)
     else:
@@ -275,26 +299,26 @@ def _estimate_football_enhanced(event: Dict, home_team: str, away_team: str, spo
     p_home, p_draw, p_away = _football_1x2_from_xg(home_xg, away_xg)
     
     # 4. Ajustar por forma reciente
-    recent_home = historical_db.get_recent_matches(home_team, sport, limit=10)
+    recent_home = db.get_recent_matches(home_team, sport, limit=10)
     if recent_home:
         p_home = adjust_for_recent_form(p_home, recent_home, home_team)
     
-    recent_away = historical_db.get_recent_matches(away_team, sport, limit=10)
+    recent_away = db.get_recent_matches(away_team, sport, limit=10)
     if recent_away:
         p_away = adjust_for_recent_form(p_away, recent_away, away_team)
     
     # 5. Ajustar por H2H
-    h2h_matches = historical_db.get_h2h(home_team, away_team, sport, limit=5)
+    h2h_matches = db.get_h2h(home_team, away_team, sport, limit=5)
     if h2h_matches:
         p_home = adjust_for_h2h(p_home, h2h_matches, home_team)
         p_away = adjust_for_h2h(p_away, h2h_matches, away_team)
     
     # 6. Ajustar por lesiones
-    home_injuries = historical_db.get_team_injuries(home_team, sport)
+    home_injuries = db.get_team_injuries(home_team, sport)
     if home_injuries:
         p_home = adjust_for_injuries(p_home, home_injuries, home_team)
     
-    away_injuries = historical_db.get_team_injuries(away_team, sport)
+    away_injuries = db.get_team_injuries(away_team, sport)
     if away_injuries:
         p_away = adjust_for_injuries(p_away, away_injuries, away_team)
     
@@ -305,15 +329,30 @@ def _estimate_football_enhanced(event: Dict, home_team: str, away_team: str, spo
         p_draw /= total
         p_away /= total
     
-    return {'home': p_home, 'draw': p_draw, 'away': p_away}
+    probs = {'home': p_home, 'draw': p_draw, 'away': p_away}
+    # xg solo con stats reales (no el 1.3/1.0 por defecto), reajustado al 1X2 final:
+    # totals/spreads salen de esa matriz de marcadores; sin él, 0.52/0.48 y home/away
+    if has_xg:
+        fitted = fit_xg_to_1x2(p_home, p_away, home_xg, away_xg)
+        if fitted is not None:
+            probs['xg'] = fitted
+    return probs
+
+
+def _has_matches(team_stats: Optional[Dict]) -> bool:
+    """Stats con partidos jugados (si no, calculate_xg_from_stats devuelve el 1.2 por defecto)"""
+    if not team_stats:
+        return False
+    return team_stats.get('wins', 0) + team_stats.get('losses', 0) + team_stats.get('draws', 0) > 0
 
 
 def _estimate_basketball_enhanced(event: Dict, home_team: str, away_team: str, sport: str) -> Dict:
     """Estimación mejorada para baloncesto"""
+    db = data_source(historical_db, sport, home_team, away_team)
     
     # 1. Obtener estadísticas
-    home_stats = historical_db.get_team_stats(home_team, sport)
-    away_stats = historical_db.get_team_stats(away_team, sport)
+    home_stats = db.get_team_stats(home_team, sport)
+    away_stats = db.get_team_stats(away_team, sport)
     
     # 2. Calcular winrate base
     if home_stats and away_stats:
@@ -338,13 +377,13 @@ def _estimate_basketball_enhanced(event: Dict, home_team: str, away_team: str, s
     p_away = 1 - p_home
     
     # 4. Ajustar por forma reciente
-    recent_home = historical_db.get_recent_matches(home_team, sport, limit=10)
+    recent_home = db.get_recent_matches(home_team, sport, limit=10)
     if recent_home:
         p_home = adjust_for_recent_form(p_home, recent_home, home_team)
         p_away = 1 - p_home
     
     # 5. Ajustar por lesiones
-    home_injuries = historical_db.get_team_injuries(home_team, sport)
+    home_injuries = db.get_team_injuries(home_team, sport)
     if home_injuries:
         p_home = adjust_for_injuries(p_home, home_injuries, home_team)
         p_away = 1 - p_home
@@ -362,9 +401,10 @@ def _estimate_tennis_enhanced(event: Dict, player1: str, player2: str) -> Dict:
     """Estimación mejorada para tenis"""
     # Usar forma reciente de ambos jugadores
     sport = event.get('sport_key', 'tennis')
+    db = data_source(historical_db, sport, player1, player2)
     
-    recent_p1 = historical_db.get_recent_matches(player1, sport, limit=10)
-    recent_p2 = historical_db.get_recent_matches(player2, sport, limit=10)
+    recent_p1 = db.get_recent_matches(player1, sport, limit=10)
+    recent_p2 = db.get_recent_matches(player2, sport, limit=10)
     
     # Calcular winrate reciente
     p1_wins = sum(1 for m in recent_p1 if (m.get('home_team') == player1 and m.get('home_score', 0) > m.get('away_score', 0)) or 
@@ -381,35 +421,18 @@ def _estimate_tennis_enhanced(event: Dict, player1: str, player2: str) -> Dict:
 
 
 def _football_1x2_from_xg(home_xg: float, away_xg: float, max_goals: int = 10) -> tuple:
-    """Calcular probabilidades 1X2 con Poisson"""
-    home_probs = [poisson_pmf(k, home_xg) for k in range(0, max_goals + 1)]
-    away_probs = [poisson_pmf(k, away_xg) for k in range(0, max_goals + 1)]
-    
-    p_home = 0.0
-    p_draw = 0.0
-    p_away = 0.0
-    
-    for i, ph in enumerate(home_probs):
-        for j, pa in enumerate(away_probs):
-            prob = ph * pa
-            if i > j:
-                p_home += prob
-            elif i == j:
-                p_draw += prob
-            else:
-                p_away += prob
-    
-    total = p_home + p_draw + p_away
-    if total > 0:
-        return p_home / total, p_draw / total, p_away / total
+    """Calcular probabilidades 1X2 con Poisson (matriz de marcadores cacheada)"""
+    p_home, p_draw, p_away = score_matrix(home_xg, away_xg, max_goals).one_x_two()
+    if p_home + p_draw + p_away > 0:
+        return p_home, p_draw, p_away
     return 0.33, 0.33, 0.33
 
 
 def _fallback_probabilities(event: Dict) -> Dict:
-    """Probabilidades por defecto cuando no hay datos"""
+    """Probabilidades por defecto cuando no hay datos (degradadas: no se cachean)"""
     sport = event.get('sport_key', '')
     
     if 'soccer' in sport:
-        return {'home': 0.45, 'draw': 0.27, 'away': 0.28}
+        return {'home': 0.45, 'draw': 0.27, 'away': 0.28, 'degraded': True}
     else:
-        return {'home': 0.52, 'away': 0.48}
+        return {'home': 0.52, 'away': 0.48, 'degraded': True}
@@ -7,6 +7,8 @@ import math
 from typing import Tuple
 import statistics
 
+from model.score_matrix import score_matrix
+
 # ---------- Football (Poisson model) ----------
 
 def poisson_pmf(k: int, lam: float) -> float:
@@ -16,29 +18,11 @@ def poisson_pmf(k: int, lam: float) -> float:
 def football_1x2_from_xg(home_xg: float, away_xg: float, max_goals: int = 10) -> Tuple[float, float, float]:
     """Estimate 1X2 probabilities using independent Poisson for goals.
 
+    Read from the cached score matrix (model/score_matrix.py), which also
+    prices totals, handicaps and BTTS for the same xG pair.
     Returns (p_home_win, p_draw, p_away_win)
     """
-    # Build distribution of goal counts
-    home_probs = [poisson_pmf(k, home_xg) for k in range(0, max_goals + 1)]
-    away_probs = [poisson_pmf(k, away_xg) for k in range(0, max_goals + 1)]
-
-    p_home = 0.0
-    p_draw = 0.0
-    p_away = 0.0
-    for i, ph in enumerate(home_probs):
-        for j, pa in enumerate(away_probs):
-            prob = ph * pa
-            if i > j:
-                p_home += prob
-            elif i == j:
-                p_draw += prob
-            else:
-                p_away += prob
-    # Normalize (small tail error possible)
-    total = p_home + p_draw + p_away
-    if total == 0:
-        return 0.0, 0.0, 0.0
-    return p_home / total, p_draw / total, p_away / total
+    return score_matrix(home_xg, away_xg, max_goals).one_x_two()
 
 
 # ---------- Tennis (ranking + recent form) ----------
@@ -86,7 +70,7 @@ def estimate_probabilities(event: dict) -> dict:
     """Given a standardized event dict, estimate probabilities for the primary outcomes.
 
     Returns structure with keys depending on sport:
-    - football: {'home': p_home, 'draw': p_draw, 'away': p_away}
+    - football: {'home': p_home, 'draw': p_draw, 'away': p_away} (+ 'xg': (home_xg, away_xg) if given)
     - tennis: {'home': p_home, 'away': p_away}
     - nba/mlb: {'home': p_home, 'away': p_away}
     """
@@ -98,7 +82,12 @@ def estimate_probabilities(event: dict) -> dict:
         hxg = float(extra.get('home_xg', 1.2))
         axg = float(extra.get('away_xg', 1.0))
         p_home, p_draw, p_away = football_1x2_from_xg(hxg, axg)
-        return {'home': p_home, 'draw': p_draw, 'away': p_away}
+        probs = {'home': p_home, 'draw': p_draw, 'away': p_away}
+        # xg only when the event provides it: the scanners price totals/spreads lines
+        # from the same score matrix; the 1.2/1.0 prior keeps the fixed fallbacks
+        if 'home_xg' in extra and 'away_xg' in extra:
+            probs['xg'] = (hxg, axg)
+        return probs
     # Tennis
     if sport.startswith('tennis'):
         extra = event.get('extra', {})
@@ -0,0 +1,139 @@
+"""
+model/probability_cache.py - Memoización de probabilidades del modelo entre ciclos
+
+estimate_probabilities (o la variante mejorada) depende de los equipos, el
+deporte y los inputs en event['extra'] (más stats/lesiones/forma de la BD, que
+se refrescan en daily_initialization). Esos inputs cambian pocas veces al día,
+así que las probabilidades se guardan por:
+
+    (función del modelo, event_id, huella de los inputs del modelo)
+
+y solo se recalculan cuando cambia la huella, tras invalidate() (reinicio
+diario, al refrescar lesiones/stats) o cuando la entrada supera
+PROBABILITY_CACHE_TTL_MINUTES (por defecto el TTL del cache de candidatos: la
+BD del modelo mejorado cambia sin que cambie la huella). LRU de
+PROBABILITY_CACHE_SIZE entradas; 0 desactiva el cache. Las cuotas no forman
+parte de la huella: un cambio de cuotas no obliga a re-estimar.
+
+Los resultados marcados con 'degraded' (fallback del modelo o consultas a la BD
+fallidas) no se guardan: el ciclo siguiente vuelve a estimar.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROBABILITY_CACHE_SIZE = int(os.getenv("PROBABILITY_CACHE_SIZE", "5000"))
+PROBABILITY_CACHE_TTL_MINUTES = float(os.getenv(
+    "PROBABILITY_CACHE_TTL_MINUTES", os.getenv("CANDIDATE_CACHE_TTL_MINUTES", "60")))
+
+
+def model_inputs_key(event: Dict) -> tuple:
+    """Huella de lo que lee el modelo (no las cuotas)"""
+    return (
+        event.get('sport_key', event.get('_sport_key', '')),
+        event.get('home_team') or event.get('home'),
+        event.get('away_team') or event.get('away'),
+        repr(event.get('extra')),
+    )
+
+
+class ProbabilityCache:
+    """(modelo, event_id, huella de inputs) -> (probabilidades, momento del cálculo)"""
+
+    def __init__(self, max_size: int = PROBABILITY_CACHE_SIZE, ttl_minutes: float = PROBABILITY_CACHE_TTL_MINUTES):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_minutes * 60
+        self._entries: 'OrderedDict[tuple, Tuple[Dict, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(event: Dict, model: Callable[[Dict], Dict]) -> tuple:
+        return (getattr(model, '__module__', ''), getattr(model, '__qualname__', repr(model)),
+                event.get('id'), model_inputs_key(event))
+
+    def _fresh(self, key: tuple) -> Optional[Dict]:
+        """Probabilidades de la entrada si no ha caducado (las caducadas se borran)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        return entry[0]
+
+    def contains(self, event: Dict, model: Callable[[Dict], Dict]) -> bool:
+        """Si lookup() acertaría (sin contar acierto ni tocar el orden LRU)"""
+        if self.max_size <= 0:
+            return False
+        with self._lock:
+            return self._fresh(self._key(event, model)) is not None
+
+    def peek(self, event: Dict, model: Callable[[Dict], Dict]) -> Optional[Dict]:
+        """Copia de las probabilidades cacheadas o None (sin contar acierto ni tocar el orden LRU)"""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            probs = self._fresh(self._key(event, model))
+        return dict(probs) if probs is not None else None
+
+    def put(self, event: Dict, model: Callable[[Dict], Dict], probs: Dict):
+        """Guarda probabilidades calculadas fuera de lookup() (p. ej. en un worker de escaneo)"""
+        # Sin resultado o degradado (fallback / BD caída): no fijarlo hasta el TTL
+        if self.max_size <= 0 or not probs or probs.get('degraded'):
+            return
+        key = self._key(event, model)
+        with self._lock:
+            self._entries[key] = (dict(probs), time.monotonic())
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def count(self, hits: int = 0, misses: int = 0):
+        """Suma aciertos/fallos resueltos fuera de lookup()"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def lookup(self, event: Dict, model: Callable[[Dict], Dict]) -> Tuple[Dict, bool]:
+        """(probabilidades, acierto): copia de las cacheadas o model(event) recién calculado"""
+        if self.max_size <= 0:
+            return model(event), False
+        key = self._key(event, model)
+        with self._lock:
+            probs = self._fresh(key)
+            if probs is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(probs), True
+        probs = model(event)
+        self.count(misses=1)
+        self.put(event, model, probs)
+        return probs, False
+
+    def get(self, event: Dict, model: Callable[[Dict], Dict]) -> Dict:
+        return self.lookup(event, model)[0]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def invalidate(self):
+        """Vacía el cache (se refrescaron stats/lesiones del modelo)"""
+        with self._lock:
+            self._entries.clear()
+        logger.info(f"[MODEL] Cache de probabilidades invalidado (hit rate acumulado {self.hit_rate:.0%})")
+
+
+# Instancia global
+probability_cache = ProbabilityCache()
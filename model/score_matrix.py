@@ -0,0 +1,164 @@
+"""
+model/score_matrix.py - Matriz de marcadores Poisson (NumPy) con caché LRU
+
+Para fútbol, goles local ~ Poisson(home_xg) y visitante ~ Poisson(away_xg)
+independientes. La matriz P[i, j] = P(local marca i) * P(visitante marca j) se
+construye una sola vez por par de xG cuantizado (SCORE_MATRIX_XG_STEP) como
+producto exterior de las dos PMF (0..SCORE_MATRIX_MAX_GOALS goles, renormalizada
+sobre la masa truncada) y se reutiliza desde una caché LRU. De la misma matriz
+salen todos los mercados:
+
+    1X2                     one_x_two()
+    over/under a cualquier  total(line)          (2.5, 3, 2.25 ...)
+    hándicap asiático       handicap(line, side)  (-1.5, +0.5, -0.25 ...)
+    ambos marcan            btts()
+
+Líneas enteras: el push (empate exacto con la línea) no cuenta como ganada ni
+perdida. Líneas de cuarto (x.25 / x.75): media de las dos medias líneas.
+
+Si el 1X2 del modelo se ajusta después (forma, H2H, lesiones), fit_xg_to_1x2()
+busca el par de xG cuya matriz reproduce ese 1X2, para que totals y hándicaps
+salgan coherentes con él (AH -0.5 local = p_local).
+
+Ejemplo:
+    m = score_matrix(1.4, 1.1)
+    p_home, p_draw, p_away = m.one_x_two()
+    over, under = m.total(2.5)
+"""
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+SCORE_MATRIX_MAX_GOALS = int(os.getenv("SCORE_MATRIX_MAX_GOALS", "10"))
+SCORE_MATRIX_XG_STEP = float(os.getenv("SCORE_MATRIX_XG_STEP", "0.01"))
+SCORE_MATRIX_CACHE_SIZE = int(os.getenv("SCORE_MATRIX_CACHE_SIZE", "4096"))
+# Error máximo (p_local y p_visitante) aceptado al ajustar xG a un 1X2
+SCORE_MATRIX_FIT_TOL = float(os.getenv("SCORE_MATRIX_FIT_TOL", "0.002"))
+
+
+def poisson_pmf_vector(lam: float, max_goals: int) -> np.ndarray:
+    """PMF de Poisson en 0..max_goals (recurrencia p[k] = p[k-1] * lam / k, sin factoriales)"""
+    pmf = np.empty(max_goals + 1)
+    pmf[0] = np.exp(-lam)
+    if max_goals:
+        pmf[1:] = pmf[0] * np.cumprod(lam / np.arange(1, max_goals + 1))
+    return pmf
+
+
+@lru_cache(maxsize=8)
+def _score_indices(max_goals: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices (i - j + max_goals) e (i + j) de cada celda de la matriz aplanada"""
+    goals = np.arange(max_goals + 1)
+    home, away = np.meshgrid(goals, goals, indexing='ij')
+    return (home - away + max_goals).ravel(), (home + away).ravel()
+
+
+def _is_quarter(line: float) -> bool:
+    return abs((line * 4) % 2 - 1) < 1e-9
+
+
+class ScoreMatrix:
+    """Distribución conjunta de marcadores y sus mercados derivados"""
+
+    __slots__ = ('home_xg', 'away_xg', 'matrix', 'diff', 'totals', 'max_goals')
+
+    def __init__(self, home_xg: float, away_xg: float, max_goals: int = SCORE_MATRIX_MAX_GOALS):
+        self.home_xg = home_xg
+        self.away_xg = away_xg
+        self.max_goals = max_goals
+        matrix = np.outer(poisson_pmf_vector(home_xg, max_goals), poisson_pmf_vector(away_xg, max_goals))
+        total = matrix.sum()
+        if total > 0:
+            matrix /= total
+        self.matrix = matrix
+        # diff[d + max_goals] = P(local - visitante = d); totals[t] = P(goles totales = t)
+        diff_idx, total_idx = _score_indices(max_goals)
+        weights = matrix.ravel()
+        self.diff = np.bincount(diff_idx, weights=weights, minlength=2 * max_goals + 1)
+        self.totals = np.bincount(total_idx, weights=weights, minlength=2 * max_goals + 1)
+
+    def one_x_two(self) -> Tuple[float, float, float]:
+        """(p_local, p_empate, p_visitante)"""
+        m = self.max_goals
+        return float(self.diff[m + 1:].sum()), float(self.diff[m]), float(self.diff[:m].sum())
+
+    def total(self, line: float) -> Tuple[float, float]:
+        """(p_over, p_under) de la línea de goles totales (push excluido)"""
+        if _is_quarter(line):
+            low, high = self.total(line - 0.25), self.total(line + 0.25)
+            return (low[0] + high[0]) / 2, (low[1] + high[1]) / 2
+        goals = np.arange(len(self.totals))
+        return float(self.totals[goals > line].sum()), float(self.totals[goals < line].sum())
+
+    def handicap(self, line: float, side: str = 'home') -> float:
+        """Probabilidad de cubrir el hándicap `line` aplicado a `side` ('home'/'away'; push excluido)"""
+        if _is_quarter(line):
+            return (self.handicap(line - 0.25, side) + self.handicap(line + 0.25, side)) / 2
+        diffs = np.arange(-self.max_goals, self.max_goals + 1)
+        if side == 'home':
+            return float(self.diff[diffs + line > 0].sum())
+        return float(self.diff[diffs < line].sum())
+
+    def btts(self) -> Tuple[float, float]:
+        """(p_ambos_marcan, p_no)"""
+        yes = float(self.matrix[1:, 1:].sum())
+        return yes, float(self.matrix.sum()) - yes
+
+
+@lru_cache(maxsize=SCORE_MATRIX_CACHE_SIZE)
+def _cached_matrix(home_steps: int, away_steps: int, max_goals: int) -> ScoreMatrix:
+    return ScoreMatrix(home_steps * SCORE_MATRIX_XG_STEP, away_steps * SCORE_MATRIX_XG_STEP, max_goals)
+
+
+def score_matrix(home_xg: float, away_xg: float, max_goals: int = SCORE_MATRIX_MAX_GOALS) -> ScoreMatrix:
+    """ScoreMatrix del par de xG cuantizado a SCORE_MATRIX_XG_STEP (compartida vía LRU)"""
+    return _cached_matrix(
+        max(0, round(home_xg / SCORE_MATRIX_XG_STEP)),
+        max(0, round(away_xg / SCORE_MATRIX_XG_STEP)),
+        max_goals,
+    )
+
+
+def fit_xg_to_1x2(p_home: float, p_away: float, home_xg: float, away_xg: float,
+                  max_goals: int = SCORE_MATRIX_MAX_GOALS, iterations: int = 30) -> Optional[Tuple[float, float]]:
+    """
+    Par de xG cuya matriz da (p_home, p_away), partiendo de (home_xg, away_xg).
+
+    Newton amortiguado en log-xG con jacobiano numérico sobre matrices sin
+    cuantizar. None si el 1X2 no es alcanzable por dos Poisson independientes
+    (error > SCORE_MATRIX_FIT_TOL).
+    """
+    target = np.array([p_home, p_away])
+
+    def residual(log_xg: np.ndarray) -> np.ndarray:
+        home, _, away = ScoreMatrix(*np.exp(log_xg), max_goals).one_x_two()
+        return np.array([home, away]) - target
+
+    x = np.log([max(home_xg, 0.05), max(away_xg, 0.05)])
+    r = residual(x)
+    h = 1e-6
+    for _ in range(iterations):
+        if np.abs(r).max() < 1e-9:
+            break
+        jacobian = np.column_stack([(residual(x + h * e) - r) / h for e in np.eye(2)])
+        try:
+            step = np.linalg.solve(jacobian, -r)
+        except np.linalg.LinAlgError:
+            break
+        # Amortiguar: no aceptar pasos que empeoren el error
+        scale = 1.0
+        while scale > 1e-3:
+            candidate = np.clip(x + scale * step, np.log(0.05), np.log(8.0))
+            r_candidate = residual(candidate)
+            if np.abs(r_candidate).max() < np.abs(r).max():
+                x, r = candidate, r_candidate
+                break
+            scale /= 2
+        else:
+            break
+    if np.abs(r).max() > SCORE_MATRIX_FIT_TOL:
+        return None
+    home, away = np.exp(x)
+    return float(home), float(away)
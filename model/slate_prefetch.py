@@ -0,0 +1,119 @@
+"""
+model/slate_prefetch.py - Datos del modelo mejorado precargados para todo el slate
+
+estimate_probabilities_enhanced lee, por evento, stats de los dos equipos, su
+forma reciente, el H2H y las lesiones: ~7 consultas síncronas a Supabase por
+partido. SlateBundle.load() reúne todos los equipos del ciclo y lo carga con
+las consultas bulk de historical_db (un puñado de round trips para un slate de
+100 eventos). El bundle activo expone la misma interfaz de lectura que
+historical_db, así que el modelo solo elige la fuente con data_source():
+
+    set_active_bundle(SlateBundle.load(historical_db, events))
+    db = data_source(historical_db, sport, home, away)   # bundle si cubre el partido
+    db.get_team_stats(home, sport)
+
+Los partidos que el bundle no cubre (eventos fuera del slate precargado) siguen
+consultando historical_db.
+"""
+import logging
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lo que lee el modelo mejorado (get_recent_matches(limit=10), get_h2h(limit=5))
+SLATE_RECENT_LIMIT = 10
+SLATE_H2H_LIMIT = 5
+
+TeamKey = Tuple[str, str]  # (sport_key, equipo)
+
+
+class SlateBundle:
+    """Stats, forma reciente, H2H y lesiones de los equipos del slate, en memoria"""
+
+    def __init__(self, season: str, stats: Dict[TeamKey, Optional[Dict]], recent: Dict[TeamKey, List[Dict]],
+                 h2h: Dict[Tuple[str, FrozenSet[str]], List[Dict]], injuries: Dict[TeamKey, List[Dict]]):
+        self.season = season
+        self.stats = stats
+        self.recent = recent
+        self.h2h = h2h
+        self.injuries = injuries
+
+    @classmethod
+    def load(cls, db, events: List[Dict], season: str = "2024-25") -> Optional['SlateBundle']:
+        """Carga el bundle de `events` con las consultas bulk de `db`; None si no hay equipos o falla"""
+        teams: Set[TeamKey] = set()
+        pairs: Set[Tuple[str, str, str]] = set()
+        for ev in events:
+            sport = ev.get('sport_key', '')
+            home = ev.get('home_team') or ev.get('home')
+            away = ev.get('away_team') or ev.get('away')
+            if not (sport and home and away):
+                continue
+            teams.add((sport, home))
+            teams.add((sport, away))
+            if sport.startswith('soccer'):
+                pairs.add((sport, home, away))
+        if not teams:
+            return None
+
+        stats = db.get_team_stats_bulk(teams, season)
+        recent = db.get_recent_matches_bulk(teams, limit=SLATE_RECENT_LIMIT)
+        h2h = db.get_h2h_bulk(pairs, limit=SLATE_H2H_LIMIT) if pairs else {}
+        injuries = db.get_team_injuries_bulk(teams)
+        if stats is None or recent is None or h2h is None or injuries is None:
+            logger.warning("[MODEL] Precarga del slate fallida, consultas por evento")
+            return None
+        logger.info(f"[MODEL] Slate precargado: {len(teams)} equipos, {len(pairs)} cruces H2H")
+        return cls(season, stats, recent, h2h, injuries)
+
+    def subset(self, events: List[Dict]) -> 'SlateBundle':
+        """Solo los equipos y cruces de `events` (p. ej. un shard del escaneo en procesos)"""
+        teams: Set[TeamKey] = set()
+        for ev in events:
+            sport = ev.get('sport_key', '')
+            teams.add((sport, ev.get('home_team') or ev.get('home')))
+            teams.add((sport, ev.get('away_team') or ev.get('away')))
+        keep = lambda data: {key: value for key, value in data.items() if key in teams}
+        h2h = {key: value for key, value in self.h2h.items()
+               if all((key[0], team) in teams for team in key[1])}
+        return SlateBundle(self.season, keep(self.stats), keep(self.recent), h2h, keep(self.injuries))
+
+    def covers(self, sport_key: str, home: str, away: str) -> bool:
+        return (sport_key, home) in self.stats and (sport_key, away) in self.stats
+
+    # Misma interfaz de lectura que historical_db
+
+    def get_team_stats(self, team_name: str, sport_key: str, season: str = "2024-25") -> Optional[Dict]:
+        if season != self.season:
+            return None
+        return self.stats.get((sport_key, team_name))
+
+    def get_recent_matches(self, team: str, sport_key: str, limit: int = 10) -> List[Dict]:
+        return self.recent.get((sport_key, team), [])[:limit]
+
+    def get_h2h(self, team1: str, team2: str, sport_key: str, limit: int = 10) -> List[Dict]:
+        return self.h2h.get((sport_key, frozenset((team1, team2))), [])[:limit]
+
+    def get_team_injuries(self, team_name: str, sport_key: str) -> List[Dict]:
+        return self.injuries.get((sport_key, team_name), [])
+
+
+# Bundle activo del ciclo (lo cambia el scanner en cada escaneo)
+_active_bundle: Optional[SlateBundle] = None
+
+
+def set_active_bundle(bundle: Optional[SlateBundle]):
+    global _active_bundle
+    _active_bundle = bundle
+
+
+def active_bundle() -> Optional[SlateBundle]:
+    return _active_bundle
+
+
+def data_source(db, sport_key: str, home: str, away: str):
+    """El bundle activo si cubre el partido, si no `db`"""
+    bundle = _active_bundle
+    if bundle is not None and bundle.covers(sport_key, home, away):
+        return bundle
+    return db
@@ -0,0 +1,126 @@
+"""
+scanner/candidate_cache.py - Cache de candidatos por evento entre ciclos
+
+Guarda los candidatos que produjo cada evento junto con su huella de contenido
+(event['_fingerprint'] de data/fingerprint.py + inputs del modelo en 'extra').
+En el ciclo siguiente solo se re-escanean los eventos cuya huella cambió; para
+el resto se re-aplica únicamente la ventana de tiempo (24h / no en vivo).
+
+Cada entrada guarda también lo que el evento sumó a los contadores de descarte
+y al desglose por deporte (ScanReport.events), y lookup() lo devuelve para que
+un acierto cuente en el ScanReport igual que un escaneo completo.
+
+Las entradas caducan a los CANDIDATE_CACHE_TTL_MINUTES (el modelo mejorado
+consulta datos externos que pueden cambiar sin que cambien las cuotas) y se
+invalidan por completo con invalidate() (reinicio diario).
+"""
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from data.event_schema import event_commence_ts
+from data.fingerprint import event_fingerprint
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_CACHE_TTL_MINUTES = float(os.getenv("CANDIDATE_CACHE_TTL_MINUTES", "60"))
+
+
+class CandidateCache:
+    """event_id -> (huella, commence_ts, candidatos, momento del escaneo, aporte al ScanReport)"""
+
+    def __init__(self, ttl_minutes: float = CANDIDATE_CACHE_TTL_MINUTES):
+        self.ttl_seconds = ttl_minutes * 60
+        self._entries: Dict[str, Tuple[tuple, float, List[Dict], float, Optional[Dict]]] = {}
+        self.last_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'size': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def event_key(event: Dict) -> tuple:
+        """Huella de cuotas/metadatos + inputs del modelo básico"""
+        fp = event.get('_fingerprint')
+        if fp is None:
+            fp = event_fingerprint(event)
+        return fp, repr(event.get('extra'))
+
+    def lookup(self, events: List[Dict], now_ts: float,
+               max_ts: float) -> Tuple[List[Dict], Dict[str, List[Dict]], Dict[str, Dict], int]:
+        """
+        Separa los eventos del ciclo en aciertos y fallos de cache.
+
+        Returns:
+            (eventos a escanear, event_id -> copias de candidatos cacheados,
+             event_id -> aporte guardado a contadores/deportes (ScanReport.replay_event),
+             eventos descartados por la ventana de tiempo)
+        """
+        clock = time.monotonic()
+        to_scan, cached, counts = [], {}, {}
+        hits = out_of_window = expired = 0
+
+        # Eventos ya empezados: fuera del cache
+        for event_id in [k for k, entry in self._entries.items() if entry[1] <= now_ts]:
+            del self._entries[event_id]
+
+        for ev in events:
+            # Ventana de tiempo primero: fuera de ella no hay nada que escanear ni cachear
+            commence_ts = event_commence_ts(ev)
+            if commence_ts is not None and not (now_ts < commence_ts <= max_ts):
+                out_of_window += 1
+                continue
+            entry = self._entries.get(ev.get('id'))
+            if entry is not None and clock - entry[3] > self.ttl_seconds:
+                expired += 1
+                entry = None
+            if entry is None or entry[0] != self.event_key(ev):
+                to_scan.append(ev)
+                continue
+            hits += 1
+            # Copias: las etapas siguientes (line movement, EV) modifican los dicts
+            cached[ev['id']] = [dict(c) for c in entry[2]]
+            if entry[4] is not None:
+                counts[ev['id']] = entry[4]
+
+        self.last_stats = {'hits': hits, 'misses': len(to_scan), 'expired': expired, 'size': len(self._entries)}
+        return to_scan, cached, counts, out_of_window
+
+    def store(self, scanned: List[Dict], candidates: List[Dict], now_ts: float, max_ts: float,
+              event_counts: Optional[Dict[str, Dict]] = None):
+        """
+        Guarda los candidatos de los eventos escaneados (incluidos los que no dieron
+        ninguno) y, si se pasa, el aporte de cada uno al ScanReport (ScanReport.events)
+        """
+        event_counts = event_counts or {}
+        by_event: Dict[str, List[Dict]] = {}
+        for c in candidates:
+            by_event.setdefault(c['id'], []).append(c)
+        clock = time.monotonic()
+        for ev in scanned:
+            event_id = ev.get('id')
+            commence_ts = event_commence_ts(ev)
+            # Solo eventos que el scanner evaluó: fuera de la ventana no hay nada que cachear
+            if not event_id or commence_ts is None or not (now_ts < commence_ts <= max_ts):
+                continue
+            self._entries[event_id] = (
+                self.event_key(ev), commence_ts, [dict(c) for c in by_event.get(event_id, ())], clock,
+                event_counts.get(event_id)
+            )
+        self.last_stats['size'] = len(self._entries)
+
+    def invalidate(self):
+        """Vacía el cache (cambió el modelo o sus datos)"""
+        self._entries.clear()
+
+    @staticmethod
+    def merge(events: List[Dict], scanned: List[Dict], cached: Dict[str, List[Dict]]) -> List[Dict]:
+        """Candidatos escaneados + cacheados en el orden de `events` (como un escaneo completo)"""
+        by_event: Dict[str, List[Dict]] = {}
+        for c in scanned:
+            by_event.setdefault(c['id'], []).append(c)
+        by_event.update(cached)
+        results = []
+        for ev in events:
+            results.extend(by_event.pop(ev.get('id'), ()))
+        return results
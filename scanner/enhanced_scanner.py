@@ -5,40 +5,105 @@ Combina value betting tradicional con detección de steam moves y RLM
 para identificar las mejores oportunidades.
 """
 import logging
-from typing import List, Dict
+import os
+from bisect import bisect_left, bisect_right
+from typing import Callable, List, Dict, Optional, Tuple
 from scanner.scanner import ValueScanner
 from analytics.line_movement import line_tracker
+from data.odds_book import OddsBook
+from utils.top_k import TopKSelector
 
 logger = logging.getLogger(__name__)
 
 
+# Reemplazo de cuotas altas: por encima de ALT_ODDS_TRIGGER se busca en el mismo
+# partido y mercado una alternativa dentro de ALT_ODDS_RANGE, elegida por value
+# (cuota × prob) o por EV (expected_value, o prob × cuota - 1)
+ALT_ODDS_TRIGGER = float(os.getenv("ALT_ODDS_TRIGGER", "2.1"))
+ALT_ODDS_RANGE = os.getenv("ALT_ODDS_RANGE", "1.7-1.9")
+ALT_ODDS_PICK = os.getenv("ALT_ODDS_PICK", "value").lower()
+
+ALT_PICK_SCORES = {
+    'value': lambda c: c.get('value', 0),
+    'ev': lambda c: c['expected_value'] if 'expected_value' in c else c.get('prob', 0) * c.get('odds', 0) - 1,
+}
+
+
+def parse_odds_range(spec: str) -> Tuple[float, float]:
+    """'1.7-1.9' -> (1.7, 1.9)"""
+    try:
+        low, high = (float(x) for x in spec.split('-'))
+    except ValueError:
+        raise ValueError(f"Rango de cuotas inválido: '{spec}' (formato min-max)")
+    if low > high:
+        raise ValueError(f"Rango de cuotas inválido: '{spec}' (min > max)")
+    return low, high
+
+
+class AlternativeOddsIndex:
+    """
+    Candidatos indexados una vez por (evento, mercado), ordenados por cuota:
+    buscar alternativas en un rango es un bisect + recorrer solo ese tramo
+    """
+
+    def __init__(self, candidates: List[Dict]):
+        groups: Dict[Tuple, List[Tuple]] = {}
+        for position, c in enumerate(candidates):
+            groups.setdefault((c.get('id'), c.get('market_key')), []).append((c.get('odds', 0), position, c))
+        self._odds: Dict[Tuple, List[float]] = {}
+        self._items: Dict[Tuple, List[Tuple]] = {}
+        for key, items in groups.items():
+            items.sort(key=lambda item: (item[0], item[1]))
+            self._odds[key] = [item[0] for item in items]
+            self._items[key] = items
+
+    def best_in_range(self, event_id, market_key: str, low: float, high: float,
+                      score: Callable[[Dict], float]) -> Optional[Dict]:
+        """Mejor candidato por `score` con low <= cuota <= high (empates: el primero de la lista)"""
+        key = (event_id, market_key)
+        odds = self._odds.get(key)
+        if not odds:
+            return None
+        items = self._items[key][bisect_left(odds, low):bisect_right(odds, high)]
+        if not items:
+            return None
+        return max(items, key=lambda item: (score(item[2]), -item[1]))[2]
+
+
 class EnhancedValueScanner(ValueScanner):
-        def adjust_candidate_odds(self, candidate: Dict, all_candidates: List[Dict]) -> Dict:
-            """
-            Si la cuota es >2.1, busca en el mismo partido y mercado una alternativa entre 1.7 y 1.9.
-            Si la encuentra, retorna esa alternativa; si no, retorna el original.
-            """
-            odds = candidate.get('odds', 0)
-            if odds <= 2.1:
-                return candidate
-            # Buscar alternativas en el mismo partido y mercado
-            event_id = candidate.get('id')
-            market_key = candidate.get('market_key')
-            # Buscar en all_candidates (ya escaneados)
-            alternatives = [c for c in all_candidates
-                            if c.get('id') == event_id and c.get('market_key') == market_key
-                            and 1.7 <= c.get('odds', 0) <= 1.9]
-            if alternatives:
-                # Elegir la de mayor valor
-                return max(alternatives, key=lambda x: x.get('value', 0))
-            return candidate
     """Scanner de value bets mejorado con análisis de movimiento de líneas"""
+
+    def adjust_candidate_odds(self, candidate: Dict, all_candidates: List[Dict],
+                              index: Optional[AlternativeOddsIndex] = None) -> Dict:
+        """
+        Si la cuota es > alt_trigger, busca en el mismo partido y mercado una
+        alternativa dentro de alt_range (por defecto 1.7-1.9) y retorna la mejor
+        según alt_pick (value o ev); si no la encuentra, retorna el original.
+
+        index: AlternativeOddsIndex de all_candidates (se construye si no se pasa)
+        """
+        odds = candidate.get('odds', 0)
+        if odds <= self.alt_trigger:
+            return candidate
+        if index is None:
+            index = AlternativeOddsIndex(all_candidates)
+        low, high = self.alt_range
+        alternative = index.best_in_range(
+            candidate.get('id'), candidate.get('market_key'), low, high, ALT_PICK_SCORES[self.alt_pick]
+        )
+        return alternative if alternative is not None else candidate
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, alt_trigger: float = ALT_ODDS_TRIGGER, alt_range=ALT_ODDS_RANGE,
+                 alt_pick: str = ALT_ODDS_PICK, **kwargs):
         super().__init__(*args, **kwargs)
         self.line_tracker = line_tracker
+        self.alt_trigger = alt_trigger
+        self.alt_range = parse_odds_range(alt_range) if isinstance(alt_range, str) else tuple(alt_range)
+        if alt_pick not in ALT_PICK_SCORES:
+            raise ValueError(f"ALT_ODDS_PICK inválido: '{alt_pick}' (opciones: {', '.join(ALT_PICK_SCORES)})")
+        self.alt_pick = alt_pick
     
-    def find_value_bets_with_movement(self, events: List[Dict]) -> List[Dict]:
+    def find_value_bets_with_movement(self, events: List[Dict], book: Optional[OddsBook] = None) -> List[Dict]:
         """
         Encuentra value bets considerando movimiento de líneas.
         
@@ -47,23 +112,31 @@ class EnhancedValueScanner(ValueScanner):
         - Mejora en cuotas (RLM - sharp action)
         - Steam moves indicando acción profesional
         
+        Args:
+            events: Eventos a escanear
+            book: OddsBook compartido del ciclo (opcional)
+        
         Returns:
             Lista de value bets con información de line movement
         """
         try:
             # Obtener candidatos base usando scanner tradicional
-            candidates = self.find_value_bets(events)
+            candidates = self.find_value_bets(events, book=book)
             
             if not candidates:
                 return []
             
             # Enriquecer con información de line movement y ajustar cuotas si es necesario
+            # Movimiento, timing y steam de todo el ciclo en una pasada por evento
+            movements = self.line_tracker.get_movement_batch(
+                (c.get('id'), c.get('selection')) for c in candidates
+            )
+            alternatives = AlternativeOddsIndex(candidates)
             enhanced_candidates = []
             for candidate in candidates:
-                event_id = candidate.get('id')
-                selection = candidate.get('selection')
+                batch = movements[(candidate.get('id'), candidate.get('selection'))]
                 # Obtener movimiento de línea
-                movement = self.line_tracker.get_line_movement_summary(event_id, selection)
+                movement = batch['summary']
                 if movement:
                     candidate['line_movement'] = {
                         'opening_odds': movement['opening_odds'],
@@ -75,12 +148,8 @@ class EnhancedValueScanner(ValueScanner):
                     confidence_score = self._calculate_confidence(candidate, movement)
                     candidate['confidence_score'] = confidence_score
                     candidate['confidence_level'] = self._confidence_level(confidence_score)
-                    timing = self.line_tracker.get_best_odds_timing(event_id, selection)
-                    candidate['timing_recommendation'] = timing.get('recommendation', 'unknown')
-                    steam_moves = self.line_tracker.detect_steam_moves(event_id)
-                    candidate['has_steam_move'] = any(
-                        sm['selection'] == selection for sm in steam_moves
-                    )
+                    candidate['timing_recommendation'] = batch['timing'].get('recommendation', 'unknown')
+                    candidate['has_steam_move'] = batch['has_steam_move']
                 else:
                     candidate['line_movement'] = None
                     candidate['confidence_score'] = 50
@@ -88,16 +157,18 @@ class EnhancedValueScanner(ValueScanner):
                     candidate['timing_recommendation'] = 'insufficient_data'
                     candidate['has_steam_move'] = False
                 # Ajustar cuota si corresponde
-                adjusted = self.adjust_candidate_odds(candidate, candidates)
+                adjusted = self.adjust_candidate_odds(candidate, candidates, index=alternatives)
                 enhanced_candidates.append(adjusted)
-            enhanced_candidates.sort(key=lambda x: x.get('confidence_score', 0), reverse=True)
+            enhanced_candidates = TopKSelector(
+                self.top_k, score=lambda x: x.get('confidence_score', 0)
+            ).extend(enhanced_candidates).results()
             logger.info(f"Enhanced scan: {len(enhanced_candidates)} candidates with movement analysis")
             return enhanced_candidates
             
         except Exception as e:
             logger.error(f"Error in enhanced scanning: {e}")
             # Fallback a scanner tradicional
-            return self.find_value_bets(events)
+            return self.find_value_bets(events, book=book)
     
     def _calculate_confidence(self, candidate: Dict, movement: Dict) -> float:
         """
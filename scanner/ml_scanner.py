@@ -87,13 +87,15 @@ class MLValueScanner(EnhancedValueScanner):
                     candidates.extend(value_ops)
             
             # Enriquecer con line movement (del scanner padre)
+            movements = self.line_tracker.get_movement_batch(
+                (c.get('id'), c.get('selection')) for c in candidates
+            )
             enriched = []
             for candidate in candidates:
-                event_id = candidate.get('id')
-                selection = candidate.get('selection')
+                batch = movements[(candidate.get('id'), candidate.get('selection'))]
                 
                 # Obtener movimiento de línea
-                movement = self.line_tracker.get_line_movement_summary(event_id, selection)
+                movement = batch['summary']
                 
                 if movement:
                     candidate['line_movement'] = {
@@ -111,11 +113,8 @@ class MLValueScanner(EnhancedValueScanner):
                 candidate['confidence_score'] = confidence_score
                 candidate['confidence_level'] = self._confidence_level(confidence_score)
                 
-                # Detectar steam moves
-                steam_moves = self.line_tracker.detect_steam_moves(event_id)
-                candidate['has_steam_move'] = any(
-                    sm['selection'] == selection for sm in steam_moves
-                )
+                # Steam moves (detectados una vez por evento en el batch)
+                candidate['has_steam_move'] = batch['has_steam_move']
                 
                 enriched.append(candidate)
             
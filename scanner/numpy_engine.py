@@ -0,0 +1,147 @@
+"""
+scanner/numpy_engine.py - Motor de escaneo vectorizado (SCAN_ENGINE=numpy)
+
+Usa las columnas del OddsBook del ciclo (OddsBook.as_numpy(), sin copia) y
+aplica los filtros de ValueScanner como máscaras sobre todos los outcomes a la vez:
+
+1. Por evento (Python, una vez): ventana de 24h, threshold del deporte y
+   probabilidades del modelo (ValueScanner._prepare_event)
+2. Por fila (numpy): mercado escaneado, nombre y price válidos, rango de cuotas
+3. Probabilidad: se resuelve una vez por (evento, mercado, nombre, point) único con
+   ValueScanner.outcome_probability y se expande a las filas (varias casas
+   cotizan el mismo outcome)
+4. Por fila (numpy): min_prob y value >= threshold
+
+Solo las filas que pasan se materializan como dicts, en el mismo orden y con
+los mismos contadores de descarte que el motor python.
+"""
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from data.odds_book import OddsBook
+from scanner.scan_report import ScanReport
+
+logger = logging.getLogger(__name__)
+
+
+def _track_rows(report: ScanReport, event_ids: Dict[int, str], key: str, event_rows, n_events: int):
+    """Reparte por evento (ScanReport.events) una cuenta vectorizada de filas"""
+    if report.events is None:
+        return
+    for pos, count in enumerate(np.bincount(event_rows, minlength=n_events).tolist()):
+        if count:
+            report.add_event_count(event_ids.get(pos), key, count)
+
+
+def scan_numpy(scanner, events: List[Dict], book: OddsBook, now_ts: float, max_ts: float,
+               report: ScanReport) -> List[Dict]:
+    """Equivalente vectorizado de ValueScanner._scan_python (descartes y tiempos en `report`)"""
+    from scanner.scanner import SCANNED_MARKETS
+
+    discarded = report.counters
+
+    # 1. Filtros por evento
+    n_events = book.event_count
+    ev_order = np.full(n_events, -1, dtype=np.int64)   # posición en `events` (-1: descartado)
+    ev_threshold = np.zeros(n_events, dtype=np.float64)
+    prepared = {}
+    event_ids = {}   # posición en el libro -> id (aporte por evento en report.events)
+    for i, ev in enumerate(events):
+        before = report.snapshot_counters()
+        info = scanner._prepare_event(ev, now_ts, max_ts, report)
+        report.track_event(ev.get('id'), before, info.sport_key if info else None)
+        if info is None:
+            continue
+        pos = book.locate(ev)
+        ev_order[pos] = i
+        ev_threshold[pos] = info.threshold
+        prepared[pos] = info
+        event_ids[pos] = ev.get('id')
+
+    if not prepared or not len(book):
+        return []
+
+    # 2. Máscaras por fila
+    loop_start = time.perf_counter()
+    cols = book.as_numpy()
+    event_idx = cols['event_idx']
+    market_idx = cols['market_idx']
+    price = cols['price']
+
+    scanned = np.array([m in SCANNED_MARKETS for m in book.markets], dtype=bool)
+    rows = (ev_order[event_idx] >= 0) & scanned[market_idx]
+    discarded['total_checked'] += int(rows.sum())
+    for pos, count in enumerate(np.bincount(event_idx[rows], minlength=n_events).tolist()):
+        if count:
+            report.sport(prepared[pos].sport_key)['outcomes'] += count
+    _track_rows(report, event_ids, 'total_checked', event_idx[rows], n_events)
+
+    # Nombre solo de espacios ('' pasa como 'Sin nombre', igual que el motor python)
+    blank_names = np.array([bool(n) and not n.strip() for n in book.names], dtype=bool)
+    no_name = blank_names[cols['name_idx']]
+    no_price = np.isnan(price)
+    missing = rows & (no_name | no_price)
+    for r in np.flatnonzero(missing).tolist():
+        if no_name[r]:
+            logger.warning(f"[SCANNER] Outcome sin nombre en evento {book.event_ids[event_idx[r]]}")
+        else:
+            logger.warning(f"[SCANNER] Outcome sin price válido en evento {book.event_ids[event_idx[r]]}")
+    discarded['missing_fields'] += int(missing.sum())
+    _track_rows(report, event_ids, 'missing_fields', event_idx[missing], n_events)
+
+    rows &= ~missing
+    in_range = (price >= scanner.min_odd) & (price <= scanner.max_odd)
+    discarded['odds_range'] += int((rows & ~in_range).sum())
+    _track_rows(report, event_ids, 'odds_range', event_idx[rows & ~in_range], n_events)
+    cand = np.flatnonzero(rows & in_range)
+    if not len(cand):
+        report.add_time('outcome_loop', time.perf_counter() - loop_start)
+        return []
+
+    # 3. Probabilidad por (evento, mercado, nombre, point) único
+    n_markets = len(book.markets)
+    n_names = len(book.names)
+    points, point_ids = np.unique(np.nan_to_num(cols['point'][cand], nan=np.inf), return_inverse=True)
+    n_points = len(points)
+    keys = ((event_idx[cand].astype(np.int64) * n_markets + market_idx[cand]) * n_names
+            + cols['name_idx'][cand]) * n_points + point_ids.reshape(-1)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    unique_prob = np.empty(len(unique_keys), dtype=np.float64)
+    for k, key in enumerate(unique_keys.tolist()):
+        rest, p = divmod(key, n_points)
+        rest, n = divmod(rest, n_names)
+        pos, m = divmod(rest, n_markets)
+        info = prepared[pos]
+        market_key = book.markets[m]
+        point = float(points[p]) if np.isfinite(points[p]) else None
+        prob = scanner.outcome_probability(market_key, info.sides.side(market_key, book.names[n]), info.probs, point)
+        unique_prob[k] = prob if prob else np.nan  # None/0 → descartado por probabilidad
+    prob = unique_prob[inverse]
+
+    # 4. min_prob y threshold (NaN nunca pasa las comparaciones)
+    prob_ok = prob >= scanner.min_prob
+    discarded['probability'] += int((~prob_ok).sum())
+    _track_rows(report, event_ids, 'probability', event_idx[cand[~prob_ok]], n_events)
+    value = price[cand] * prob
+    keep = prob_ok & (value >= ev_threshold[event_idx[cand]])
+    hits, hit_prob = cand[keep], prob[keep]
+
+    # Mismo orden que el motor python: orden de `events`, luego fila del libro
+    order = np.lexsort((hits, ev_order[event_idx[hits]]))
+    analysis_start = time.perf_counter()
+    report.add_time('outcome_loop', analysis_start - loop_start)
+
+    results = []
+    for r, prob_est in zip(hits[order].tolist(), hit_prob[order].tolist()):
+        pos = book.event_idx[r]
+        market_key = book.markets[book.market_idx[r]]
+        sel = book.names[book.name_idx[r]] or 'Sin nombre'
+        odd = book.price[r]
+        results.append(scanner._make_candidate(
+            book.events[pos], book, r, prepared[pos], market_key, sel, odd, prob_est, odd * prob_est
+        ))
+    report.add_time('analysis', time.perf_counter() - analysis_start)
+    return results
@@ -0,0 +1,174 @@
+"""
+scanner/parallel.py - Escaneo en paralelo por procesos, particionado por deporte
+
+Con SCAN_WORKERS > 1 los scanners reparten los eventos del ciclo en shards por
+sport_key (los deportes muy grandes se parten en trozos para equilibrar) y los
+escanean en un ProcessPoolExecutor. Cada shard viaja como OddsBook.to_payload():
+arrays tipados en bytes + tablas internadas + eventos sin bookmakers, en lugar
+de los dicts anidados de la API.
+
+Los resultados se fusionan en el orden de `events` y los informes de cada shard
+(descartes, tiempos, desglose por deporte) se suman en el ScanReport del escaneo,
+así que la salida es la misma que la del escaneo en un solo proceso.
+Los workers usan la misma función de probabilidades que scanner.scanner tenga
+asignada al enviar el trabajo (se pasa como 'modulo:nombre') y, de cada shard,
+solo su parte del slate precargado del modelo mejorado (model/slate_prefetch.py).
+El cache de probabilidades es el del proceso principal: cada shard recibe las
+probabilidades ya cacheadas de sus eventos, devuelve las que calculó y con
+ellas se alimenta el cache principal (los aciertos/fallos del informe son
+los de ese cache).
+"""
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from analyzer import LazyAnalysis
+from data.odds_book import OddsBook
+from model.probability_cache import ProbabilityCache, probability_cache
+from model.slate_prefetch import active_bundle, set_active_bundle
+from scanner.scan_report import ScanReport
+
+logger = logging.getLogger(__name__)
+
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))
+# Por debajo de este número de eventos no compensa el coste de enviar shards
+SCAN_PARALLEL_MIN_EVENTS = int(os.getenv("SCAN_PARALLEL_MIN_EVENTS", "200"))
+
+
+def shard_by_sport(events: List[Dict], workers: int) -> List[List[int]]:
+    """
+    Índices de `events` agrupados por sport_key (orden de aparición); los grupos
+    mayores que len(events)/workers se parten en trozos de ese tamaño
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, ev in enumerate(events):
+        groups.setdefault(ev.get('sport_key', ev.get('_sport_key', '')), []).append(i)
+    target = max(1, math.ceil(len(events) / max(1, workers)))
+    shards = []
+    for indices in groups.values():
+        for start in range(0, len(indices), target):
+            shards.append(indices[start:start + target])
+    return shards
+
+
+def _scan_shard(payload: Dict, config: Dict, slate, cached: Dict[str, Dict],
+                now_ts: float, max_ts: float) -> Tuple[List[Dict], Dict, Dict[str, Dict]]:
+    """
+    Worker: reconstruye el shard y lo escanea con el motor configurado.
+
+    cached: event_id -> probabilidades ya cacheadas en el proceso principal.
+    Devuelve también las probabilidades calculadas aquí (event_id -> probs).
+    """
+    import scanner.scanner as value_scanner
+
+    module, name = config['model'].split(':')
+    model = getattr(importlib.import_module(module), name)
+    value_scanner.estimate_probabilities = model
+    set_active_bundle(slate)
+
+    book = OddsBook.from_payload(payload)
+    # Cache del shard sembrado con el del proceso principal (nada persiste en el worker)
+    shard_cache = value_scanner.probability_cache = ProbabilityCache(config['probability_cache_size'])
+    for ev in book.events:
+        if ev.get('id') in cached:
+            shard_cache.put(ev, model, cached[ev['id']])
+    scanner = value_scanner.ValueScanner(tiers=config['tiers'], engine=config['engine'], cache=False, workers=0)
+    report = ScanReport(scanner.engine, track_events=config['track_events'])
+    if scanner.engine == 'numpy':
+        results = value_scanner.scan_numpy(scanner, book.events, book, now_ts, max_ts, report)
+    else:
+        results = scanner._scan_python(book.events, book, now_ts, max_ts, report)
+    for c in results:
+        c['analysis'] = None  # se re-crea en el proceso principal sobre el evento completo
+    computed = {}
+    for ev in book.events:
+        if ev.get('id') not in cached:
+            probs = shard_cache.peek(ev, model)
+            if probs is not None:
+                computed[ev['id']] = probs
+    return results, report.as_dict(), computed
+
+
+class ShardedScanExecutor:
+    """Pool de procesos (creado al primer uso) que escanea shards por deporte"""
+
+    def __init__(self, workers: int = SCAN_WORKERS, min_events: int = SCAN_PARALLEL_MIN_EVENTS):
+        self.workers = workers
+        self.min_events = min_events
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: el proceso principal tiene hilos (event loop, aiohttp), fork no es seguro
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"[SCANNER] Pool de escaneo iniciado con {self.workers} procesos")
+        return self._pool
+
+    def scan(self, scanner, events: List[Dict], book: OddsBook, now_ts: float,
+             max_ts: float, report: ScanReport) -> Optional[List[Dict]]:
+        """
+        Escanea `events` en paralelo, sumando los informes de los shards en `report`.
+
+        Returns:
+            Resultados como ValueScanner._scan_python, o None si el lote es
+            demasiado pequeño / de un solo shard (escanear en proceso)
+        """
+        if len(events) < self.min_events:
+            return None
+        shards = shard_by_sport(events, self.workers)
+        if len(shards) < 2:
+            return None
+
+        import scanner.scanner as value_scanner
+        model = value_scanner.estimate_probabilities
+        config = {
+            'model': f"{model.__module__}:{model.__name__}",
+            'tiers': list(scanner.tiers),
+            'engine': scanner.engine,
+            'probability_cache_size': probability_cache.max_size,
+            'track_events': report.events is not None,
+        }
+        slate = active_bundle()
+        pool = self._get_pool()
+        futures = []
+        for shard in shards:
+            shard_events = [events[i] for i in shard]
+            cached = {}
+            for ev in shard_events:
+                probs = probability_cache.peek(ev, model)
+                if probs is not None:
+                    cached[ev.get('id')] = probs
+            futures.append(pool.submit(
+                _scan_shard, book.subset(book.locate(ev) for ev in shard_events).to_payload(), config,
+                slate.subset(shard_events) if slate is not None else None, cached, now_ts, max_ts,
+            ))
+
+        tagged = []
+        for shard, future in zip(shards, futures):
+            results, shard_report, computed = future.result()
+            report.merge(shard_report)
+            position = {events[i].get('id'): i for i in shard}
+            for event_id, probs in computed.items():
+                probability_cache.put(events[position[event_id]], model, probs)
+            shard_cache = shard_report['probability_cache']
+            probability_cache.count(shard_cache['hits'], shard_cache['misses'])
+            for c in results:
+                i = position[c['id']]
+                c['analysis'] = LazyAnalysis(events[i], c['selection'], c['odds'], c['prob'])
+                tagged.append((i, c))
+
+        # Orden determinista: el de `events` (sort estable: dentro del evento, el del libro)
+        tagged.sort(key=lambda item: item[0])
+        logger.info(f"[SCANNER] {len(events)} eventos escaneados en {len(shards)} shards ({self.workers} procesos)")
+        return [c for _, c in tagged]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,138 @@
+"""
+scanner/scan_report.py - Informe estructurado de un escaneo (explain/profile)
+
+ValueScanner.scan_with_report() devuelve, junto a los candidatos, un ScanReport con:
+
+- counters: contadores de descarte por motivo (odds_range, probability, ...)
+- timings: segundos por etapa (prefetch, time_filter, probabilities,
+  outcome_loop, analysis, cache, dedupe y total)
+- sports: por sport_key, eventos escaneados, outcomes revisados y candidatos
+- probability_cache: aciertos/fallos del cache de probabilidades del modelo
+- events (con track_events): lo que aportó cada evento a counters/sports, para
+  que el CandidateCache lo re-sume cuando sirve ese evento sin escanearlo
+
+export() lo vuelca en el registro de métricas (utils/metrics.py) para ver qué
+etapa domina cada ciclo y seguir regresiones. Con escaneo en procesos los
+tiempos de los shards se suman (tiempo de CPU agregado, no de pared).
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from utils.metrics import MetricsRegistry, metrics
+
+SCAN_STAGES = ('prefetch', 'time_filter', 'probabilities', 'outcome_loop', 'analysis', 'cache', 'dedupe')
+
+
+def new_discard_counters() -> Dict[str, int]:
+    return {'odds_range': 0, 'probability': 0, 'time_range': 0, 'no_threshold': 0, 'total_checked': 0, 'missing_fields': 0}
+
+
+class ScanReport:
+    """Contadores, tiempos por etapa y desglose por deporte de un escaneo"""
+
+    def __init__(self, engine: str = '', track_events: bool = False):
+        self.engine = engine
+        self.counters = new_discard_counters()
+        self.timings: Dict[str, float] = {stage: 0.0 for stage in SCAN_STAGES}
+        self.sports: Dict[str, Dict[str, int]] = {}
+        self.probability_cache = {'hits': 0, 'misses': 0}
+        self.candidates = 0
+        # event_id -> {'counters': {...}, 'sport': sport_key o None}
+        self.events: Optional[Dict[str, Dict]] = {} if track_events else None
+
+    def add_time(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def sport(self, sport_key: str) -> Dict[str, int]:
+        entry = self.sports.get(sport_key)
+        if entry is None:
+            entry = self.sports[sport_key] = {'events': 0, 'outcomes': 0, 'candidates': 0}
+        return entry
+
+    # ==================== POR EVENTO ====================
+
+    def snapshot_counters(self) -> Optional[Dict[str, int]]:
+        """Copia de los contadores antes de escanear un evento (None si no se siguen eventos)"""
+        return dict(self.counters) if self.events is not None else None
+
+    def track_event(self, event_id: Optional[str], before: Optional[Dict[str, int]], sport_key: Optional[str]):
+        """Guarda lo que sumó el evento a los contadores desde `before` (y su deporte si pasó los filtros)"""
+        if before is None or not event_id:
+            return
+        self.events[event_id] = {
+            'counters': {k: v - before.get(k, 0) for k, v in self.counters.items() if v != before.get(k, 0)},
+            'sport': sport_key,
+        }
+
+    def add_event_count(self, event_id: Optional[str], key: str, count: int):
+        """Suma al aporte de un evento ya seguido (motor numpy: cuentas vectorizadas)"""
+        if self.events is None or event_id not in self.events:
+            return
+        counters = self.events[event_id]['counters']
+        counters[key] = counters.get(key, 0) + count
+
+    def replay_event(self, delta: Dict):
+        """Re-suma el aporte guardado de un evento servido desde cache"""
+        for key, value in delta['counters'].items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        if delta['sport'] is not None:
+            entry = self.sport(delta['sport'])
+            entry['events'] += 1
+            entry['outcomes'] += delta['counters'].get('total_checked', 0)
+
+    def merge(self, other: Dict):
+        """Suma un informe serializado (as_dict) de un shard"""
+        for key, value in other['counters'].items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for stage, seconds in other['timings'].items():
+            self.add_time(stage, seconds)
+        for sport_key, counts in other['sports'].items():
+            entry = self.sport(sport_key)
+            for key, value in counts.items():
+                entry[key] += value
+        for key, value in other.get('probability_cache', {}).items():
+            self.probability_cache[key] += value
+        if self.events is not None and other.get('events'):
+            self.events.update(other['events'])
+
+    def as_dict(self) -> Dict:
+        return {
+            'engine': self.engine,
+            'counters': dict(self.counters),
+            'timings': dict(self.timings),
+            'sports': {k: dict(v) for k, v in self.sports.items()},
+            'probability_cache': dict(self.probability_cache),
+            'events': self.events,
+            'candidates': self.candidates,
+        }
+
+    def slowest_stage(self) -> Optional[str]:
+        stages = {k: v for k, v in self.timings.items() if k != 'total'}
+        return max(stages, key=stages.get) if stages else None
+
+    def probability_hit_rate(self) -> float:
+        total = self.probability_cache['hits'] + self.probability_cache['misses']
+        return self.probability_cache['hits'] / total if total else 0.0
+
+    def export(self, registry: MetricsRegistry = metrics):
+        """Vuelca el informe en el registro de métricas"""
+        for stage, seconds in self.timings.items():
+            registry.observe('scan.stage_seconds', seconds, stage=stage, engine=self.engine)
+        for reason, count in self.counters.items():
+            registry.inc('scan.outcomes', count, reason=reason)
+        for sport_key, counts in self.sports.items():
+            for key, value in counts.items():
+                registry.inc(f'scan.sport.{key}', value, sport=sport_key)
+        for result, count in self.probability_cache.items():
+            registry.inc('model.probability_cache', count, result=result)
+        registry.gauge('model.probability_cache_hit_rate', self.probability_hit_rate())
+        registry.gauge('scan.candidates', self.candidates)
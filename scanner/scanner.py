@@ -14,9 +14,14 @@ Rules implemented per your spec:
 - Excluir partidos en vivo (commence_time ya pasó)
 - Solo partidos en las próximas 24 horas
 - Incluir mercados: h2h, totals, spreads (hándicap)
+- Tiers: una sola pasada con la envolvente de la escalera de tiers; cada
+  candidato lleva 'tier' = el más estricto que cumple
 """
 import logging
-from typing import List, Dict
+import os
+import time
+from collections import namedtuple
+from typing import List, Dict, Optional, Tuple
 from statistics import mean
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
@@ -25,14 +30,31 @@ logger = logging.getLogger(__name__)
 
 # Intentar usar modelo mejorado, fallback al básico
 try:
-    from model.enhanced_probabilities import estimate_probabilities_enhanced as estimate_probabilities
+    from model.enhanced_probabilities import estimate_probabilities_enhanced, prefetch_slate
+    estimate_probabilities = estimate_probabilities_enhanced
     USING_ENHANCED_MODEL = True
 except ImportError:
     from model.probabilities import estimate_probabilities
+    estimate_probabilities_enhanced = prefetch_slate = None
     USING_ENHANCED_MODEL = False
 
 from data.state import AlertsState
-from analyzer import generate_analysis
+from data.odds_book import OddsBook
+from data.event_schema import event_commence_ts, format_display
+from data.outcome_sides import event_sides, OVER
+from analytics.vig import VigTable
+from model.score_matrix import score_matrix
+from model.probability_cache import probability_cache
+from analyzer import LazyAnalysis
+from scanner.candidate_cache import CandidateCache
+from scanner.scan_report import ScanReport, new_discard_counters
+from scanner.parallel import ShardedScanExecutor, SCAN_WORKERS
+from utils.top_k import TopKSelector
+
+try:
+    from scanner.numpy_engine import scan_numpy
+except ImportError:  # numpy no instalado: solo motor python
+    scan_numpy = None
 
 # thresholds per sport key prefix
 THRESHOLDS = {
@@ -44,17 +66,72 @@ THRESHOLDS = {
 }
 
 
+# Mercados que evalúa el scanner: h2h, totals (over/under), spreads (hándicap)
+SCANNED_MARKETS = ('h2h', 'totals', 'spreads')
+
+# Motor de escaneo: 'python' (outcome por outcome) o 'numpy' (máscaras vectorizadas)
+SCAN_ENGINE = os.getenv("SCAN_ENGINE", "python").lower()
+
+# Cache de candidatos por evento: re-escanear solo eventos con cambios
+CANDIDATE_CACHE = os.getenv("CANDIDATE_CACHE", "true").lower() == "true"
+
+# Máximo de candidatos que devuelve un escaneo (0 = todos)
+SCAN_TOP_K = int(os.getenv("SCAN_TOP_K", "0"))
+
+# Tier de escaneo con nombre; la escalera va de más estricto a más relajado
+ScanTier = namedtuple('ScanTier', 'name min_odd max_odd min_prob')
+
+# Datos por evento que comparten ambos motores
+EventScan = namedtuple('EventScan', 'sport_key threshold probs home away sides commence_display')
+
+
+def parse_scan_tiers(spec: str) -> List[ScanTier]:
+    """
+    Parsea la escalera de tiers: 'strict:1.4-3.5:0.52,relaxed:1.3-4.0:0.48'
+    (nombre:min_odd-max_odd:min_prob, de más estricto a más relajado)
+    """
+    tiers = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, odds, min_prob = item.split(':')
+            min_odd, max_odd = odds.split('-')
+            tiers.append(ScanTier(name.strip(), float(min_odd), float(max_odd), float(min_prob)))
+        except ValueError:
+            raise ValueError(f"Tier inválido en SCAN_TIERS: '{item}' (formato nombre:min_odd-max_odd:min_prob)")
+    if not tiers:
+        raise ValueError("SCAN_TIERS no define ningún tier")
+    return tiers
+
+
 def implied_prob_from_odd(odd: float) -> float:
     return 1.0 / odd if odd and odd > 0 else 0.0
 
 
 class ValueScanner:
-    def __init__(self, min_odd: float = 1.5, max_odd: float = 2.5, min_prob: float = 0.55):
-        self.min_odd = min_odd
-        self.max_odd = max_odd
-        self.min_prob = min_prob
+    def __init__(self, min_odd: float = 1.5, max_odd: float = 2.5, min_prob: float = 0.55,
+                 engine: str = SCAN_ENGINE, tiers: Optional[List[ScanTier]] = None,
+                 cache: bool = CANDIDATE_CACHE, workers: int = SCAN_WORKERS, top_k: int = SCAN_TOP_K):
+        # Una sola pasada con la envolvente de todos los tiers; cada candidato
+        # se etiqueta con el tier más estricto que cumple
+        self.tiers = list(tiers) if tiers else [ScanTier('default', min_odd, max_odd, min_prob)]
+        self.min_odd = min(t.min_odd for t in self.tiers)
+        self.max_odd = max(t.max_odd for t in self.tiers)
+        self.min_prob = min(t.min_prob for t in self.tiers)
+        if engine == 'numpy' and scan_numpy is None:
+            logger.warning("[SCANNER] numpy no disponible, usando motor python")
+            engine = 'python'
+        self.engine = engine
+        self.candidate_cache = CandidateCache() if cache else None
+        # Escaneo en procesos por deporte (scanner/parallel.py) con workers > 1
+        self.executor = ShardedScanExecutor(workers) if workers > 1 else None
+        self.top_k = top_k or None
+        self.last_report: Optional[ScanReport] = None
 
-    def sport_prefix(self, sport_key: str) -> str:
+    @staticmethod
+    def sport_prefix(sport_key: str) -> str:
         for k in THRESHOLDS.keys():
             if sport_key.startswith(k):
                 return k
@@ -69,132 +146,266 @@ class ValueScanner:
             return 'baseball'
         return 'other'
 
-    def find_value_bets(self, events: List[Dict]) -> List[Dict]:
-        results = []
-        discarded = {'odds_range': 0, 'probability': 0, 'time_range': 0, 'no_threshold': 0, 'total_checked': 0, 'missing_fields': 0}
-        now_utc = datetime.now(timezone.utc)
-        # Límite: 24 horas desde ahora
-        max_time = now_utc + timedelta(hours=24)
-        for ev in events:
-            # Filtrar partidos: solo en las próximas 24 horas
-            commence_str = ev.get('commence_time')
-            if commence_str:
-                try:
-                    commence_time = datetime.fromisoformat(commence_str.replace('Z', '+00:00'))
-                    if commence_time <= now_utc:
-                        discarded['time_range'] += 1
-                        continue
-                    if commence_time > max_time:
-                        discarded['time_range'] += 1
-                        continue
-                except Exception:
-                    logger.warning(f"[SCANNER] No se pudo parsear commence_time: {commence_str}")
-                    continue
+    def tier_for(self, odd: float, prob: float) -> Optional[str]:
+        """Nombre del tier más estricto que cumple (odd, prob), o None"""
+        for tier in self.tiers:
+            if tier.min_odd <= odd <= tier.max_odd and prob >= tier.min_prob:
+                return tier.name
+        return None
+
+    def _make_candidate(self, ev: Dict, book: OddsBook, r: int, info: EventScan, market_key: str,
+                        sel: str, odd: float, prob_est: float, value: float) -> Dict:
+        """Candidato de salida para la fila r del libro (común a ambos motores)"""
+        b = book.book_idx[r]
+        return {
+            'id': ev.get('id'),
+            'sport': ev.get('sport_nice', info.sport_key),
+            'sport_key': info.sport_key,
+            'home': info.home,
+            'away': info.away,
+            'event': f"{info.home} vs {info.away}",
+            # Formatear fecha y hora del evento
+            'commence_time': info.commence_display,
+            'market': market_key,
+            'market_key': market_key,
+            'selection': sel,
+            'odds': odd,
+            'prob': prob_est,
+            'real_probability': prob_est,
+            'value': value,
+            'book': book.book_titles[b] or 'Desconocida',
+            'bookmaker': book.book_titles[b] or 'Desconocida',
+            'url': book.book_urls[b] or '',
+            # Texto generado solo si un formatter lo necesita (analyzer.LazyAnalysis)
+            'analysis': LazyAnalysis(ev, sel, odd, prob_est),
+            'point': book.point_at(r),
+            # Vig del mercado de la casa (VigTable del libro, una pasada por ciclo)
+            'vig': VigTable.from_book(book).row_vig(r),
+        }
+
+    @staticmethod
+    def outcome_probability(market_key: str, side: Optional[str], probs: Dict,
+                            point: Optional[float] = None) -> Optional[float]:
+        """
+        Probabilidad estimada de un outcome según su mercado, lado y línea (None si no hay).
+
+        Con xG del modelo (fútbol) totals y spreads salen de la matriz de marcadores
+        Poisson cacheada; sin xG se mantienen 0.52/0.48 y la probabilidad home/away.
+        """
+        if market_key == 'h2h':
+            if side is not None:
+                return probs.get(side)
+            return probs.get('home') if 'home' in probs else next(iter(probs.values()), None)
+        xg = probs.get('xg')
+        if market_key == 'totals':
+            if xg is not None and point is not None:
+                over, under = score_matrix(*xg).total(point)
+                return over if side == OVER else under
+            return 0.52 if side == OVER else 0.48
+        elif market_key == 'spreads':
+            if xg is not None and point is not None:
+                return score_matrix(*xg).handicap(point, side)
+            return probs.get(side, 0.5)
+        return None
+
+    def _prepare_event(self, ev: Dict, now_ts: float, max_ts: float, report: ScanReport) -> Optional[EventScan]:
+        """Filtros por evento (ventana de 24h, threshold) + probabilidades del modelo"""
+        start = time.perf_counter()
+        info = self._filter_event(ev, now_ts, max_ts, report.counters)
+        filtered = time.perf_counter()
+        report.add_time('time_filter', filtered - start)
+        if info is None:
+            return None
+        sport_key, threshold, commence_ts = info
+        report.sport(sport_key)['events'] += 1
+        probs, hit = probability_cache.lookup(ev, estimate_probabilities)
+        report.probability_cache['hits' if hit else 'misses'] += 1
+        home = ev.get('home_team') or ev.get('home') or ev.get('competitor_home') or 'Equipo Local'
+        away = ev.get('away_team') or ev.get('away') or ev.get('competitor_away') or 'Equipo Visitante'
+        prepared = EventScan(sport_key, threshold, probs, home, away, event_sides(home, away), format_display(commence_ts))
+        report.add_time('probabilities', time.perf_counter() - filtered)
+        return prepared
+
+    def _prefetch_model_inputs(self, events: List[Dict], now_ts: float, max_ts: float):
+        """Precarga en bloque los datos del modelo mejorado de los eventos que lo van a consultar"""
+        pending = [
+            ev for ev in events
+            if self._filter_event(ev, now_ts, max_ts, new_discard_counters()) is not None
+            and not probability_cache.contains(ev, estimate_probabilities)
+        ]
+        prefetch_slate(pending)
+
+    def _filter_event(self, ev: Dict, now_ts: float, max_ts: float, discarded: Dict):
+        """(sport_key, threshold, commence_ts) si el evento pasa ventana y threshold, o None"""
+        # Filtrar partidos: solo en las próximas 24 horas
+        commence_ts = event_commence_ts(ev)
+        if commence_ts is None:
+            if ev.get('commence_time'):
+                logger.warning(f"[SCANNER] No se pudo parsear commence_time: {ev.get('commence_time')}")
             else:
                 logger.warning(f"[SCANNER] Evento sin commence_time: {ev.get('id')}")
-                discarded['missing_fields'] += 1
-                continue
-            sport_key = ev.get('sport_key', ev.get('_sport_key', ''))
-            prefix = self.sport_prefix(sport_key)
-            threshold = THRESHOLDS.get(prefix)
-            if not threshold:
-                logger.warning(f"[SCANNER] Sin threshold para sport_key: {sport_key}")
-                discarded['no_threshold'] += 1
+            discarded['missing_fields'] += 1
+            return None
+        if commence_ts <= now_ts or commence_ts > max_ts:
+            discarded['time_range'] += 1
+            return None
+        sport_key = ev.get('sport_key', ev.get('_sport_key', ''))
+        prefix = self.sport_prefix(sport_key)
+        threshold = THRESHOLDS.get(prefix)
+        if not threshold:
+            logger.warning(f"[SCANNER] Sin threshold para sport_key: {sport_key}")
+            discarded['no_threshold'] += 1
+            return None
+        return sport_key, threshold, commence_ts
+
+    def _scan_python(self, events: List[Dict], book: OddsBook, now_ts: float, max_ts: float,
+                     report: ScanReport) -> List[Dict]:
+        """Motor de referencia: recorre outcome por outcome (descartes y tiempos en `report`)"""
+        results = []
+        discarded = report.counters
+        for ev in events:
+            before = report.snapshot_counters()
+            info = self._prepare_event(ev, now_ts, max_ts, report)
+            if info is None:
+                report.track_event(ev.get('id'), before, None)
                 continue
-            probs = estimate_probabilities(ev)
+            loop_start = time.perf_counter()
+            checked_before = discarded['total_checked']
+            analysis = 0.0
             # Incluir mercados: h2h, totals (over/under), spreads (hándicap)
-            for bm in ev.get('bookmakers', []):
-                for m in bm.get('markets', []):
-                    market_key = m.get('key')
-                    if market_key not in ['h2h', 'totals', 'spreads']:
+            pos = book.locate(ev)
+            for g in book.event_groups(pos):
+                market_key = book.markets[book.group_market[g]]
+                if market_key not in SCANNED_MARKETS:
+                    continue
+                for r in book.group_rows(g):
+                    discarded['total_checked'] += 1
+                    n = book.name_idx[r]
+                    sel = book.names[n] or 'Sin nombre'
+                    if not sel or sel.strip() == '':
+                        logger.warning(f"[SCANNER] Outcome sin nombre en evento {ev.get('id')}")
+                        discarded['missing_fields'] += 1
                         continue
-                    for out in m.get('outcomes', []):
-                        discarded['total_checked'] += 1
-                        sel = out.get('name') or 'Sin nombre'
-                        if not sel or sel.strip() == '':
-                            logger.warning(f"[SCANNER] Outcome sin nombre en evento {ev.get('id')}")
-                            discarded['missing_fields'] += 1
-                            continue
-                        try:
-                            odd = float(out.get('price'))
-                        except Exception:
-                            logger.warning(f"[SCANNER] Outcome sin price válido en evento {ev.get('id')}")
-                            discarded['missing_fields'] += 1
-                            continue
-                        if odd < self.min_odd or odd > self.max_odd:
-                            discarded['odds_range'] += 1
-                            continue
-                        # Determinar probabilidad según el mercado
-                        prob_est = None
-                        home = ev.get('home_team') or ev.get('home') or ev.get('competitor_home') or 'Equipo Local'
-                        away = ev.get('away_team') or ev.get('away') or ev.get('competitor_away') or 'Equipo Visitante'
-                        name_lower = sel.lower()
-                        if market_key == 'h2h':
-                            if 'draw' in name_lower or name_lower in ['x','empate']:
-                                prob_est = probs.get('draw')
-                            elif (home and home.lower() in name_lower) or name_lower in ['home','local']:
-                                prob_est = probs.get('home')
-                            elif (away and away.lower() in name_lower) or name_lower in ['away','visitante']:
-                                prob_est = probs.get('away')
-                            else:
-                                prob_est = probs.get('home') if 'home' in probs else list(probs.values())[0]
-                        elif market_key == 'totals':
-                            prob_est = 0.52 if 'over' in sel.lower() else 0.48
-                        elif market_key == 'spreads':
-                            if home and home.lower() in name_lower:
-                                prob_est = probs.get('home', 0.5)
-                            else:
-                                prob_est = probs.get('away', 0.5)
-                        if not prob_est or prob_est < self.min_prob:
-                            discarded['probability'] += 1
-                            continue
-                        value = odd * prob_est
-                        if value >= threshold:
-                            analysis = generate_analysis(ev, sel, odd, prob_est)
-                            # Formatear fecha y hora del evento
-                            commence_time_str = ""
-                            try:
-                                dt = datetime.fromisoformat(commence_str.replace('Z', '+00:00'))
-                                commence_time_str = dt.strftime("%Y-%m-%d %H:%M UTC")
-                            except:
-                                commence_time_str = commence_str or 'Sin fecha'
-                            event_name = f"{home} vs {away}"
-                            point_value = out.get('point')
-                            results.append({
-                                'id': ev.get('id'),
-                                'sport': ev.get('sport_nice', sport_key),
-                                'sport_key': sport_key,
-                                'home': home,
-                                'away': away,
-                                'event': event_name,
-                                'commence_time': commence_time_str,
-                                'market': market_key,
-                                'market_key': market_key,
-                                'selection': sel,
-                                'odds': odd,
-                                'prob': prob_est,
-                                'real_probability': prob_est,
-                                'value': value,
-                                'book': bm.get('title') or 'Desconocida',
-                                'bookmaker': bm.get('title') or 'Desconocida',
-                                'url': bm.get('url',''),
-                                'analysis': analysis,
-                                'point': point_value,
-                            })
-        # De-duplicate by id+selection+bookmaker keeping highest value
-        unique = {}
-        for r in results:
-            key = (r['id'], r['selection'], r['bookmaker'])
-            if key not in unique or r['value'] > unique[key]['value']:
-                unique[key] = r
-        final_results = list(unique.values())
+                    odd = book.price[r]
+                    if odd != odd:  # NaN: price ausente o no numérico
+                        logger.warning(f"[SCANNER] Outcome sin price válido en evento {ev.get('id')}")
+                        discarded['missing_fields'] += 1
+                        continue
+                    if odd < self.min_odd or odd > self.max_odd:
+                        discarded['odds_range'] += 1
+                        continue
+                    # Determinar probabilidad según el mercado
+                    prob_est = self.outcome_probability(
+                        market_key, info.sides.side(market_key, book.names[n]), info.probs, book.point_at(r)
+                    )
+                    if not prob_est or prob_est < self.min_prob:
+                        discarded['probability'] += 1
+                        continue
+                    value = odd * prob_est
+                    if value >= info.threshold:
+                        candidate_start = time.perf_counter()
+                        results.append(self._make_candidate(ev, book, r, info, market_key, sel, odd, prob_est, value))
+                        analysis += time.perf_counter() - candidate_start
+            report.sport(info.sport_key)['outcomes'] += discarded['total_checked'] - checked_before
+            report.track_event(ev.get('id'), before, info.sport_key)
+            report.add_time('analysis', analysis)
+            report.add_time('outcome_loop', time.perf_counter() - loop_start - analysis)
+        return results
+
+    def find_value_bets(self, events: List[Dict], book: Optional[OddsBook] = None) -> List[Dict]:
+        """
+        Busca value bets en los eventos.
+
+        book: OddsBook del ciclo (data/odds_book.py). Si no contiene los eventos
+        se construye uno local. El informe del escaneo queda en self.last_report.
+        """
+        candidates, _ = self.scan_with_report(events, book)
+        return candidates
+
+    def scan_with_report(self, events: List[Dict], book: Optional[OddsBook] = None) -> Tuple[List[Dict], ScanReport]:
+        """
+        Como find_value_bets, devolviendo también el ScanReport (descartes, tiempos
+        por etapa y desglose por deporte), que además se exporta a utils.metrics
+        """
+        scan_start = time.perf_counter()
+        # Con cache de candidatos se sigue el aporte de cada evento a los contadores
+        report = ScanReport(self.engine, track_events=self.candidate_cache is not None)
+        discarded = report.counters
+        book = OddsBook.ensure(events, book)
+        now_ts = datetime.now(timezone.utc).timestamp()
+        # Límite: 24 horas desde ahora
+        max_ts = now_ts + 24 * 3600
+        to_scan, cached, out_of_window = events, {}, 0
+        if self.candidate_cache is not None:
+            with report.stage('cache'):
+                to_scan, cached, cached_counts, out_of_window = self.candidate_cache.lookup(events, now_ts, max_ts)
+                # Los eventos servidos desde cache cuentan como si se hubieran escaneado
+                for delta in cached_counts.values():
+                    report.replay_event(delta)
+        if prefetch_slate is not None and estimate_probabilities is estimate_probabilities_enhanced:
+            with report.stage('prefetch'):
+                self._prefetch_model_inputs(to_scan, now_ts, max_ts)
+        results = None
+        if self.executor is not None:
+            results = self.executor.scan(self, to_scan, book, now_ts, max_ts, report)
+        if results is None:
+            if self.engine == 'numpy':
+                results = scan_numpy(self, to_scan, book, now_ts, max_ts, report)
+            else:
+                results = self._scan_python(to_scan, book, now_ts, max_ts, report)
+        if self.candidate_cache is not None:
+            with report.stage('cache'):
+                self.candidate_cache.store(to_scan, results, now_ts, max_ts, report.events)
+                results = CandidateCache.merge(events, results, cached)
+            discarded['time_range'] += out_of_window
+        # Etiquetar tier (con tiers no anidados la envolvente puede dejar pasar huecos) y
+        # seleccionar: de-dupe por id+selection+bookmaker quedándose con el tier más
+        # estricto y luego el mayor value; salida ordenada igual (mejor primero)
+        with report.stage('dedupe'):
+            rank = {t.name: i for i, t in enumerate(self.tiers)}
+            selector = TopKSelector(self.top_k, score=lambda r: (-rank[r['tier']], r['value']))
+            for r in results:
+                r['tier'] = self.tier_for(r['odds'], r['prob'])
+                if r['tier'] is None:
+                    discarded['no_tier'] = discarded.get('no_tier', 0) + 1
+                    continue
+                selector.push(r)
+            final_results = selector.results()
+        tier_counts = {t.name: 0 for t in self.tiers}
+        for r in final_results:
+            tier_counts[r['tier']] += 1
+            report.sport(r['sport_key'])['candidates'] += 1
+        report.candidates = len(final_results)
+        report.timings['total'] = time.perf_counter() - scan_start
+        report.export()
+        self.last_report = report
         # Logging detallado de descartes y advertencias
         logger.info(f"📊 Scan Summary:")
+        if self.candidate_cache is not None:
+            stats = self.candidate_cache.last_stats
+            logger.info(
+                f"   ♻️ Candidate cache: {stats['hits']} hits, {stats['misses']} rescanned "
+                f"({stats['expired']} expired), {stats['size']} cached events"
+            )
+        cache_stats = report.probability_cache
+        if cache_stats['hits'] + cache_stats['misses']:
+            logger.info(
+                f"   🧮 Probability cache: {cache_stats['hits']} hits, {cache_stats['misses']} computed "
+                f"({report.probability_hit_rate():.0%} hit rate)"
+            )
         logger.info(f"   Total outcomes checked: {discarded['total_checked']}")
         logger.info(f"   ❌ Discarded by odds range ({self.min_odd}-{self.max_odd}): {discarded['odds_range']}")
         logger.info(f"   ❌ Discarded by low probability (<{self.min_prob:.0%}): {discarded['probability']}")
         logger.info(f"   ❌ Discarded by time range: {discarded['time_range']}")
         logger.info(f"   ❌ Discarded by missing fields: {discarded['missing_fields']}")
         logger.info(f"   ❌ Discarded by no threshold: {discarded['no_threshold']}")
+        if discarded.get('no_tier'):
+            logger.info(f"   ❌ Discarded by no matching tier: {discarded['no_tier']}")
+        if len(self.tiers) > 1:
+            logger.info(f"   🪜 Candidates by tier: {', '.join(f'{k}={v}' for k, v in tier_counts.items())}")
         logger.info(f"   ✅ Final candidates: {len(final_results)}")
-        return final_results
+        logger.info(
+            f"   ⏱️ Stages: {', '.join(f'{k}={v * 1000:.1f}ms' for k, v in report.timings.items())} "
+            f"(slowest: {report.slowest_stage()})"
+        )
+        return final_results, report
@@ -0,0 +1,133 @@
+"""
+benchmark_scan_engines.py - Compara los motores de ValueScanner (python vs numpy)
+
+Este script:
+1. Genera slates sintéticos de ~1k, 10k y 100k outcomes (h2h, totals, spreads,
+   varias casas por evento) con el modelo básico (model/probabilities.py)
+2. Construye el OddsBook una vez por slate, como hace main por ciclo
+3. Mide find_value_bets con cada motor y verifica que la salida sea idéntica
+
+Uso:
+    python scripts/benchmark_scan_engines.py
+    python scripts/benchmark_scan_engines.py --sizes 1000 50000 --repeat 5
+"""
+
+import argparse
+import logging
+import pathlib
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+# Agregar proyecto al path
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import scanner.scanner as value_scanner
+from model.probabilities import estimate_probabilities
+from model.probability_cache import probability_cache
+from data.odds_book import OddsBook
+
+SPORTS = ['soccer_epl', 'basketball_nba', 'baseball_mlb', 'tennis_atp']
+BOOKMAKERS = [f"book{i}" for i in range(20)]
+
+
+def synthetic_events(n_outcomes: int, seed: int = 7) -> list:
+    """Eventos normalizados con ~n_outcomes outcomes en total"""
+    rng = random.Random(seed)
+    now_ts = datetime.now(timezone.utc).timestamp()
+    events, outcomes = [], 0
+    while outcomes < n_outcomes:
+        i = len(events)
+        sport = SPORTS[i % len(SPORTS)]
+        home, away = f"Home {i}", f"Away {i}"
+        commence_ts = now_ts + rng.uniform(-2, 30) * 3600  # algunos fuera de la ventana de 24h
+        event = {
+            'id': f"bench_{i}",
+            'sport_key': sport,
+            'home_team': home,
+            'away_team': away,
+            'commence_ts': commence_ts,
+            'extra': {'home_xg': rng.uniform(0.8, 2.0), 'away_xg': rng.uniform(0.6, 1.6),
+                      'winrate_home': rng.uniform(0.4, 0.7), 'winrate_away': rng.uniform(0.3, 0.6),
+                      'ranking_home': rng.randint(1, 200), 'ranking_away': rng.randint(1, 200)},
+        }
+        probs = estimate_probabilities(event)
+
+        def price(p):
+            # Cuota justa del modelo con margen de la casa (value solo ocasional)
+            return round(rng.uniform(0.88, 1.06) / max(p, 0.05), 2)
+
+        bookmakers = []
+        for key in rng.sample(BOOKMAKERS, rng.randint(5, len(BOOKMAKERS))):
+            h2h = [{'name': home, 'price': price(probs['home'])},
+                   {'name': away, 'price': price(probs['away'])}]
+            if sport.startswith('soccer'):
+                h2h.append({'name': 'Draw', 'price': price(probs['draw'])})
+            line = rng.choice([2.5, 3.5, 210.5])
+            markets = [
+                {'key': 'h2h', 'outcomes': h2h},
+                {'key': 'totals', 'outcomes': [
+                    {'name': 'Over', 'price': price(0.5), 'point': line},
+                    {'name': 'Under', 'price': price(0.5), 'point': line}]},
+            ]
+            if not sport.startswith('tennis'):
+                markets.append({'key': 'spreads', 'outcomes': [
+                    {'name': home, 'price': price(0.5), 'point': -1.5},
+                    {'name': away, 'price': price(0.5), 'point': 1.5}]})
+            outcomes += sum(len(m['outcomes']) for m in markets)
+            bookmakers.append({'key': key, 'title': key.title(), 'markets': markets})
+        event['bookmakers'] = bookmakers
+        events.append(event)
+    return events
+
+
+def best_time(scanner, events, book, repeat: int):
+    best, results = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = scanner.find_value_bets(events, book=book)
+        best = min(best, time.perf_counter() - t0)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores de escaneo")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Outcomes por slate")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por motor (se reporta la mejor)")
+    parser.add_argument('--stages', action='store_true', help="Mostrar tiempos por etapa (ScanReport) de cada motor")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    # Modelo básico: sin consultas a Supabase por evento
+    value_scanner.estimate_probabilities = estimate_probabilities
+    # Se mide el motor, no el cache de probabilidades (las repeticiones serían todo aciertos)
+    probability_cache.max_size = 0
+    limits = dict(min_odd=1.3, max_odd=4.0, min_prob=0.48)  # límites del scanner relajado de main
+    python_scanner = value_scanner.ValueScanner(engine='python', cache=False, **limits)
+    numpy_scanner = value_scanner.ValueScanner(engine='numpy', cache=False, **limits)
+    if numpy_scanner.engine != 'numpy':
+        print("numpy no está instalado")
+        return 1
+
+    print(f"{'outcomes':>10} {'eventos':>8} {'candidatos':>10} {'python':>10} {'numpy':>10} {'speedup':>8}")
+    for size in args.sizes:
+        events = synthetic_events(size)
+        book = OddsBook.from_events(events)
+        t_python, expected = best_time(python_scanner, events, book, args.repeat)
+        t_numpy, got = best_time(numpy_scanner, events, book, args.repeat)
+        if got != expected:
+            print(f"❌ Salidas distintas con {len(book)} outcomes")
+            return 1
+        print(f"{len(book):>10} {len(events):>8} {len(got):>10} "
+              f"{t_python * 1000:>8.1f}ms {t_numpy * 1000:>8.1f}ms {t_python / t_numpy:>7.1f}x")
+        if args.stages:
+            for scanner in (python_scanner, numpy_scanner):
+                timings = scanner.last_report.timings
+                print(f"{'':>10} {scanner.engine:>8}: " + ', '.join(f"{k}={v * 1000:.1f}ms" for k, v in timings.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
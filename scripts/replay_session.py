@@ -0,0 +1,149 @@
+"""
+replay_session.py - Reproduce tráfico grabado de The Odds API a través de ValueBotMonitor
+
+Este script:
+1. Carga grabaciones hechas con ODDS_RECORD_DIR (data/replay.py)
+2. Sustituye el fetcher del monitor por un ReplayOddsProvider (o por OddsFetcher
+   apuntando a un ReplayServer local con --server)
+3. Avanza el reloj virtual ciclo a ciclo, tan rápido como se pueda,
+   ejecutando fetch_and_update_events + find_value_opportunities
+4. No envía alertas, no escribe en Supabase ni en users.json
+
+Uso:
+    python scripts/replay_session.py recordings/ --cycles 200
+    python scripts/replay_session.py recordings/ --server --profile replay.prof
+"""
+
+import argparse
+import asyncio
+import cProfile
+import logging
+import pathlib
+import pstats
+import sys
+import time
+
+# Agregar proyecto al path
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from data.replay import ReplayOddsProvider, ReplayServer, ReplayClock, load_recordings
+from data.odds_api import OddsFetcher
+from data.http_client import http_clients
+
+logger = logging.getLogger(__name__)
+
+
+class _NullNotifier:
+    """Notifier que descarta mensajes (el replay nunca envía alertas)"""
+
+    async def send_message(self, *args, **kwargs):
+        return False
+
+
+def build_monitor(basic_model: bool = False):
+    """ValueBotMonitor aislado: sin Telegram, sin persistencia de line movement"""
+    import main
+
+    monitor = main.ValueBotMonitor()
+    monitor.notifier = _NullNotifier()
+    monitor.planner = None  # el calendario lo marca la grabación, no los créditos
+    if main.line_tracker is not None:
+        main.line_tracker.persist = False
+    if basic_model:
+        # Modelo básico (model/probabilities.py): sin consultas a Supabase por evento
+        import scanner.scanner as value_scanner
+        from model.probabilities import estimate_probabilities
+        value_scanner.estimate_probabilities = estimate_probabilities
+        monitor.scanner = main.ValueScanner(tiers=main.SCAN_TIERS)
+    return monitor
+
+
+async def run_replay(paths, cycles: int = None, use_server: bool = False, port: int = 8089,
+                     basic_model: bool = False, gap_seconds: float = 120) -> dict:
+    entries = load_recordings(paths)
+    if not entries:
+        logger.error("No hay respuestas grabadas en %s", paths)
+        return {}
+
+    clock = ReplayClock(entries[0]['ts'])
+    provider = ReplayOddsProvider(entries, clock=clock)
+    cycle_times = provider.cycle_times(gap_seconds)
+    if cycles:
+        cycle_times = cycle_times[:cycles]
+
+    monitor = build_monitor(basic_model)
+    sports = provider.sports
+
+    server = None
+    if use_server:
+        server = ReplayServer(provider, port=port)
+        await server.start()
+        monitor.fetcher = OddsFetcher(api_key='replay', base_url=server.base_url, recorder=False)
+    else:
+        monitor.fetcher = provider
+
+    import main
+    main.SPORTS = sports
+
+    totals = {'cycles': 0, 'events': 0, 'candidates': 0, 'fetch_seconds': 0.0, 'scan_seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        for ts in cycle_times:
+            clock.advance_to(ts)
+
+            t0 = time.perf_counter()
+            events = await monitor.fetch_and_update_events()
+            t1 = time.perf_counter()
+            candidates = await monitor.find_value_opportunities(monitor.get_events_starting_soon())
+            t2 = time.perf_counter()
+
+            totals['cycles'] += 1
+            totals['events'] += len(events)
+            totals['candidates'] += len(candidates)
+            totals['fetch_seconds'] += t1 - t0
+            totals['scan_seconds'] += t2 - t1
+    finally:
+        if server:
+            await server.stop()
+        await http_clients.close()
+        if monitor.scanner.executor is not None:
+            monitor.scanner.executor.shutdown()
+
+    totals['wall_seconds'] = time.perf_counter() - start
+    if cycle_times:
+        totals['virtual_hours'] = (cycle_times[-1] - cycle_times[0]).total_seconds() / 3600
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de respuestas grabadas de The Odds API")
+    parser.add_argument('paths', nargs='+', help="Archivos .jsonl.gz o directorios de grabación")
+    parser.add_argument('--cycles', type=int, default=None, help="Máximo de ciclos a reproducir")
+    parser.add_argument('--server', action='store_true', help="Servir por HTTP local y usar OddsFetcher real")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--basic-model', action='store_true', help="Usar ValueScanner y modelo básico (sin Supabase)")
+    parser.add_argument('--gap', type=float, default=120, help="Segundos entre respuestas para separar ciclos")
+    parser.add_argument('--profile', metavar='OUT', help="Guardar perfil cProfile en OUT")
+    args = parser.parse_args()
+
+    coro = run_replay(args.paths, cycles=args.cycles, use_server=args.server, port=args.port,
+                      basic_model=args.basic_model, gap_seconds=args.gap)
+    if args.profile:
+        profiler = cProfile.Profile()
+        totals = profiler.runcall(asyncio.run, coro)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    else:
+        totals = asyncio.run(coro)
+
+    if totals:
+        print(
+            f"\nReplay: {totals['cycles']} ciclos ({totals.get('virtual_hours', 0):.1f}h virtuales) "
+            f"en {totals['wall_seconds']:.1f}s | eventos {totals['events']}, candidatos {totals['candidates']} | "
+            f"fetch {totals['fetch_seconds']:.2f}s, scan {totals['scan_seconds']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
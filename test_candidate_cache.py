@@ -0,0 +1,116 @@
+"""
+test_candidate_cache.py - Verificar el cache de candidatos por evento (scanner/candidate_cache.py)
+
+Con el modelo básico sobre un slate sintético (scripts/benchmark_scan_engines.py),
+un ValueScanner con cache debe devolver exactamente lo mismo que un escaneo
+completo sin cache, con ambos motores: en frío, con todo servido desde cache y
+con un evento cambiado entre ciclos. Los contadores de descarte y el desglose
+por deporte del ScanReport también deben coincidir.
+
+Uso:
+    python test_candidate_cache.py
+    python -m pytest test_candidate_cache.py
+"""
+import copy
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from benchmark_scan_engines import synthetic_events
+import scanner.scanner as value_scanner
+from model.probabilities import estimate_probabilities
+from data.odds_book import OddsBook
+
+TIERS = [value_scanner.ScanTier('strict', 1.4, 3.5, 0.52), value_scanner.ScanTier('relaxed', 1.3, 4.0, 0.48)]
+ENGINES = ('python', 'numpy') if value_scanner.scan_numpy is not None else ('python',)
+
+
+def full_scan(events, engine):
+    scanner = value_scanner.ValueScanner(tiers=TIERS, engine=engine, cache=False)
+    return scanner.find_value_bets(events, book=OddsBook.from_events(events)), scanner
+
+
+def changed_slate(events):
+    """Copia del slate con una cuota cambiada en un evento (y sin huellas de ingesta)"""
+    changed = copy.deepcopy(events)
+    for ev in changed:
+        ev.pop('_fingerprint', None)
+    changed[5]['bookmakers'][0]['markets'][0]['outcomes'][0]['price'] = 9.9
+    return changed
+
+
+def assert_same_report(scanner, expected):
+    assert scanner.last_report.counters == expected.last_report.counters
+    assert scanner.last_report.sports == expected.last_report.sports
+
+
+def test_cached_scans_equal_full_scan():
+    """Test 1: frío, todo desde cache y un evento cambiado = escaneo completo"""
+    value_scanner.estimate_probabilities = estimate_probabilities
+    events = synthetic_events(3000)
+    changed = changed_slate(events)
+    for engine in ENGINES:
+        expected, full = full_scan(events, engine)
+        assert expected
+        scanner = value_scanner.ValueScanner(tiers=TIERS, engine=engine, cache=True)
+
+        assert scanner.find_value_bets(events, book=OddsBook.from_events(events)) == expected
+        assert_same_report(scanner, full)
+
+        assert scanner.find_value_bets(events, book=OddsBook.from_events(events)) == expected
+        assert scanner.candidate_cache.last_stats['misses'] == 0
+        assert scanner.candidate_cache.last_stats['hits'] > 0
+        assert_same_report(scanner, full)
+
+        expected_changed, full_changed = full_scan(changed, engine)
+        assert scanner.find_value_bets(changed, book=OddsBook.from_events(changed)) == expected_changed
+        assert scanner.candidate_cache.last_stats['misses'] == 1
+        assert_same_report(scanner, full_changed)
+        print(f"   ✅ {engine}: {len(expected)} candidatos, "
+              f"{scanner.candidate_cache.last_stats['hits']} eventos desde cache")
+
+
+def test_engines_agree():
+    """Test 2: python y numpy dan la misma salida"""
+    value_scanner.estimate_probabilities = estimate_probabilities
+    if len(ENGINES) < 2:
+        print("   ⚠️  numpy no instalado")
+        return
+    events = synthetic_events(3000)
+    # Nombres solo de espacios cuentan como campo faltante; '' pasa como 'Sin nombre'
+    for i, ev in enumerate(events[::13]):
+        ev['bookmakers'][0]['markets'][0]['outcomes'][0]['name'] = '  ' if i % 2 else ''
+    expected, python_scan = full_scan(events, 'python')
+    actual, numpy_scan = full_scan(events, 'numpy')
+    assert actual == expected
+    assert_same_report(numpy_scan, python_scan)
+    print("   ✅ python = numpy")
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    logging.basicConfig(level=logging.ERROR)
+    print("=" * 60)
+    print("🧪 TEST: Cache de candidatos vs escaneo completo")
+    print("=" * 60)
+
+    test_cached_scans_equal_full_scan()
+    test_engines_agree()
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
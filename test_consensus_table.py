@@ -0,0 +1,154 @@
+"""
+test_consensus_table.py - Verificar el consenso del ciclo (analytics/consensus.py ConsensusTable)
+
+Compara, fila por fila de un slate sintético con líneas mezcladas
+(scripts/benchmark_scan_engines.py), la ConsensusTable vectorizada y su versión
+sin numpy con consensus_score y market_agreement_score sobre las cuotas de la
+misma línea, y la vista por evento MarketIndex (analytics/market_index.py) con
+las mismas funciones escalares.
+
+Uso:
+    python test_consensus_table.py
+    python -m pytest test_consensus_table.py
+"""
+import math
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from benchmark_scan_engines import synthetic_events
+from analytics.consensus import ConsensusTable, OUTLIER_PERCENT, consensus_score, market_agreement_score
+from analytics.market_index import MarketIndex
+from analytics.vig import calculate_vig
+from data.odds_book import OddsBook
+
+TOL = 1e-9
+
+
+def synthetic_book(n_outcomes=5000):
+    """Slate sintético (totals a 2.5/3.5/210.5 según la casa) con algunas cuotas sin price"""
+    events = synthetic_events(n_outcomes)
+    for ev in events[::11]:
+        ev['bookmakers'][0]['markets'][0]['outcomes'][0].pop('price')
+    return OddsBook.from_events(events)
+
+
+def line_odds(book):
+    """(evento, mercado, outcome, point) -> {casa: cuota}, recorriendo el libro fila a fila"""
+    odds = {}
+    for r in range(len(book)):
+        if math.isnan(book.price[r]):
+            continue
+        key = (book.event_idx[r], book.market_idx[r], book.name_idx[r], book.point_at(r))
+        odds.setdefault(key, {})[book.books[book.book_idx[r]]] = book.price[r]
+    return odds
+
+
+def assert_same_consensus(actual, expected, label):
+    assert actual.keys() == expected.keys(), f"{label}: {actual.keys()} != {expected.keys()}"
+    for key, value in expected.items():
+        if key == 'is_outlier':
+            # Solo puede diferir por redondeo justo en el umbral
+            if abs(abs(expected['diff_from_mean_pct']) - OUTLIER_PERCENT) > 1e-6:
+                assert actual[key] == value, f"{label}: is_outlier"
+        elif isinstance(value, float):
+            assert abs(actual[key] - value) < TOL, f"{label}: {key} {actual[key]} != {value}"
+        else:
+            assert actual[key] == value, f"{label}: {key}"
+
+
+def check_table(book, table):
+    """Número de filas comparadas; falla en la primera discrepancia"""
+    odds = line_odds(book)
+    checked = 0
+    for r in range(len(book)):
+        if math.isnan(book.price[r]):
+            assert table.num_books(r) == 0
+            continue
+        book_odds = odds[(book.event_idx[r], book.market_idx[r], book.name_idx[r], book.point_at(r))]
+        bookmaker = book.books[book.book_idx[r]]
+        assert_same_consensus(table.consensus(r), consensus_score(book_odds, bookmaker), f"fila {r}")
+        assert abs(table.agreement(r) - market_agreement_score(book_odds)) < TOL, f"agreement fila {r}"
+        best_book, best_odd = table.best(r)
+        assert best_odd == max(book_odds.values()) and book_odds[best_book] == best_odd
+        checked += 1
+    return checked
+
+
+def test_consensus_table_matches_scalar_functions():
+    """Test 1: ConsensusTable (numpy) = consensus_score / market_agreement_score por línea"""
+    book = synthetic_book()
+    checked = check_table(book, ConsensusTable.from_book(book))
+    assert checked > 1000
+    print(f"   ✅ numpy: {checked} filas sin discrepancias")
+
+
+def test_python_fallback_matches_scalar_functions():
+    """Test 2: la versión sin numpy da lo mismo"""
+    book = synthetic_book()
+    checked = check_table(book, ConsensusTable._build_python(book))
+    assert checked > 1000
+    print(f"   ✅ python: {checked} filas sin discrepancias")
+
+
+def test_lines_are_not_pooled():
+    """Test 3: en totals, cada línea tiene su propio consenso"""
+    book = synthetic_book()
+    table = ConsensusTable.from_book(book)
+    odds = line_odds(book)
+    totals = book.markets.index('totals')
+    over = book.names.index('Over')
+    lines = {point for (pos, m, n, point) in odds if pos == 0 and m == totals and n == over}
+    assert len(lines) > 1, "el slate sintético debería mezclar líneas"
+    for point in lines:
+        stats = table.stats(0, 'totals', 'Over', point)
+        assert stats['num_books'] == len(odds[(0, totals, over, point)])
+    print(f"   ✅ totals del evento 0 separados en {len(lines)} líneas")
+
+
+def test_market_index_reads_cycle_tables():
+    """Test 4: MarketIndex por evento = funciones escalares sobre sus cuotas"""
+    book = synthetic_book(2000)
+    checked = 0
+    for pos in range(book.event_count):
+        index = MarketIndex.from_book(book, pos)
+        for (market_key, outcome, point), rows in index.rows.items():
+            book_odds = index.outcome_odds(market_key, outcome, point)
+            for bookmaker in rows:
+                assert_same_consensus(index.consensus(market_key, outcome, bookmaker, point),
+                                      consensus_score(book_odds, bookmaker), f"{pos} {market_key} {outcome}")
+                checked += 1
+            assert abs(index.agreement(market_key, outcome, point) - market_agreement_score(book_odds)) < TOL
+        for bookmaker, market_key in index.groups:
+            assert abs(index.vig(bookmaker, market_key) - calculate_vig(index.book_market(bookmaker, market_key))) < TOL
+    assert checked > 1000
+    print(f"   ✅ MarketIndex: {checked} cuotas sin discrepancias")
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    print("=" * 60)
+    print("🧪 TEST: ConsensusTable vs funciones escalares de consenso")
+    print("=" * 60)
+
+    test_consensus_table_matches_scalar_functions()
+    test_python_fallback_matches_scalar_functions()
+    test_lines_are_not_pooled()
+    test_market_index_reads_cycle_tables()
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
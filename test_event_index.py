@@ -0,0 +1,130 @@
+"""
+test_event_index.py - Verificar el índice de eventos por hora de inicio (data/event_index.py)
+
+Comprueba los límites de window()/count_window() (inclusivos en ambos extremos,
+con empates de commence_ts), la reprogramación de un partido vía __setitem__ y
+pop_expired().
+
+Uso:
+    python test_event_index.py
+    python -m pytest test_event_index.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data.event_index import EventIndex
+
+
+def make_event(event_id, commence_ts):
+    return {'id': event_id, 'commence_ts': commence_ts}
+
+
+def build_index(*pairs):
+    index = EventIndex()
+    for event_id, ts in pairs:
+        index[event_id] = make_event(event_id, ts)
+    return index
+
+
+def ids(events):
+    return [ev['id'] for ev in events]
+
+
+# ==================== TESTS ====================
+
+def test_window_bounds_are_inclusive():
+    index = build_index(('a', 100.0), ('b', 200.0), ('c', 200.0), ('d', 300.0), ('e', 400.0))
+    assert ids(index.window(200.0, 300.0)) == ['b', 'c', 'd']
+    assert ids(index.window(150.0, 250.0)) == ['b', 'c']
+    assert ids(index.window(100.0, 100.0)) == ['a']
+    assert ids(index.window(0.0, 1000.0)) == ['a', 'b', 'c', 'd', 'e']
+    assert index.window(401.0, 500.0) == []
+    assert index.window(300.0, 200.0) == []
+    assert index.count_window(200.0, 200.0) == 2
+    assert index.count_window(300.0, 200.0) == 0
+
+
+def test_window_matches_linear_scan():
+    pairs = [(f"ev{i}", float((i * 37) % 50)) for i in range(200)]
+    index = build_index(*pairs)
+    for start, end in [(0, 10), (10, 10), (12.5, 30), (49, 60), (-5, 0)]:
+        expected = sorted((ts, event_id) for event_id, ts in pairs if start <= ts <= end)
+        assert ids(index.window(start, end)) == [event_id for _, event_id in expected]
+        assert index.count_window(start, end) == len(expected)
+
+
+def test_reschedule_moves_event_in_order():
+    index = build_index(('a', 100.0), ('b', 200.0), ('c', 300.0))
+    index['a'] = make_event('a', 350.0)  # partido reprogramado
+    assert len(index) == 3
+    assert ids(index.window(0.0, 1000.0)) == ['b', 'c', 'a']
+    assert index.window(100.0, 100.0) == []
+    assert index.next_start() == 200.0
+
+    # Misma hora: reemplaza el dict sin duplicar la entrada ordenada
+    updated = make_event('b', 200.0)
+    updated['odds'] = 1.9
+    index['b'] = updated
+    assert index['b'] is updated
+    assert index.count_window(0.0, 1000.0) == 3
+
+
+def test_delete_removes_from_order():
+    index = build_index(('a', 100.0), ('b', 100.0), ('c', 200.0))
+    del index['b']
+    assert 'b' not in index
+    assert ids(index.window(0.0, 1000.0)) == ['a', 'c']
+
+
+def test_pop_expired_cuts_started_prefix():
+    index = build_index(('a', 100.0), ('b', 200.0), ('c', 200.0), ('d', 300.0))
+    assert index.pop_expired(50.0) == []
+    assert index.pop_expired(200.0) == ['a', 'b', 'c']
+    assert list(index) == ['d']
+    assert index.next_start() == 300.0
+    assert index.pop_expired(1000.0) == ['d']
+    assert len(index) == 0
+    assert index.next_start() is None
+
+
+def test_pop_expired_after_reschedule():
+    index = build_index(('a', 100.0), ('b', 200.0))
+    index['a'] = make_event('a', 500.0)
+    assert index.pop_expired(300.0) == ['b']
+    assert list(index) == ['a']
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    print("=" * 60)
+    print("🧪 TEST: Índice de eventos por hora de inicio")
+    print("=" * 60)
+
+    test_window_bounds_are_inclusive()
+    print("   ✅ window() inclusiva en ambos extremos")
+    test_window_matches_linear_scan()
+    print("   ✅ window() = recorrido lineal")
+    test_reschedule_moves_event_in_order()
+    print("   ✅ reprogramación vía __setitem__")
+    test_delete_removes_from_order()
+    print("   ✅ __delitem__ quita la entrada ordenada")
+    test_pop_expired_cuts_started_prefix()
+    print("   ✅ pop_expired() corta el prefijo empezado")
+    test_pop_expired_after_reschedule()
+    print("   ✅ pop_expired() tras reprogramar")
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,77 @@
+"""
+test_parallel_scan.py - Verificar el escaneo en procesos por deporte (scanner/parallel.py)
+
+Con el modelo básico sobre un slate sintético (scripts/benchmark_scan_engines.py),
+el escaneo repartido en 3 workers debe devolver lo mismo que el escaneo en
+proceso, con ambos motores y los mismos contadores de descarte. Las
+probabilidades calculadas en los workers deben quedar en el cache de
+probabilidades del proceso principal.
+
+Uso:
+    python test_parallel_scan.py
+    python -m pytest test_parallel_scan.py
+"""
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from benchmark_scan_engines import synthetic_events
+import scanner.scanner as value_scanner
+from model.probabilities import estimate_probabilities
+from model.probability_cache import probability_cache
+from data.odds_book import OddsBook
+
+TIERS = [value_scanner.ScanTier('strict', 1.4, 3.5, 0.52), value_scanner.ScanTier('relaxed', 1.3, 4.0, 0.48)]
+ENGINES = ('python', 'numpy') if value_scanner.scan_numpy is not None else ('python',)
+
+
+def test_parallel_scan_equals_in_process():
+    """Test 1: 3 workers = escaneo en proceso"""
+    value_scanner.estimate_probabilities = estimate_probabilities
+    events = synthetic_events(20000)
+    book = OddsBook.from_events(events)
+    for engine in ENGINES:
+        sequential = value_scanner.ValueScanner(tiers=TIERS, engine=engine, cache=False, workers=0)
+        parallel = value_scanner.ValueScanner(tiers=TIERS, engine=engine, cache=False, workers=3)
+        parallel.executor.min_events = 0
+        try:
+            expected = sequential.find_value_bets(events, book=book)
+            probability_cache.invalidate()
+            assert parallel.find_value_bets(events, book=book) == expected
+            assert parallel.last_report.counters == sequential.last_report.counters
+            assert parallel.last_report.sports == sequential.last_report.sports
+            # Lo calculado en los workers vuelve al cache del proceso principal
+            assert parallel.last_report.probability_cache['misses'] > 0
+            assert parallel.find_value_bets(events, book=book) == expected
+            assert parallel.last_report.probability_cache['misses'] == 0
+        finally:
+            parallel.executor.shutdown()
+        print(f"   ✅ {engine}: {len(expected)} candidatos, {len(events)} eventos en 3 workers")
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    logging.basicConfig(level=logging.ERROR)
+    print("=" * 60)
+    print("🧪 TEST: Escaneo en procesos vs escaneo en proceso")
+    print("=" * 60)
+
+    test_parallel_scan_equals_in_process()
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
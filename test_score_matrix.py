@@ -0,0 +1,177 @@
+"""
+test_score_matrix.py - Verificar la matriz de marcadores Poisson (model/score_matrix.py)
+
+Compara los mercados de ScoreMatrix con sumas por fuerza bruta sobre la matriz
+de marcadores construida con factoriales (model.probabilities.poisson_pmf):
+1X2 (implementación anterior), totals y hándicaps en líneas enteras, medias y
+de cuarto, para ambos lados.
+
+Uso:
+    python test_score_matrix.py
+    python -m pytest test_score_matrix.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from model.probabilities import poisson_pmf
+from model.score_matrix import ScoreMatrix, score_matrix, fit_xg_to_1x2
+
+MAX_GOALS = 10
+TOL = 1e-12
+XG_PAIRS = [(1.2, 1.0), (2.3, 0.6), (0.4, 1.9), (0.0, 1.1)]
+TOTAL_LINES = [0.5, 1.5, 2.5, 3.5, 1, 2, 3, 2.25, 2.75, 3.25]
+HANDICAP_LINES = [-2.5, -1.5, -0.5, 0.5, 1.5, -2, -1, 0, 1, -1.25, -0.75, -0.25, 0.25, 0.75]
+
+
+def brute_matrix(home_xg, away_xg, max_goals=MAX_GOALS):
+    """P[i][j] con factoriales, renormalizada sobre la masa truncada"""
+    home = [poisson_pmf(k, home_xg) for k in range(max_goals + 1)]
+    away = [poisson_pmf(k, away_xg) for k in range(max_goals + 1)]
+    total = sum(home) * sum(away)
+    return [[h * a / total for a in away] for h in home]
+
+
+def old_one_x_two(home_xg, away_xg, max_goals=MAX_GOALS):
+    """1X2 como lo calculaba football_1x2_from_xg antes de la matriz"""
+    home_pmf = [poisson_pmf(k, home_xg) for k in range(max_goals + 1)]
+    away_pmf = [poisson_pmf(k, away_xg) for k in range(max_goals + 1)]
+    p_home = p_draw = p_away = 0.0
+    for i, ph in enumerate(home_pmf):
+        for j, pa in enumerate(away_pmf):
+            p = ph * pa
+            if i > j:
+                p_home += p
+            elif i == j:
+                p_draw += p
+            else:
+                p_away += p
+    total = p_home + p_draw + p_away
+    return p_home / total, p_draw / total, p_away / total
+
+
+def is_quarter(line):
+    return (line * 4) % 2 == 1
+
+
+def brute_total(matrix, line):
+    """(over, under); cuarto de línea = media de las dos medias líneas"""
+    if is_quarter(line):
+        low, high = brute_total(matrix, line - 0.25), brute_total(matrix, line + 0.25)
+        return (low[0] + high[0]) / 2, (low[1] + high[1]) / 2
+    over = under = 0.0
+    for i, row in enumerate(matrix):
+        for j, p in enumerate(row):
+            if i + j > line:
+                over += p
+            elif i + j < line:
+                under += p
+    return over, under
+
+
+def brute_handicap(matrix, line, side):
+    """Probabilidad de ganar el hándicap `line` aplicado a `side`"""
+    if is_quarter(line):
+        return (brute_handicap(matrix, line - 0.25, side) + brute_handicap(matrix, line + 0.25, side)) / 2
+    win = 0.0
+    for i, row in enumerate(matrix):
+        for j, p in enumerate(row):
+            margin = i - j if side == 'home' else j - i
+            if margin + line > 0:
+                win += p
+    return win
+
+
+def assert_close(actual, expected, label):
+    assert abs(actual - expected) < TOL, f"{label}: {actual} != {expected}"
+
+
+# ==================== TESTS ====================
+
+def test_one_x_two_matches_factorial_implementation():
+    for home_xg, away_xg in XG_PAIRS:
+        new = ScoreMatrix(home_xg, away_xg, MAX_GOALS).one_x_two()
+        for actual, expected in zip(new, old_one_x_two(home_xg, away_xg)):
+            assert_close(actual, expected, f"1X2 {home_xg}-{away_xg}")
+        assert_close(sum(new), 1.0, "1X2 suma")
+
+
+def test_totals_match_brute_force():
+    for home_xg, away_xg in XG_PAIRS:
+        m = ScoreMatrix(home_xg, away_xg, MAX_GOALS)
+        matrix = brute_matrix(home_xg, away_xg)
+        for line in TOTAL_LINES:
+            over, under = m.total(line)
+            expected_over, expected_under = brute_total(matrix, line)
+            assert_close(over, expected_over, f"over {line} ({home_xg}-{away_xg})")
+            assert_close(under, expected_under, f"under {line} ({home_xg}-{away_xg})")
+
+
+def test_handicaps_match_brute_force():
+    for home_xg, away_xg in XG_PAIRS:
+        m = ScoreMatrix(home_xg, away_xg, MAX_GOALS)
+        matrix = brute_matrix(home_xg, away_xg)
+        for line in HANDICAP_LINES:
+            for side in ('home', 'away'):
+                assert_close(m.handicap(line, side), brute_handicap(matrix, line, side),
+                             f"AH {side} {line:+} ({home_xg}-{away_xg})")
+
+
+def test_half_lines_have_no_push():
+    m = ScoreMatrix(1.4, 1.1, MAX_GOALS)
+    for line in (0.5, 1.5, 2.5):
+        assert_close(sum(m.total(line)), 1.0, f"total {line}")
+    for line in (-1.5, -0.5, 0.5):
+        assert_close(m.handicap(line, 'home') + m.handicap(-line, 'away'), 1.0, f"AH {line:+}")
+    # AH -0.5 local = victoria local del 1X2
+    assert_close(m.handicap(-0.5, 'home'), m.one_x_two()[0], "AH -0.5")
+
+
+def test_cached_matrix_is_shared_per_quantized_pair():
+    assert score_matrix(1.2, 1.0) is score_matrix(1.2000001, 1.0)
+    assert score_matrix(1.2, 1.0) is not score_matrix(1.21, 1.0)
+
+
+def test_fit_xg_reproduces_target_1x2():
+    p_home, _, p_away = ScoreMatrix(1.7, 0.9, MAX_GOALS).one_x_two()
+    fitted = fit_xg_to_1x2(p_home, p_away, 1.2, 1.2)
+    assert fitted is not None
+    home, _, away = ScoreMatrix(*fitted, MAX_GOALS).one_x_two()
+    assert abs(home - p_home) < 1e-6 and abs(away - p_away) < 1e-6
+    # 1X2 sin empate posible: no alcanzable por dos Poisson
+    assert fit_xg_to_1x2(0.5, 0.5, 1.2, 1.2) is None
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    print("=" * 60)
+    print("🧪 TEST: Matriz de marcadores Poisson")
+    print("=" * 60)
+
+    test_one_x_two_matches_factorial_implementation()
+    print("   ✅ 1X2 = implementación con factoriales")
+    test_totals_match_brute_force()
+    print("   ✅ totals (enteras, medias y de cuarto) = fuerza bruta")
+    test_handicaps_match_brute_force()
+    print("   ✅ hándicaps (ambos lados) = fuerza bruta")
+    test_half_lines_have_no_push()
+    print("   ✅ medias líneas sin push")
+    test_cached_matrix_is_shared_per_quantized_pair()
+    print("   ✅ matriz compartida por par de xG cuantizado")
+    test_fit_xg_reproduces_target_1x2()
+    print("   ✅ fit_xg_to_1x2 reproduce el 1X2 objetivo")
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
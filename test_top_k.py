@@ -0,0 +1,146 @@
+"""
+test_top_k.py - Verificar la selección acotada de los K mejores (utils/top_k.py)
+
+Compara TopKSelector con la referencia "de-duplicar por clave y ordenar toda la
+lista con un sort estable": reemplazo por misma clave, expulsión y re-entrada
+de una clave, orden de empates y la compactación del heap (_compact).
+
+Uso:
+    python test_top_k.py
+    python -m pytest test_top_k.py
+"""
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.top_k import TopKSelector, candidate_key
+
+
+def make_candidate(event_id, selection, bookmaker, ev):
+    return {'id': event_id, 'selection': selection, 'bookmaker': bookmaker, 'expected_value': ev}
+
+
+def score(candidate):
+    return candidate['expected_value']
+
+
+def reference(items, k):
+    """De cada clave el de mayor score (el primero en empates) y sort estable, mejor primero"""
+    best = {}
+    for order, item in enumerate(items):
+        key = candidate_key(item)
+        if key not in best or score(item) > score(best[key][1]):
+            best[key] = (order, item)
+    kept = [item for _, item in sorted(best.values(), key=lambda entry: entry[0])]
+    ranked = sorted(kept, key=score, reverse=True)
+    return ranked if k is None else ranked[:k]
+
+
+def select(items, k):
+    return TopKSelector(k, score=score).extend(items).results()
+
+
+# ==================== TESTS ====================
+
+def test_same_key_keeps_best_score():
+    top = TopKSelector(3, score=score)
+    assert top.push(make_candidate('e1', 'Home', 'bet365', 0.05))
+    assert not top.push(make_candidate('e1', 'Home', 'bet365', 0.03))  # peor: ignorado
+    assert not top.push(make_candidate('e1', 'Home', 'bet365', 0.05))  # empate: se queda el primero
+    better = make_candidate('e1', 'Home', 'bet365', 0.09)
+    assert top.push(better)
+    assert len(top) == 1
+    assert top.results() == [better]
+
+
+def test_evicted_key_can_reenter():
+    top = TopKSelector(2, score=score)
+    top.push(make_candidate('e1', 'Home', 'bet365', 0.02))
+    top.push(make_candidate('e2', 'Home', 'bet365', 0.05))
+    top.push(make_candidate('e3', 'Home', 'bet365', 0.07))  # expulsa e1
+    assert [c['id'] for c in top.results()] == ['e3', 'e2']
+    assert not top.push(make_candidate('e1', 'Home', 'bet365', 0.01))  # sigue por debajo del suelo
+    assert top.push(make_candidate('e1', 'Home', 'bet365', 0.06))      # vuelve a entrar
+    assert [c['id'] for c in top.results()] == ['e3', 'e1']
+    assert len(top) == 2
+
+
+def test_ties_follow_stable_sort():
+    items = [make_candidate(f"e{i}", 'Home', 'bet365', 0.05) for i in range(6)]
+    assert select(items, 3) == items[:3]
+    assert select(items, None) == items
+    # Empate con el suelo: el item posterior no entra
+    top = TopKSelector(2, score=score).extend(items[:2])
+    assert not top.push(items[2])
+
+
+def test_matches_reference_on_random_input():
+    rng = random.Random(7)
+    for trial in range(300):
+        items = [
+            make_candidate(f"e{rng.randrange(15)}", rng.choice(['Home', 'Away']), rng.choice(['bet365', 'pinnacle']),
+                           rng.randrange(8) / 100)  # pocos valores: muchos empates
+            for _ in range(rng.randrange(1, 80))
+        ]
+        for k in (None, 1, 3, 10):
+            assert select(items, k) == reference(items, k), f"trial {trial}, k={k}"
+
+
+def test_compact_drops_dead_entries():
+    top = TopKSelector(3, score=score)
+    for i in range(200):
+        top.push(make_candidate('e1', 'Home', 'bet365', i / 100))  # misma clave, siempre mejora
+    # El borrado perezoso no deja crecer el heap sin límite
+    assert len(top._heap) <= 2 * max(len(top), 1) + 16
+    top._compact()
+    assert len(top._heap) == len(top) == 1
+    assert all(entry[4] for entry in top._heap)
+    assert score(top.results()[0]) == 1.99
+
+
+def test_compact_preserves_selection():
+    rng = random.Random(11)
+    items = [make_candidate(f"e{rng.randrange(30)}", 'Home', 'bet365', rng.randrange(20) / 100) for _ in range(500)]
+    top = TopKSelector(5, score=score)
+    for n, item in enumerate(items, 1):
+        top.push(item)
+        if n % 50 == 0:
+            top._compact()
+            assert top.results() == reference(items[:n], 5)
+    assert top.pushed == len(items)
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    print("=" * 60)
+    print("🧪 TEST: Selección Top-K")
+    print("=" * 60)
+
+    test_same_key_keeps_best_score()
+    print("   ✅ misma clave: se queda el mejor")
+    test_evicted_key_can_reenter()
+    print("   ✅ clave expulsada vuelve a entrar")
+    test_ties_follow_stable_sort()
+    print("   ✅ empates como un sort estable")
+    test_matches_reference_on_random_input()
+    print("   ✅ aleatorio = dedupe + sort estable")
+    test_compact_drops_dead_entries()
+    print("   ✅ _compact() quita entradas muertas")
+    test_compact_preserves_selection()
+    print("   ✅ _compact() no cambia la selección")
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,101 @@
+"""
+test_vig_table.py - Verificar la tabla de vig del ciclo (analytics/vig.py VigTable)
+
+Compara, mercado por mercado de un slate sintético (scripts/benchmark_scan_engines.py),
+la VigTable vectorizada y su versión sin numpy con las funciones escalares
+calculate_vig, market_efficiency_score y remove_vig. Incluye mercados con
+cuotas inválidas (<= 1.0), que deben dar vig 0.0 y fair_prob NaN.
+
+Uso:
+    python test_vig_table.py
+    python -m pytest test_vig_table.py
+"""
+import math
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from benchmark_scan_engines import synthetic_events
+from analytics.vig import VigTable, calculate_vig, remove_vig, market_efficiency_score
+from data.odds_book import OddsBook
+
+TOL = 1e-9
+
+
+def synthetic_book(n_outcomes=5000):
+    """Slate sintético con algunos mercados de cuotas inválidas"""
+    events = synthetic_events(n_outcomes)
+    for i, ev in enumerate(events[::7]):
+        market = ev['bookmakers'][0]['markets'][i % 2]
+        market['outcomes'][0]['price'] = 1.0 if i % 3 else 0.95
+    return OddsBook.from_events(events)
+
+
+def check_table(book, table):
+    """Número de filas comparadas; falla en la primera discrepancia"""
+    checked = 0
+    for g in range(len(book.group_start) - 1):
+        rows = list(book.group_rows(g))
+        prices = [book.price[r] for r in rows]
+        assert abs(float(table.vig[g]) - calculate_vig(prices)) < TOL, f"vig del grupo {g}"
+        if not all(p > 1.0 for p in prices):
+            assert float(table.vig[g]) == 0.0
+            assert all(math.isnan(table.fair_prob[r]) for r in rows), f"fair_prob del grupo inválido {g}"
+            continue
+        assert abs(float(table.efficiency[g]) - market_efficiency_score(calculate_vig(prices))) < TOL
+        for r, fair in zip(rows, remove_vig(prices)):
+            assert abs(float(table.fair_prob[r]) - fair) < TOL, f"fair_prob de la fila {r}"
+            assert table.row_vig(r) == float(table.vig[g])
+            checked += 1
+    return checked
+
+
+def test_vig_table_matches_scalar_functions():
+    """Test 1: VigTable (numpy) = calculate_vig / remove_vig"""
+    book = synthetic_book()
+    checked = check_table(book, VigTable.from_book(book))
+    assert checked > 1000
+    print(f"   ✅ numpy: {checked} filas sin discrepancias")
+
+
+def test_python_fallback_matches_scalar_functions():
+    """Test 2: la versión sin numpy da lo mismo"""
+    book = synthetic_book()
+    checked = check_table(book, VigTable._build_python(book))
+    assert checked > 1000
+    print(f"   ✅ python: {checked} filas sin discrepancias")
+
+
+def test_table_is_memoized_on_book():
+    """Test 3: una pasada por libro"""
+    book = synthetic_book(500)
+    assert VigTable.from_book(book) is VigTable.from_book(book)
+    print("   ✅ tabla memoizada en el OddsBook")
+
+
+def run_all_tests():
+    """Ejecuta todos los tests."""
+    print("=" * 60)
+    print("🧪 TEST: VigTable vs funciones escalares de vig")
+    print("=" * 60)
+
+    test_vig_table_matches_scalar_functions()
+    test_python_fallback_matches_scalar_functions()
+    test_table_is_memoized_on_book()
+
+    print("=" * 60)
+    print("✅ TODOS LOS TESTS PASARON")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        run_all_tests()
+    except Exception as e:
+        print(f"\n❌ Error en tests: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
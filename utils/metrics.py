@@ -0,0 +1,77 @@
+"""
+utils/metrics.py - Registro de métricas en proceso (contadores, gauges, tiempos)
+
+Cada métrica se identifica por nombre + etiquetas opcionales. Los tiempos se
+acumulan como resumen (count, total, max, last) para ver qué etapa domina un
+ciclo y seguir regresiones entre ciclos. snapshot() devuelve todo como dict
+serializable ('nombre{etiqueta=valor}' -> valor).
+
+Ejemplo:
+    metrics.inc('scan.discarded', 3, reason='odds_range')
+    metrics.observe('scan.stage_seconds', 0.012, stage='outcome_loop')
+    metrics.gauge('scan.candidates', 14)
+    metrics.snapshot()
+"""
+import threading
+from typing import Dict, Tuple
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render(key: MetricKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return f"{name}{{{','.join(f'{k}={v}' for k, v in labels)}}}"
+
+
+class MetricsRegistry:
+    """Métricas del proceso; seguro entre hilos (el escaneo puede ir en asyncio.to_thread)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[MetricKey, float] = {}
+        self.gauges: Dict[MetricKey, float] = {}
+        self.timings: Dict[MetricKey, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            summary = self.timings.get(key)
+            if summary is None:
+                summary = self.timings[key] = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+            summary['count'] += 1
+            summary['total'] += seconds
+            summary['max'] = max(summary['max'], seconds)
+            summary['last'] = seconds
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                'counters': {_render(k): v for k, v in self.counters.items()},
+                'gauges': {_render(k): v for k, v in self.gauges.items()},
+                'timings': {_render(k): dict(v) for k, v in self.timings.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+
+# Instancia global
+metrics = MetricsRegistry()
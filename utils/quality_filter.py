@@ -12,6 +12,8 @@ Criterios de calidad:
 from typing import List, Dict, Tuple
 import logging
 
+from utils.top_k import TopKSelector
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,23 +43,17 @@ class QualityFilter:
         if not candidates:
             return []
         
-        # Calcular score de calidad para cada candidato
-        candidates_with_scores = []
+        # Calcular score de calidad para cada candidato y quedarse con los mejores
+        # (heap acotado: no se ordena ni se copia la lista completa)
+        top = TopKSelector(self.max_daily_alerts, score=lambda c: c[0], key=None)
         for candidate in candidates:
-            quality_score = self._calculate_quality_score(candidate)
+            top.push((self._calculate_quality_score(candidate), candidate))
+        
+        best_candidates = []
+        for quality_score, candidate in top.results():
             candidate_with_score = candidate.copy()
             candidate_with_score['quality_score'] = quality_score
-            candidates_with_scores.append(candidate_with_score)
-        
-        # Ordenar por score de calidad (mayor es mejor)
-        sorted_candidates = sorted(
-            candidates_with_scores, 
-            key=lambda x: x['quality_score'], 
-            reverse=True
-        )
-        
-        # Tomar los mejores (máximo 5)
-        best_candidates = sorted_candidates[:self.max_daily_alerts]
+            best_candidates.append(candidate_with_score)
         
         # Agregar ranking de calidad
         for i, candidate in enumerate(best_candidates, 1):
@@ -0,0 +1,104 @@
+"""
+utils/top_k.py - Selección acotada de los K mejores candidatos
+
+Heap de mínimos de tamaño K con score configurable (EV, confianza, calidad...)
+y de-duplicación por clave incorporada: de cada clave se queda el item de mayor
+score. Push O(log K), memoria O(K) y el orden final cuesta O(K log K), sin
+ordenar la lista completa de candidatos.
+
+Con empates de score gana el item empujado antes (igual que un sort estable).
+
+Ejemplo:
+    top = TopKSelector(5, score=lambda c: c['expected_value'])
+    for c in candidates:
+        top.push(c)
+    best = top.results()  # mejor primero
+"""
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+def candidate_key(candidate: Dict) -> Hashable:
+    """Clave de de-duplicación de candidatos: (evento, selección, casa)"""
+    return candidate.get('id'), candidate.get('selection'), candidate.get('bookmaker')
+
+
+class TopKSelector:
+    """Top-K por score con de-duplicación por clave (k=None: sin límite, solo dedupe + orden)"""
+
+    def __init__(self, k: Optional[int], score: Callable[[Any], Any],
+                 key: Optional[Callable[[Any], Hashable]] = candidate_key):
+        self.k = k
+        self.score = score
+        self.key = key
+        self._heap: List[list] = []          # [score, -seq, key, item, alive]
+        self._entries: Dict[Hashable, list] = {}
+        self._live = 0
+        self._seq = itertools.count()
+        self.pushed = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def push(self, item) -> bool:
+        """Ofrece un item; devuelve True si queda entre los K mejores"""
+        self.pushed += 1
+        score = self.score(item)
+        seq = next(self._seq)
+        key = self.key(item) if self.key is not None else seq
+
+        current = self._entries.get(key)
+        if current is not None:
+            # Misma clave: solo reemplaza si mejora (el tamaño no cambia)
+            if not score > current[0]:
+                return False
+            current[4] = False  # borrado perezoso
+            self._live -= 1
+        elif self.k is not None and self._live >= self.k:
+            floor = self._peek()
+            if floor is not None and not (score, -seq) > (floor[0], floor[1]):
+                return False
+
+        entry = [score, -seq, key, item, True]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._live += 1
+
+        if self.k is not None and self._live > self.k:
+            self._pop_min()
+        if len(self._heap) > 2 * max(self._live, 1) + 16:
+            self._compact()
+        return True
+
+    def extend(self, items: Iterable) -> 'TopKSelector':
+        for item in items:
+            self.push(item)
+        return self
+
+    def results(self) -> List:
+        """Items seleccionados, mejor primero"""
+        live = [entry for entry in self._heap if entry[4]]
+        live.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [entry[3] for entry in live]
+
+    # ==================== HEAP ====================
+
+    def _peek(self) -> Optional[list]:
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def _pop_min(self):
+        entry = self._peek()
+        if entry is None:
+            return
+        heapq.heappop(self._heap)
+        entry[4] = False
+        self._live -= 1
+        if self._entries.get(entry[2]) is entry:
+            del self._entries[entry[2]]
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[4]]
+        heapq.heapify(self._heap)
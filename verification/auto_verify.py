@@ -10,6 +10,9 @@ from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 import httpx
 from data.historical_db import historical_db
+from data.http_client import http_clients
+from data.odds_api import ODDS_API_BASE_URL
+from data.replay import get_recorder
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +22,8 @@ class AutoVerifier:
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.the-odds-api.com/v4"
+        self.base_url = f"{ODDS_API_BASE_URL}/v4"
+        self.recorder = get_recorder()
     
     async def verify_pending_predictions(self) -> Dict:
         """
@@ -62,31 +66,31 @@ class AutoVerifier:
                     events_to_verify[event_id] = []
                 events_to_verify[event_id].append(pred)
             
-            # Verificar cada evento
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for event_id, predictions in events_to_verify.items():
-                    try:
-                        result = await self._get_event_result(client, predictions[0])
-                        
-                        if result:
-                            # Verificar todas las predicciones de este evento
-                            for pred in predictions:
-                                verified = self._verify_prediction(pred, result)
-                                if verified:
-                                    stats['verified'] += 1
-                                    if verified['was_correct']:
-                                        stats['correct'] += 1
-                                    else:
-                                        stats['incorrect'] += 1
-                                    stats['total_profit'] += verified['profit_loss']
-                        
-                        # Rate limiting: esperar entre requests
-                        await asyncio.sleep(1)
-                        
-                    except Exception as e:
-                        logger.error(f"Error verificando evento {event_id}: {e}")
-                        continue
-            
+            # Verificar cada evento (cliente compartido con keep-alive)
+            client = await http_clients.get_httpx_client()
+            for event_id, predictions in events_to_verify.items():
+                try:
+                    result = await self._get_event_result(client, predictions[0])
+                    
+                    if result:
+                        # Verificar todas las predicciones de este evento
+                        for pred in predictions:
+                            verified = self._verify_prediction(pred, result)
+                            if verified:
+                                stats['verified'] += 1
+                                if verified['was_correct']:
+                                    stats['correct'] += 1
+                                else:
+                                    stats['incorrect'] += 1
+                                stats['total_profit'] += verified['profit_loss']
+                    
+                    # Rate limiting: esperar entre requests
+                    await asyncio.sleep(1)
+                    
+                except Exception as e:
+                    logger.error(f"Error verificando evento {event_id}: {e}")
+                    continue
+        
             logger.info(f"✅ Verificación completa: {stats['verified']} predicciones, "
                        f"{stats['correct']} correctas, ROI: ${stats['total_profit']:+.2f}")
             
@@ -122,6 +126,8 @@ class AutoVerifier:
             }
             
             response = await client.get(url, params=params)
+            if self.recorder is not None:
+                self.recorder.record('scores', sport_key, response.status_code, response.headers, response.content)
             
             if response.status_code == 200:
                 events = response.json()
@@ -312,6 +318,7 @@ async def run_verification_cycle():
         logger.error("API_KEY no configurada")
         return
     
+    # Usa los pools compartidos de http_clients: los cierra su dueño (main o _main)
     verifier = AutoVerifier(api_key)
     results = await verifier.verify_pending_predictions()
     
@@ -319,6 +326,14 @@ async def run_verification_cycle():
     return results
 
 
+async def _main():
+    """Ejecución standalone: este proceso es el dueño de los pools HTTP"""
+    try:
+        await run_verification_cycle()
+    finally:
+        await http_clients.close()
+
+
 if __name__ == '__main__':
     # Test
-    asyncio.run(run_verification_cycle())
+    asyncio.run(_main())